@@ -0,0 +1,3 @@
+"""
+Benchmarks of the exporter at realistic scale
+"""
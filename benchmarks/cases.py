@@ -0,0 +1,283 @@
+"""
+Benchmark cases at realistic scale
+
+Each case is a setup function taking an ExitStack, for the patches and
+temporary files it needs, and returning the callable to measure.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+import yaml
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+
+from tempus.config import config
+from tempus.sites import Site
+
+BIRTHDAYS = 10_000
+TRASH_ROUTES = 1_000
+SITES = 1_000
+YEARS = 10
+
+# Timezone, country and a location inside it
+ZONES = [
+    ('Europe/Paris', 'FR', 48.8, 2.3),
+    ('Europe/Berlin', 'DE', 52.5, 13.4),
+    ('Europe/London', 'GB', 51.5, -0.1),
+    ('America/New_York', 'US', 40.7, -74.0),
+    ('America/Los_Angeles', 'US', 34.0, -118.2),
+    ('America/Sao_Paulo', 'BR', -23.5, -46.6),
+    ('Australia/Sydney', 'AU', -33.9, 151.2),
+    ('Asia/Tokyo', 'JP', 35.7, 139.7),
+    ('Africa/Johannesburg', 'ZA', -26.2, 28.0),
+    ('Asia/Kolkata', 'IN', 28.6, 77.2),
+]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {}
+
+
+def case(name: str, repeat: int = 5):
+    """Register a benchmark setup"""
+    def register(setup):
+        CASES[name] = (setup, repeat)
+        return setup
+    return register
+
+
+def make_sites(count: int = SITES) -> list:
+    """Sites spread around the zones, a few degrees apart"""
+    sites = []
+    for i in range(count):
+        tz_name, country, latitude, longitude = ZONES[i % len(ZONES)]
+        offset = (i // len(ZONES)) % 50 / 10 - 2.5
+        sites.append(Site(
+            f"site-{i}", latitude + offset, longitude + offset, tz_name, country,
+            'north' if latitude >= 0 else 'south'
+        ))
+    return sites
+
+
+def make_schedule(birthdays: int = BIRTHDAYS, routes: int = TRASH_ROUTES) -> dict:
+    """A schedule file content with many trash routes and birthdays"""
+    trash = {}
+    for i in range(routes):
+        day = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'][i % 5]
+        kind = i % 3
+        if kind == 0:
+            trash[f"route-{i}"] = {'day': day, 'holiday_shift': 'next'}
+        elif kind == 1:
+            trash[f"route-{i}"] = {'day': day, 'frequency': 'biweekly', 'reference_date': '2026-01-05'}
+        else:
+            trash[f"route-{i}"] = {'day': day, 'frequency': 'monthly', 'nth': i % 4 + 1}
+    
+    people = []
+    for i in range(birthdays):
+        day = date(2000, 1, 1) + timedelta(days=i % 366)
+        people.append({'name': f"person-{i}", 'date': day.strftime('%m-%d')})
+    
+    return {'trash': trash, 'birthdays': people}
+
+
+def _use_schedule(stack) -> str:
+    directory = stack.enter_context(tempfile.TemporaryDirectory())
+    path = os.path.join(directory, 'schedule.yaml')
+    with open(path, 'w') as f:
+        yaml.safe_dump(make_schedule(), f)
+    stack.enter_context(patch.object(config, 'schedule_file', path))
+    return path
+
+
+def _use_cache_dir(stack):
+    directory = stack.enter_context(tempfile.TemporaryDirectory())
+    stack.enter_context(patch.object(config, 'cache_dir', directory))
+
+
+@case('schedule_load', repeat=3)
+def setup_schedule_load(stack):
+    from tempus.schedule import get_schedule, invalidate_schedule
+    path = _use_schedule(stack)
+    
+    def run():
+        invalidate_schedule(path)
+        get_schedule(path)
+    return run
+
+
+@case('update_birthday_metrics', repeat=50)
+def setup_update_birthdays(stack):
+    from tempus.birthdays import update_birthday_metrics
+    _use_schedule(stack)
+    return update_birthday_metrics
+
+
+@case('update_trash_metrics', repeat=50)
+def setup_update_trash(stack):
+    from tempus.trash import update_trash_metrics
+    _use_cache_dir(stack)
+    _use_schedule(stack)
+    return update_trash_metrics
+
+
+@case('get_next_collection_days', repeat=50)
+def setup_next_collection(stack):
+    from tempus.trash import get_next_collection_days, load_schedule
+    _use_cache_dir(stack)
+    _use_schedule(stack)
+    entries = list(load_schedule().values())
+    today = datetime(2026, 10, 18)
+    
+    def run():
+        for entry in entries:
+            get_next_collection_days(today, entry)
+    return run
+
+
+def _site_updater(module: str, function: str):
+    def setup(stack):
+        import importlib
+        update = getattr(importlib.import_module(module), function)
+        _use_cache_dir(stack)
+        sites = make_sites()
+        return lambda: update(sites)
+    return setup
+
+
+for _module, _name in [
+    ('tempus.sun', 'update_sun_metrics'),
+    ('tempus.seasons', 'update_season_metrics'),
+    ('tempus.holidays', 'update_holiday_metrics'),
+    ('tempus.moon', 'update_moon_metrics'),
+    ('tempus.clock', 'update_clock_metrics'),
+]:
+    case(_name, repeat=3)(_site_updater(_module, _name))
+
+
+@case('get_dst_info', repeat=3)
+def setup_dst_info(stack):
+    from tempus.clock import get_dst_info
+    start = datetime(2020, 1, 1, 12, tzinfo=timezone.utc)
+    instants = [start + timedelta(days=i) for i in range(365 * YEARS)]
+    zones = [zone[0] for zone in ZONES]
+    
+    def run():
+        for tz_name in zones:
+            for now in instants:
+                get_dst_info(tz_name, now)
+    return run
+
+
+@case('context_years', repeat=1)
+def setup_context_years(stack):
+    from tempus.forecast import context_at
+    _use_cache_dir(stack)
+    _use_schedule(stack)
+    site = make_sites(1)[0]
+    days = [date(2020, 1, 1) + timedelta(days=i) for i in range(365 * YEARS)]
+    
+    def run():
+        for day in days:
+            context_at(site, day)
+    return run
+
+
+def _publish_sites(stack):
+    """Publish every updater for many sites, as a large deployment would"""
+    from tempus.sun import update_sun_metrics
+    from tempus.seasons import update_season_metrics
+    from tempus.holidays import update_holiday_metrics
+    from tempus.moon import update_moon_metrics
+    from tempus.clock import update_clock_metrics
+    from tempus.trash import update_trash_metrics
+    from tempus.birthdays import update_birthday_metrics
+    _use_cache_dir(stack)
+    _use_schedule(stack)
+    sites = make_sites()
+    for update in (update_sun_metrics, update_season_metrics, update_holiday_metrics,
+                   update_moon_metrics, update_clock_metrics):
+        update(sites)
+    update_trash_metrics()
+    update_birthday_metrics()
+    return sites
+
+
+@case('metrics_render')
+def setup_metrics_render(stack):
+    from tempus.metrics import get_snapshot, render_exposition
+    _publish_sites(stack)
+    return lambda: render_exposition(get_snapshot())
+
+
+@case('metrics_cached', repeat=20)
+def setup_metrics_cached(stack):
+    from tempus.metrics import get_exposition
+    _publish_sites(stack)
+    
+    def run():
+        for _ in range(1000):
+            get_exposition()
+    return run
+
+
+@case('push_encode')
+def setup_push_encode(stack):
+    from tempus.push import Pusher
+    _publish_sites(stack)
+    pusher = Pusher('http://localhost/api/v1/write', 'remote_write')
+    # Every series, as the periodic full resend does
+    return lambda: pusher._bodies(True)
+
+
+@case('context_serialize', repeat=20)
+def setup_context_serialize(stack):
+    from tempus.api import ContextCache
+    sites = _publish_sites(stack)
+    
+    def run():
+        # A fresh cache encodes every fragment again
+        cache = ContextCache()
+        cache.get()
+        cache.get(sites[-1].name, ('sun', 'clock'))
+    return run
+
+
+@case('context_http', repeat=3)
+def setup_context_http(stack):
+    from tempus.api import create_app
+    _publish_sites(stack)
+    
+    async def requests():
+        # A plain session, TestClient keeps every response until it closes
+        async with TestServer(create_app()) as server, ClientSession() as session:
+            for path in ('/context', '/metrics'):
+                for _ in range(200):
+                    async with session.get(server.make_url(path), headers={'Accept-Encoding': 'gzip'}) as resp:
+                        await resp.read()
+    
+    return lambda: asyncio.run(requests())
+
+
+def _python(stack, *args):
+    """Run a fresh interpreter, for cold start times"""
+    cache_dir = stack.enter_context(tempfile.TemporaryDirectory())
+    env = {**os.environ, 'CACHE_DIR': cache_dir}
+    return lambda: subprocess.run(
+        [sys.executable, *args], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL
+    )
+
+
+@case('cold_import_seasons', repeat=5)
+def setup_cold_import(stack):
+    return _python(stack, '-c', 'import tempus.seasons')
+
+
+@case('cold_start', repeat=5)
+def setup_cold_start(stack):
+    # Imports, then every updater and the first bodies, with a warm cache dir
+    return _python(stack, '-m', 'tempus', '--profile-startup')
@@ -0,0 +1,160 @@
+"""
+Benchmark runner
+
+`python -m benchmarks.run` measures every case of benchmarks.cases: wall
+time over a few runs, then the allocations and peak memory of one run
+under tracemalloc. Results are compared with a JSON baseline and the run
+fails when a case got slower or bigger than the threshold allows.
+`--save` writes the results as the new baseline.
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack
+from loguru import logger
+from benchmarks.cases import CASES
+from tempus.sites import shutdown_pool
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_THRESHOLD = float(os.getenv('BENCHMARK_THRESHOLD', '0.25'))
+
+# Memory differences below this are noise (interned strings, caches...)
+MEMORY_SLACK = 64 * 1024
+
+
+def measure(func, repeat: int) -> dict:
+    """Wall time of `repeat` runs after a warmup, then allocations of one run"""
+    func()
+    
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    
+    stats = after.compare_to(before, 'filename')
+    return {
+        'min_seconds': min(times),
+        'median_seconds': statistics.median(times),
+        'peak_bytes': peak,
+        'allocated_bytes': sum(stat.size_diff for stat in stats if stat.size_diff > 0),
+        'allocated_blocks': sum(stat.count_diff for stat in stats if stat.count_diff > 0),
+    }
+
+
+def run_case(name: str, repeat: int = None) -> dict:
+    setup, default_repeat = CASES[name]
+    with ExitStack() as stack:
+        func = setup(stack)
+        return measure(func, repeat or default_repeat)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Regressions of results over a baseline, as messages"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        
+        limit = reference['min_seconds'] * (1 + threshold)
+        if result['min_seconds'] > limit:
+            regressions.append(
+                f"{name}: {result['min_seconds'] * 1000:.2f} ms, "
+                f"baseline {reference['min_seconds'] * 1000:.2f} ms"
+            )
+        
+        limit = reference['peak_bytes'] * (1 + threshold) + MEMORY_SLACK
+        if result['peak_bytes'] > limit:
+            regressions.append(
+                f"{name}: peak {result['peak_bytes'] / 1024:.0f} KiB, "
+                f"baseline {reference['peak_bytes'] / 1024:.0f} KiB"
+            )
+    return regressions
+
+
+def _format(name: str, result: dict, reference: dict = None) -> str:
+    line = (
+        f"{name:<28} {result['min_seconds'] * 1000:>10.2f} ms "
+        f"{result['median_seconds'] * 1000:>10.2f} ms "
+        f"{result['peak_bytes'] / 1024:>10.0f} KiB "
+        f"{result['allocated_blocks']:>9} blocks"
+    )
+    if reference:
+        line += f"  {result['min_seconds'] / reference['min_seconds'] - 1:>+7.1%}"
+    return line
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-k', dest='filter', help="only the cases whose name contains this")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument('--save', action='store_true', help="write the results as the baseline")
+    parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD,
+        help="allowed relative regression, 0.25 by default (BENCHMARK_THRESHOLD)"
+    )
+    parser.add_argument('--repeat', type=int, help="timed runs of every case")
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    
+    # Per-update debug logs would be measured too
+    logger.remove()
+    logger.add(sys.stderr, level='WARNING')
+    
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['cases']
+    
+    print(f"{'case':<28} {'min':>13} {'median':>13} {'peak':>14} {'allocations':>16}")
+    results = {}
+    try:
+        for name in CASES:
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = run_case(name, args.repeat)
+            print(_format(name, results[name], baseline.get(name)), flush=True)
+    finally:
+        shutdown_pool()
+    
+    document = {
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'cpus': os.cpu_count(),
+        'cases': results,
+    }
+    for path in filter(None, [args.output, args.baseline if args.save else None]):
+        with open(path, 'w') as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+        print(f"Results written to {path}")
+    
+    if not baseline:
+        if not args.save:
+            print(f"No baseline at {args.baseline}, run with --save to create it")
+        return 0
+    
+    regressions = compare(results, baseline, args.threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
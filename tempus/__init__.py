@@ -6,6 +6,13 @@ __version__ = "0.1.0"
 __author__ = "dmachard"
 __license__ = "MIT"
 
-from tempus.monitor import start_monitor
+__all__ = ["start_monitor"]
 
-__all__ = ["start_monitor"]
\ No newline at end of file
+
+def __getattr__(name):
+    # Importing the monitor loads every updater and the HTTP server, only
+    # pay for it when the exporter is started
+    if name == "start_monitor":
+        from tempus.monitor import start_monitor
+        return start_monitor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -1,7 +1,95 @@
 """
 Entry point for running tempus as a module
 """
-from tempus.monitor import start_monitor
+import argparse
+import sys
+
+
+def backfill(args):
+    """Write the metrics of a past or future range as OpenMetrics"""
+    from loguru import logger
+    from tempus.backfill import generate_backfill, parse_instant, parse_step
+    from tempus.sites import get_sites
+    
+    start, end = parse_instant(args.start), parse_instant(args.end)
+    if end <= start:
+        raise SystemExit("--to must be after --from")
+    
+    # Per-computation debug logs would dominate the run time
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+    
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        for chunk in generate_backfill(start, end, parse_step(args.step), get_sites()):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def textfile(args):
+    """Write the metrics for the node_exporter textfile collector"""
+    from loguru import logger
+    
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+    
+    if args.watch:
+        from tempus.monitor import run_worker
+        run_worker(textfile=args.out)
+        return
+    
+    from tempus.monitor import run_all_updates
+    from tempus.textfile import write_textfile
+    
+    failed = run_all_updates()
+    if write_textfile(args.out):
+        logger.info(f"Wrote {args.out}")
+    if failed:
+        # Written anyway, without the series of the failed updaters
+        raise SystemExit(f"Failed updaters: {', '.join(failed)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tempus", description="Tempus Exporter")
+    parser.add_argument(
+        '--profile-startup', action='store_true',
+        help="print the import and startup time of every step, then exit"
+    )
+    commands = parser.add_subparsers(dest='command')
+    
+    backfill_parser = commands.add_parser(
+        'backfill',
+        help="write metrics over a time range for promtool tsdb create-blocks-from openmetrics"
+    )
+    backfill_parser.add_argument('--from', dest='start', required=True, help="start date or datetime (UTC if naive)")
+    backfill_parser.add_argument('--to', dest='end', required=True, help="end date or datetime, excluded")
+    backfill_parser.add_argument('--step', default='60s', help="interval between samples (default 60s)")
+    backfill_parser.add_argument('--output', '-o', default='-', help="output file (default stdout)")
+    
+    textfile_parser = commands.add_parser(
+        'textfile',
+        help="write metrics to a file for the node_exporter textfile collector, instead of serving them"
+    )
+    textfile_parser.add_argument('--out', '-o', required=True, help="output file, e.g. /var/lib/node_exporter/tempus.prom")
+    textfile_parser.add_argument(
+        '--watch', action='store_true',
+        help="keep running and rewrite the file whenever values change (default: write once and exit)"
+    )
+    
+    args = parser.parse_args(argv)
+    if args.profile_startup:
+        from tempus.startup import print_profile, profile_startup
+        print_profile(profile_startup())
+    elif args.command == 'backfill':
+        backfill(args)
+    elif args.command == 'textfile':
+        textfile(args)
+    else:
+        from tempus.monitor import start_monitor
+        start_monitor()
+
 
 if __name__ == "__main__":
-    start_monitor()
\ No newline at end of file
+    main()
@@ -1,30 +1,581 @@
 """
-JSON API endpoint for human-readable context
+HTTP server for the metrics and the JSON API
+
+A single aiohttp application serves the Prometheus /metrics endpoint and
+the human-readable JSON endpoints on one port and one event loop.
+
+The context is encoded to JSON once per change, one fragment per section,
+and responses are assembled from those fragments and cached with their
+compressed variants until the next change.
+
+/context/stream pushes the changed sections to subscribers over
+Server-Sent Events, or WebSocket when the client asks for an upgrade,
+instead of having displays poll /context.
 """
+import asyncio
+import gzip
+import hashlib
+import json
+import re
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from email.utils import formatdate
 from aiohttp import web
-from datetime import datetime
+from datetime import date, timedelta
 from loguru import logger
-from tempus.metrics import current_context
+from tempus.config import config
+from tempus.forecast import SECTIONS, get_context
+from tempus.metrics import (
+    accepts_encoding,
+    accepts_gzip,
+    accepts_openmetrics,
+    context_listeners,
+    context_version,
+    current_context,
+    etag_matches,
+    get_exposition,
+    render_runtime,
+    site_contexts
+)
+from tempus.sites import get_sites
+from tempus.workdays import count_workdays, offset_workdays
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 256
+# Days computed per worker thread call when streaming a range
+RANGE_CHUNK_DAYS = 31
+
+
+@dataclass
+class EncodedBody:
+    """A response body with its ETag and compressed variants"""
+    
+    body: bytes
+    etag: str
+    encoded: dict = field(default_factory=dict)
+    
+    def encode(self, accept_encoding: str) -> tuple:
+        """(content coding or None, bytes) preferred by an Accept-Encoding header"""
+        if len(self.body) < MIN_COMPRESS_SIZE:
+            return None, self.body
+        
+        for coding in ('br', 'gzip'):
+            if coding == 'br' and brotli is None:
+                continue
+            if accepts_encoding(accept_encoding, coding):
+                if coding not in self.encoded:
+                    if coding == 'br':
+                        self.encoded[coding] = brotli.compress(self.body)
+                    else:
+                        self.encoded[coding] = gzip.compress(self.body, mtime=0)
+                return coding, self.encoded[coding]
+        
+        return None, self.body
+
+
+def _json_object(fragments: dict, names) -> bytes:
+    """JSON object of encoded values, same layout as json.dumps of the whole dict"""
+    return b'{' + b', '.join(json.dumps(name).encode() + b': ' + fragments[name] for name in names) + b'}'
+
+
+class ContextCache:
+    """JSON bodies of the context, valid until the context changes
+    
+    Only used from the event loop. Updaters replace context sections and
+    bump the context version afterwards, so a body built while an update
+    runs is rebuilt on the next request.
+    """
+    
+    def __init__(self, size: int = 256):
+        self.size = size
+        self.version = None
+        self.last_modified = 0.0
+        # Site (None for the default view) to {section: JSON bytes}
+        self.fragments = {}
+        # (site, sections) to EncodedBody, least recently used first
+        self.bodies = OrderedDict()
+    
+    def _refresh(self):
+        version, modified = context_version()
+        if version != self.version:
+            # HTTP dates have a one second resolution: every version served
+            # gets its own second, so If-Modified-Since never hides a change
+            self.version = version
+            self.last_modified = max(float(int(modified)), self.last_modified + 1)
+            self.fragments.clear()
+            self.bodies.clear()
+    
+    def site_fragments(self, site: str = None) -> dict:
+        """{section: JSON bytes} of a site view (the default one when None)"""
+        self._refresh()
+        return self._fragments(site)
+    
+    def _fragments(self, site: str) -> dict:
+        fragments = self.fragments.get(site)
+        if fragments is None:
+            if site is None:
+                view = dict(current_context)
+            else:
+                view = {**current_context, 'site': site, **site_contexts[site]}
+            fragments = {key: json.dumps(value).encode() for key, value in view.items()}
+            self.fragments[site] = fragments
+        return fragments
+    
+    def get(self, site: str = None, sections: tuple = None) -> EncodedBody:
+        """Body of a site view (all sections when None), KeyError on unknown section"""
+        self._refresh()
+        key = (site, sections)
+        cached = self.bodies.get(key)
+        if cached is not None:
+            self.bodies.move_to_end(key)
+            return cached
+        
+        fragments = self._fragments(site)
+        body = _json_object(fragments, fragments if sections is None else sections)
+        cached = EncodedBody(body, 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"')
+        
+        self.bodies[key] = cached
+        if len(self.bodies) > self.size:
+            self.bodies.popitem(last=False)
+        return cached
+
+
+_context_cache = ContextCache()
+
+
+class Subscriber:
+    """Messages waiting for one stream client, at most STREAM_QUEUE_SIZE"""
+    
+    def __init__(self, view: tuple):
+        self.view = view
+        self.messages = deque()
+        self.wakeup = asyncio.Event()
+        self.closed = False
+    
+    def push(self, message: tuple) -> bool:
+        """Queue (event, version, JSON payload), False when the queue is full"""
+        if len(self.messages) >= config.stream_queue_size:
+            return False
+        self.messages.append(message)
+        self.wakeup.set()
+        return True
+    
+    def reset(self, message: tuple):
+        """Replace the queued diffs of a slow client with the full context"""
+        self.messages.clear()
+        self.push(message)
+    
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+    
+    async def get(self) -> list:
+        """Queued messages, [] after STREAM_KEEPALIVE seconds without any, None once closed"""
+        if not self.messages and not self.closed:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=config.stream_keepalive)
+            except asyncio.TimeoutError:
+                return []
+        self.wakeup.clear()
+        if self.closed:
+            return None
+        messages = list(self.messages)
+        self.messages.clear()
+        return messages
+
+
+@dataclass
+class StreamView:
+    """Sections last sent to the subscribers of a (site, sections) view"""
+    
+    fragments: dict
+    version: int
+    subscribers: set = field(default_factory=set)
+
+
+class ContextStream:
+    """Fans context changes out to the /context/stream subscribers
+    
+    Each change is diffed and encoded once per view, then queued for all
+    of its subscribers, so idle clients cost a queue and a coroutine.
+    """
+    
+    def __init__(self):
+        self.views = {}
+        self.changed = asyncio.Event()
+        self.task = None
+        self.listener = None
+    
+    def __len__(self):
+        return sum(len(view.subscribers) for view in self.views.values())
+    
+    def _fragments(self, view: tuple) -> dict:
+        site, sections = view
+        fragments = _context_cache.site_fragments(site)
+        if sections is None:
+            return fragments
+        return {name: fragments[name] for name in sections}
+    
+    def subscribe(self, site: str, sections: tuple) -> Subscriber:
+        """New subscriber, first sent the whole view, KeyError on unknown section"""
+        key = (site, sections)
+        view = self.views.get(key)
+        if view is None:
+            view = StreamView(self._fragments(key), context_version()[0])
+            self.views[key] = view
+        
+        subscriber = Subscriber(key)
+        # From the last sent state, the next diffs apply to it
+        subscriber.push(('context', view.version, _json_object(view.fragments, view.fragments)))
+        view.subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: Subscriber):
+        view = self.views.get(subscriber.view)
+        if view is not None:
+            view.subscribers.discard(subscriber)
+            if not view.subscribers:
+                del self.views[subscriber.view]
+    
+    def broadcast(self):
+        """Queue the changed sections of every view for its subscribers"""
+        version = context_version()[0]
+        for key, view in self.views.items():
+            fragments = self._fragments(key)
+            changed = {name: value for name, value in fragments.items() if view.fragments.get(name) != value}
+            changed.update((name, b'null') for name in view.fragments.keys() - fragments.keys())
+            if not changed:
+                continue
+            
+            view.fragments = fragments
+            view.version = version
+            diff = ('diff', version, _json_object(changed, changed))
+            full = None
+            for subscriber in view.subscribers:
+                if not subscriber.push(diff):
+                    full = full or ('context', version, _json_object(fragments, fragments))
+                    subscriber.reset(full)
+    
+    async def _run(self):
+        while True:
+            await self.changed.wait()
+            self.changed.clear()
+            self.broadcast()
+    
+    async def start(self, app):
+        loop = asyncio.get_running_loop()
+        
+        def listener():
+            # Called from updater threads
+            try:
+                loop.call_soon_threadsafe(self.changed.set)
+            except RuntimeError:
+                pass
+        
+        self.listener = listener
+        context_listeners.append(listener)
+        self.task = asyncio.create_task(self._run())
+    
+    async def stop(self, app):
+        """Release the subscribers, so that their handlers return"""
+        for view in self.views.values():
+            for subscriber in view.subscribers:
+                subscriber.close()
+    
+    async def cleanup(self, app):
+        if self.listener in context_listeners:
+            context_listeners.remove(self.listener)
+        if self.task is not None:
+            self.task.cancel()
+
+
+CONTEXT_STREAM = web.AppKey('context_stream', ContextStream)
+
+
+async def handle_metrics(request):
+    """Return the cached exposition, in OpenMetrics when the scraper accepts it
+    
+    The live process and Python runtime series (METRICS_RUNTIME) are rendered
+    for every full response and added to the cached body. They change on
+    every scrape and are left out of the ETag, which validates the cached
+    part: a 304 keeps the scraper's previous runtime values.
+    """
+    openmetrics_format = accepts_openmetrics(request.headers.get('Accept'))
+    exposition = get_exposition(openmetrics_format)
+    headers = {'Vary': 'Accept, Accept-Encoding', 'ETag': exposition.etag}
+    if etag_matches(request.headers.get('If-None-Match'), exposition.etag):
+        return web.Response(status=304, headers=headers)
+    
+    runtime = render_runtime(openmetrics_format) if config.metrics_runtime else b''
+    if accepts_gzip(request.headers.get('Accept-Encoding')):
+        body = exposition.gzip_body_with(runtime) if runtime else exposition.gzip_body
+        headers['Content-Encoding'] = 'gzip'
+    else:
+        body = exposition.body_with(runtime)
+    headers['Content-Type'] = exposition.content_type
+    return web.Response(body=body, headers=headers)
+
+def _not_modified(request, etag: str, last_modified: float) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since
+    if 'If-None-Match' in request.headers:
+        return etag_matches(request.headers['If-None-Match'], etag)
+    since = request.if_modified_since
+    return since is not None and last_modified <= since.timestamp()
+
+def _query_sections(request) -> tuple:
+    sections = request.query.get('sections')
+    if sections is None:
+        return None
+    return tuple(dict.fromkeys(name.strip() for name in sections.split(',') if name.strip()))
+
+def _query_site(request):
+    name = request.query.get('site')
+    sites = get_sites()
+    if name is None:
+        return sites[0]
+    for site in sites:
+        if site.name == name:
+            return site
+    raise web.HTTPNotFound(text=f"Unknown site {name}")
+
+def _select(context: dict, sections: tuple) -> dict:
+    if sections is None:
+        return context
+    unknown = [name for name in sections if name not in context]
+    if unknown:
+        raise web.HTTPBadRequest(text=f"Unknown section {unknown[0]}")
+    return {name: context[name] for name in sections}
 
 async def handle_context(request):
-    """Return current context as JSON"""
-    return web.json_response(current_context)
+    """Return current context as JSON, optionally for a given ?site=, ?date= and ?sections="""
+    if 'date' in request.query:
+        return await handle_dated_context(request)
+    
+    site = request.query.get('site')
+    if site is not None and site not in site_contexts:
+        raise web.HTTPNotFound(text=f"Unknown site {site}")
+    
+    sections = _query_sections(request)
+    
+    try:
+        cached = _context_cache.get(site, sections)
+    except KeyError as e:
+        raise web.HTTPBadRequest(text=f"Unknown section {e.args[0]}")
+    
+    headers = {
+        'ETag': cached.etag,
+        'Last-Modified': formatdate(_context_cache.last_modified, usegmt=True),
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    if _not_modified(request, cached.etag, _context_cache.last_modified):
+        return web.Response(status=304, headers=headers)
+    
+    coding, body = cached.encode(request.headers.get('Accept-Encoding'))
+    if coding:
+        headers['Content-Encoding'] = coding
+    headers['Content-Type'] = 'application/json; charset=utf-8'
+    return web.Response(body=body, headers=headers)
+
+async def handle_dated_context(request):
+    """Return the context of a site on ?date="""
+    day = _query_date(request, 'date')
+    _check_date(day, config.context_max_days)
+    site = _query_site(request)
+    sections = _query_sections(request)
+    
+    # First computations of a year build its tables, off the event loop
+    context = await asyncio.get_running_loop().run_in_executor(None, get_context, site, day)
+    return web.json_response(_select(context, sections))
+
+def _encode_lines(site, days: list, sections: tuple) -> bytes:
+    return b''.join(
+        json.dumps(_select(get_context(site, day), sections)).encode() + b'\n' for day in days
+    )
+
+async def handle_context_range(request):
+    """Stream the context of every day in [from, to) as NDJSON"""
+    start = _query_date(request, 'from')
+    end = _query_date(request, 'to')
+    if end <= start:
+        raise web.HTTPBadRequest(text="'to' must be after 'from'")
+    if (end - start).days > config.context_range_max_days:
+        raise web.HTTPBadRequest(text=f"Range limited to {config.context_range_max_days} days")
+    _check_date(start, config.context_max_days)
+    _check_date(end - timedelta(days=1), config.context_max_days)
+    
+    site = _query_site(request)
+    sections = _query_sections(request)
+    # Fail before streaming on unknown sections
+    _select(dict.fromkeys(SECTIONS), sections)
+    
+    response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+    response.enable_compression()
+    await response.prepare(request)
+    
+    loop = asyncio.get_running_loop()
+    days = [start + timedelta(days=i) for i in range((end - start).days)]
+    for i in range(0, len(days), RANGE_CHUNK_DAYS):
+        chunk = days[i:i + RANGE_CHUNK_DAYS]
+        await response.write(await loop.run_in_executor(None, _encode_lines, site, chunk, sections))
+    
+    await response.write_eof()
+    return response
+
+def _query_date(request, name: str) -> date:
+    value = request.query.get(name)
+    if value is None:
+        raise web.HTTPBadRequest(text=f"Missing '{name}' parameter")
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"Invalid '{name}' date, expected YYYY-MM-DD")
+
+def _check_date(day: date, max_days: int):
+    # Every year asked for builds, caches and persists its holiday index
+    if abs((day - date.today()).days) > max_days:
+        raise web.HTTPBadRequest(text=f"Dates limited to {max_days} days from today")
+
+async def handle_workdays(request):
+    """Count working days in [from, to), or the date ?days= working days after from"""
+    start = _query_date(request, 'from')
+    country = request.query.get('country', config.country_code).upper()
+    subdivision = request.query.get('subdiv') or None
+    weekmask = request.query.get('weekmask') or None
+    # Every weekmask gets its own cached calendar
+    if weekmask is not None and not (re.fullmatch(r'[01]{7}', weekmask) and '1' in weekmask):
+        raise web.HTTPBadRequest(text="'weekmask' must be 7 digits, Monday to Sunday, 1 = working day")
+    
+    _check_date(start, config.workdays_max_days)
+    result = {'from': start.isoformat(), 'country': country, 'subdivision': subdivision}
+    try:
+        if 'days' in request.query:
+            days = int(request.query['days'])
+            # Calendar days the offset reaches, at least
+            reach = abs(days) * 7 // (weekmask or config.weekmask).count('1')
+            if reach > config.workdays_max_days:
+                raise web.HTTPBadRequest(text=f"Offset reaches more than {config.workdays_max_days} days")
+            result['days'] = days
+            result['date'] = offset_workdays(start, days, country, subdivision, weekmask).isoformat()
+        else:
+            end = _query_date(request, 'to')
+            _check_date(end, config.workdays_max_days)
+            result['to'] = end.isoformat()
+            result['working_days'] = count_workdays(start, end, country, subdivision, weekmask)
+    except (KeyError, NotImplementedError, ValueError) as e:
+        raise web.HTTPBadRequest(text=str(e))
+    
+    return web.json_response(result)
+
+def _stream_frame(message: tuple, websocket: bool) -> bytes:
+    event, version, data = message
+    if websocket:
+        return b'{"event": "' + event.encode() + b'", "id": ' + str(version).encode() + b', "data": ' + data + b'}'
+    return b'id: ' + str(version).encode() + b'\nevent: ' + event.encode() + b'\ndata: ' + data + b'\n\n'
+
+async def _read_websocket(ws, subscriber: Subscriber):
+    # Client messages are ignored, only their end matters
+    async for _ in ws:
+        pass
+    subscriber.close()
 
-async def start_api_server(port: int):
-    """Start the JSON API server"""
+async def handle_context_stream(request):
+    """Stream the context, then its changed sections, as SSE or WebSocket messages
+    
+    Every message carries a whole JSON object: 'context' with every section
+    of the view, 'diff' with the changed ones (null when removed). A client
+    that falls STREAM_QUEUE_SIZE messages behind gets a 'context' again.
+    """
+    site = request.query.get('site')
+    if site is not None and site not in site_contexts:
+        raise web.HTTPNotFound(text=f"Unknown site {site}")
+    
+    stream = request.app[CONTEXT_STREAM]
+    if len(stream) >= config.stream_max_clients:
+        raise web.HTTPServiceUnavailable(text="Too many stream clients", headers={'Retry-After': '60'})
+    
+    ws = web.WebSocketResponse(heartbeat=config.stream_keepalive)
+    websocket = ws.can_prepare(request).ok
+    try:
+        subscriber = stream.subscribe(site, _query_sections(request))
+    except KeyError as e:
+        raise web.HTTPBadRequest(text=f"Unknown section {e.args[0]}")
+    
+    reader = None
+    try:
+        if websocket:
+            response = ws
+            await ws.prepare(request)
+            reader = asyncio.create_task(_read_websocket(ws, subscriber))
+        else:
+            response = web.StreamResponse(headers={
+                'Content-Type': 'text/event-stream',
+                'Cache-Control': 'no-cache',
+                # Nginx would otherwise hold the events back
+                'X-Accel-Buffering': 'no'
+            })
+            await response.prepare(request)
+        
+        while True:
+            messages = await subscriber.get()
+            if messages is None:
+                break
+            if websocket:
+                for message in messages:
+                    await ws.send_str(_stream_frame(message, True).decode())
+            else:
+                frames = [_stream_frame(message, False) for message in messages]
+                # A comment line keeps idle connections open through proxies
+                await response.write(b''.join(frames) or b': keepalive\n\n')
+    except ConnectionResetError:
+        pass
+    finally:
+        stream.unsubscribe(subscriber)
+        if reader is not None:
+            reader.cancel()
+    
+    if websocket:
+        await ws.close()
+    return response
+
+def create_app() -> web.Application:
+    """Application serving every endpoint"""
     app = web.Application()
+    stream = app[CONTEXT_STREAM] = ContextStream()
+    app.on_startup.append(stream.start)
+    app.on_shutdown.append(stream.stop)
+    app.on_cleanup.append(stream.cleanup)
+    app.router.add_get('/metrics', handle_metrics)
     app.router.add_get('/context', handle_context)
-    
-    runner = web.AppRunner(app)
+    app.router.add_get('/context/range', handle_context_range)
+    app.router.add_get('/context/stream', handle_context_stream)
+    app.router.add_get('/workdays', handle_workdays)
+    return app
+
+async def start_api_server(port: int, reuse_port: bool = False):
+    """Start the HTTP server, sharing the port with other workers when reuse_port"""
+    runner = web.AppRunner(
+        create_app(),
+        keepalive_timeout=config.http_keepalive_timeout,
+        access_log=None
+    )
     await runner.setup()
-    site = web.TCPSite(runner, '0.0.0.0', port)
+    site = web.TCPSite(
+        runner, '0.0.0.0', port,
+        backlog=config.http_backlog,
+        reuse_port=reuse_port or None
+    )
     await site.start()
     
     try:
         # Keep running until cancelled
-        import asyncio
         await asyncio.Event().wait()
     except asyncio.CancelledError:
-        logger.info("API server shutting down...")
+        logger.info("HTTP server shutting down...")
     finally:
         await runner.cleanup()
\ No newline at end of file
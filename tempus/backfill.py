@@ -0,0 +1,216 @@
+"""
+Historical backfill in the OpenMetrics format
+
+`python -m tempus backfill --from 2016-01-01 --to 2026-01-01 --step 1m`
+writes every metric over a time range, for `promtool tsdb
+create-blocks-from openmetrics`. Like the exporter, each updater is only
+evaluated at the instants its values change (local midnight, sunrise, DST
+transitions...), on the yearly precomputed ephemeris, season, lunation and
+holiday tables, and its values are repeated at every step in between.
+"""
+import math
+import re
+import tempfile
+from array import array
+from datetime import datetime, timezone
+import pytz
+from prometheus_client.utils import floatToGoString
+from tempus.config import config
+from tempus.metrics import METRICS
+from tempus.schedule import get_schedule
+from tempus.scheduler import MIN_INTERVAL
+from tempus.sun import compute_sun, sun_samples, next_sun_change
+from tempus.seasons import compute_season, season_samples, next_season_change
+from tempus.holidays import compute_calendar, calendar_samples, next_holiday_change
+from tempus.trash import compute_trash, trash_samples, next_trash_change
+from tempus.moon import compute_moon, moon_samples, next_moon_change
+from tempus.clock import compute_clock, clock_samples, next_clock_change
+from tempus.birthdays import (
+    compute_birthdays,
+    birthday_samples,
+    get_birthday_index,
+    next_birthday_change
+)
+
+# Most lines joined in one chunk of output
+CHUNK_LINES = 65536
+
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_step(value: str) -> int:
+    """Step in seconds from a number of seconds or a duration like 30s, 1m, 1h"""
+    match = re.fullmatch(r'(\d+)([smhd]?)', value.strip())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"invalid step {value!r}")
+    return int(match.group(1)) * _DURATION_UNITS[match.group(2) or 's']
+
+
+def parse_instant(value: str) -> datetime:
+    """Aware instant from an ISO date (UTC midnight) or datetime (UTC if naive)"""
+    instant = datetime.fromisoformat(value)
+    if instant.tzinfo is None:
+        instant = instant.replace(tzinfo=timezone.utc)
+    return instant
+
+
+def _safe(func, *args):
+    try:
+        return func(*args)
+    except Exception:
+        # The updaters skip a site that cannot be computed, so does the backfill
+        return None
+
+
+def _sun_at(now: datetime, sites: list):
+    return sun_samples(sites, [_safe(compute_sun, site, now) for site in sites])
+
+
+def _season_at(now: datetime, sites: list):
+    return season_samples(sites, [_safe(compute_season, site, now) for site in sites])
+
+
+def _calendar_at(now: datetime, sites: list):
+    return calendar_samples(sites, [_safe(compute_calendar, site, now) for site in sites])
+
+
+def _moon_at(now: datetime, sites: list):
+    return moon_samples(sites, [compute_moon(now, site.timezone) for site in sites])
+
+
+def _clock_at(now: datetime, sites: list):
+    return clock_samples(sites, [compute_clock(site.timezone, now) for site in sites], {})
+
+
+def _timezones_at(now: datetime, sites: list):
+    return clock_samples([], [], {tz_name: compute_clock(tz_name, now) for tz_name in config.clock_timezones})
+
+
+def _trash_at(now: datetime, sites: list):
+    today = now.astimezone(pytz.timezone(config.timezone)).date()
+    return trash_samples(compute_trash(get_schedule(config.schedule_file).trash, today))
+
+
+def _birthday_at(now: datetime, sites: list):
+    today = now.astimezone(pytz.timezone(config.timezone)).date()
+    index = get_birthday_index(get_schedule(config.schedule_file).birthdays)
+    within = index.upcoming(today, within_days=config.birthday_window_days)
+    return birthday_samples(compute_birthdays(index, today), len(within))
+
+
+# (values at an instant, next change after an instant, evaluated per site)
+SOURCES = (
+    (_sun_at, next_sun_change, True),
+    (_season_at, next_season_change, True),
+    (_calendar_at, next_holiday_change, True),
+    (_trash_at, lambda now, sites: next_trash_change(now), False),
+    (_moon_at, next_moon_change, True),
+    (_clock_at, next_clock_change, True),
+    (_timezones_at, next_clock_change, False),
+    (_birthday_at, lambda now, sites: next_birthday_change(now), False),
+)
+
+
+def _collect(evaluate, next_change, sites: list, start: datetime, end: datetime) -> tuple:
+    """Value changes of a source over [start, end)
+    
+    Returns the segment start timestamps, followed by the end, and for each
+    metric {label values: (segment indexes, values)} in compact arrays.
+    """
+    starts = array('d')
+    series = {}
+    now = start
+    
+    while now < end:
+        index = len(starts)
+        starts.append(now.timestamp())
+        for name, values in evaluate(now, sites).values.items():
+            by_labels = series.setdefault(name, {})
+            for labels, value in values.items():
+                indexes, points = by_labels.setdefault(labels, (array('l'), array('d')))
+                indexes.append(index)
+                points.append(value)
+        now = max(next_change(now, sites), now + MIN_INTERVAL)
+    
+    starts.append(end.timestamp())
+    return starts, series
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _runs(starts: array, indexes: array, points: array):
+    """(start, end, value) of the runs of one series, while it is published"""
+    j = 0
+    while j < len(indexes):
+        # Consecutive segments with the same value form one run
+        first = indexes[j]
+        value = points[j]
+        while j + 1 < len(indexes) and indexes[j + 1] == indexes[j] + 1 and points[j + 1] == value:
+            j += 1
+        yield starts[first], starts[indexes[j] + 1], value
+        j += 1
+
+
+def _run_lines(prefix: str, run_start: float, run_end: float, value: float, origin: int, step: int):
+    """Lines of one run, a sample every step from origin"""
+    low = origin + math.ceil((run_start - origin) / step) * step
+    high = math.ceil(run_end)
+    head = f"{prefix} {floatToGoString(value)} "
+    for chunk_start in range(low, high, step * CHUNK_LINES):
+        timestamps = range(chunk_start, min(high, chunk_start + step * CHUNK_LINES), step)
+        yield head + ('\n' + head).join(map(str, timestamps)) + '\n'
+
+
+def _spill(spills: dict, series: dict, starts: array):
+    """Write the runs of collected series to a temporary file per family"""
+    for name, by_labels in series.items():
+        spec = METRICS[name]
+        spill = spills.get(name)
+        if spill is None:
+            spill = spills[name] = tempfile.TemporaryFile('w+')
+        for labels, (indexes, points) in by_labels.items():
+            pairs = ','.join(f'{label}="{_escape(value)}"' for label, value in zip(spec.labelnames, labels))
+            prefix = f"{name}{{{pairs}}}" if pairs else name
+            # repr() keeps floats exact
+            spill.writelines(
+                f"{prefix}\t{run_start!r}\t{run_end!r}\t{value!r}\n"
+                for run_start, run_end, value in _runs(starts, indexes, points)
+            )
+
+
+def generate_backfill(start: datetime, end: datetime, step: int, sites: list):
+    """OpenMetrics text of every metric over [start, end), in chunks
+    
+    OpenMetrics wants the series of a family together, but a source is
+    evaluated site by site: the runs of values of each site are spilled to
+    a temporary file per family, then every family is read back in turn.
+    Memory holds the value changes of one site over the range, whatever the
+    number of sites or the step; disk holds one line per run of values.
+    """
+    origin = math.ceil(start.timestamp())
+    
+    for evaluate, next_change, per_site in SOURCES:
+        groups = [[site] for site in sites] if per_site else [sites]
+        spills = {}
+        try:
+            for group in groups:
+                starts, series = _collect(evaluate, next_change, group, start, end)
+                _spill(spills, series, starts)
+            
+            for name, spec in METRICS.items():
+                spill = spills.get(name)
+                if spill is None:
+                    continue
+                
+                yield f"# HELP {name} {_escape(spec.documentation)}\n# TYPE {name} gauge\n"
+                spill.seek(0)
+                for line in spill:
+                    prefix, run_start, run_end, value = line.rsplit('\t', 3)
+                    yield from _run_lines(prefix, float(run_start), float(run_end), float(value), origin, step)
+        finally:
+            for spill in spills.values():
+                spill.close()
+    
+    yield "# EOF\n"
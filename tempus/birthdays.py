@@ -1,31 +1,41 @@
 """
 Birthday tracking logic
 """
-import yaml
-import os
+import calendar
+from bisect import bisect_left
 from datetime import datetime, date as dt_date
 from loguru import logger
+import pytz
 from tempus.config import config
+from tempus.schedule import get_schedule
+from tempus.scheduler import next_local_midnight
 from tempus.metrics import (
-    birthday_this_month,
-    birthday_days_until,
-    birthday_today,
-    current_context
+    birthday_upcoming_days,
+    birthdays_today,
+    birthdays_upcoming,
+    Samples,
+    publish,
+    set_context
 )
 
-def load_birthdays():
-    """Load birthdays from YAML file"""
-    try:
-        if not os.path.exists(config.schedule_file):
-            logger.warning(f"Schedule file {config.schedule_file} not found")
-            return []
-            
-        with open(config.schedule_file, 'r') as f:
-            data = yaml.safe_load(f)
-            return data.get('birthdays', [])
-    except Exception as e:
-        logger.error(f"Error loading birthdays: {e}")
-        return []
+# Index of the current schedule birthdays, rebuilt when the schedule changes
+_index = None
+_index_source = None
+
+
+def _leap_day_of_year(month: int, day: int) -> int:
+    """Day of year in a leap year, so that 02-29 has its own slot"""
+    return dt_date(2000, month, day).timetuple().tm_yday
+
+def occurrence_in(year: int, month: int, day: int) -> dt_date:
+    """Date of a yearly event in a year, 02-29 falls on 02-28 in common years"""
+    if month == 2 and day == 29 and not calendar.isleap(year):
+        return dt_date(year, 2, 28)
+    return dt_date(year, month, day)
+
+def load_birthdays() -> tuple:
+    """Birthday entries of the schedule file"""
+    return get_schedule(config.schedule_file).birthdays
 
 def get_days_until_birthday(current_date, birthday_str):
     """
@@ -34,69 +44,129 @@ def get_days_until_birthday(current_date, birthday_str):
     """
     try:
         month, day = map(int, birthday_str.split('-'))
-        
-        # Birthday this year
-        b_date = datetime(current_date.year, month, day)
-        
-        # If already passed this year, look at next year
-        if b_date.date() < current_date.date():
-            b_date = datetime(current_date.year + 1, month, day)
-            
-        return (b_date.date() - current_date.date()).days
+        return days_until_date(current_date.date(), month, day)
     except Exception as e:
         logger.error(f"Error calculating days until birthday {birthday_str}: {e}")
         return 999
 
-def update_birthday_metrics():
-    """Update birthday metrics"""
-    try:
-        birthdays = load_birthdays()
-        now = datetime.now()
-        current_month = now.month
-        
-        this_month_list = []
+def days_until_date(today: dt_date, month: int, day: int) -> int:
+    """Days from today until the next month/day, 0 when it is today"""
+    # Birthday this year
+    b_date = occurrence_in(today.year, month, day)
+    
+    # If already passed this year, look at next year
+    if b_date < today:
+        b_date = occurrence_in(today.year + 1, month, day)
+    
+    return (b_date - today).days
+
+
+class BirthdayIndex:
+    """Yearly events sorted by day of year, for bisect range queries"""
+    
+    def __init__(self, entries):
+        entries = sorted(entries, key=lambda e: (_leap_day_of_year(e.month, e.day), e.name))
+        self.entries = entries
+        self.keys = [_leap_day_of_year(e.month, e.day) for e in entries]
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def upcoming(self, today: dt_date, limit: int = None, within_days: int = None) -> list:
+        """(days until, date, entry) of the next events from today on, in order
         
-        # Clear/Reset existing label-based metrics is tricky with Gauge.
-        # Ideally we'd wish to clear them, but prometheus_client doesn't make it easy
-        # for labels that might have disappeared. 
-        # For now, we update what we find.
+        Stops after `limit` events or past `within_days` days, and covers
+        each entry at most once.
+        """
+        n = len(self.entries)
+        count = n if limit is None else min(limit, n)
+        start = bisect_left(self.keys, _leap_day_of_year(today.month, today.day))
         
-        for b in birthdays:
-            name = b.get('name')
-            b_date_str = b.get('date')
-            
-            if not name or not b_date_str:
-                continue
-                
-            days_until = get_days_until_birthday(now, b_date_str)
-            is_today = (days_until == 0)
+        result = []
+        for i in range(start, start + n):
+            if len(result) >= count:
+                break
             
-            # Check if it's this month
-            b_month = int(b_date_str.split('-')[0])
-            b_day = int(b_date_str.split('-')[1])
+            entry = self.entries[i % n]
+            year = today.year + (1 if i >= n else 0)
+            # A 02-29 slot falls with the 02-28 ones in common years, so
+            # dates never go backwards along the index
+            day = occurrence_in(year, entry.month, entry.day)
             
-            if b_month == current_month:
-                birthday_this_month.labels(name=name, day=b_day).set(1)
-                this_month_list.append({
-                    'name': name,
-                    'day': b_day,
-                    'days_until': days_until,
-                    'is_today': is_today
-                })
-            else:
-                # We could set it to 0 if it was previously set, 
-                # but we don't know the previous labels easily here.
-                pass
-                
-            birthday_days_until.labels(name=name).set(days_until)
-            birthday_today.labels(name=name).set(1 if is_today else 0)
-            
-        # Update context for JSON API
-        current_context['birthdays'] = {
-            'this_month': this_month_list
-        }
-        
-        logger.debug(f"Birthday metrics updated. Found {len(this_month_list)} this month.")
+            days = (day - today).days
+            if within_days is not None and days > within_days:
+                break
+            result.append((days, day, entry))
         
-    except Exception as e:
-        logger.error(f"Error updating birthday metrics: {e}")
+        return result
+    
+    def in_month(self, month: int) -> list:
+        """Entries of a month, in day order"""
+        first = bisect_left(self.keys, _leap_day_of_year(month, 1))
+        last = len(self.keys) if month == 12 else bisect_left(self.keys, _leap_day_of_year(month + 1, 1))
+        return self.entries[first:last]
+
+
+def get_birthday_index(birthdays: tuple) -> BirthdayIndex:
+    """Index of the schedule birthdays, cached until the schedule changes"""
+    global _index, _index_source
+    if _index is None or _index_source is not birthdays:
+        _index = BirthdayIndex(birthdays)
+        _index_source = birthdays
+    return _index
+
+def compute_birthdays(index: BirthdayIndex, today: dt_date) -> dict:
+    """Birthday context of a day: today, the next ones and those of the month"""
+    upcoming = index.upcoming(today, limit=config.birthday_top_k)
+    
+    this_month_list = []
+    for entry in index.in_month(today.month):
+        days_until = days_until_date(today, entry.month, entry.day)
+        this_month_list.append({
+            'name': entry.name,
+            'day': entry.day,
+            'days_until': days_until,
+            'is_today': days_until == 0
+        })
+    
+    return {
+        'today': [item['name'] for item in this_month_list if item['is_today']],
+        'upcoming': [
+            {'name': entry.name, 'date': day.isoformat(), 'days_until': days}
+            for days, day, entry in upcoming
+        ],
+        'this_month': this_month_list
+    }
+
+def birthday_samples(context: dict, upcoming_count: int) -> Samples:
+    """Metric values of a birthday context and the number within the window"""
+    # Bounded series: only the next birthdays are exported
+    samples = Samples()
+    for rank, item in enumerate(context['upcoming'], start=1):
+        samples.set(birthday_upcoming_days, item['days_until'], rank=rank, name=item['name'], date=item['date'])
+    samples.set(birthdays_today, len(context['today']))
+    samples.set(birthdays_upcoming, upcoming_count)
+    return samples
+
+def update_birthday_metrics():
+    """Update birthday metrics"""
+    index = get_birthday_index(load_birthdays())
+    today = datetime.now(pytz.timezone(config.timezone)).date()
+    
+    context = compute_birthdays(index, today)
+    within = index.upcoming(today, within_days=config.birthday_window_days)
+    
+    publish('birthday', birthday_samples(context, len(within)))
+    
+    # Update context for JSON API
+    set_context('birthdays', context)
+    
+    logger.debug(
+        f"Birthday metrics updated. {len(context['today'])} today, {len(within)} within "
+        f"{config.birthday_window_days} days, {len(context['this_month'])} this month."
+    )
+
+
+def next_birthday_change(now: datetime) -> datetime:
+    """Birthday values change at local midnight in the configured timezone"""
+    return next_local_midnight(config.timezone, now)
@@ -1,80 +1,130 @@
 """
 Clock and Daylight Saving Time (DST) metrics
 """
-import pytz
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from loguru import logger
 from tempus.config import config
+from tempus.scheduler import next_midnight
+from tempus.sites import get_sites
+from tempus.tzindex import get_transition_index
 from tempus.metrics import (
     clock_is_summer_time,
     clock_days_until_dst_change,
     clock_dst_change_offset,
-    current_context
+    clock_next_dst_change_timestamp,
+    clock_timezone_is_summer_time,
+    clock_timezone_days_until_dst_change,
+    clock_timezone_dst_change_offset,
+    clock_timezone_next_dst_change_timestamp,
+    set_context,
+    Samples,
+    publish,
+    update_site_context
 )
 
 
-def get_dst_info(tz_name: str) -> tuple:
+def get_dst_info(tz_name: str, now: datetime = None) -> tuple:
     """Get current DST status and next transition info
     
     Returns:
         tuple: (is_summer_time, days_until_change, next_change_date, next_change_offset)
+        next_change_date is the exact instant of the change in the zone,
+        next_change_offset the clock shift in hours (+1 in spring, -1 in autumn)
     """
     try:
-        tz = pytz.timezone(tz_name)
+        index = get_transition_index(tz_name)
     except Exception:
-        tz = pytz.UTC
-        
-    now = datetime.now(tz)
+        index = get_transition_index('UTC')
     
-    # is_dst() returns True if currently in DST for the given timezone
-    is_summer = now.dst() != timedelta(0)
+    now = now or datetime.now(timezone.utc)
+    ts = now.timestamp()
+    local_now = now.astimezone(index.tz)
     
-    # Find next transition by checking day by day
-    current_dst = now.dst()
-    next_change_dt = None
+    is_summer = index.is_dst_at(ts)
     
-    # Check up to 366 days ahead
-    for i in range(1, 367):
-        future_date = tz.normalize(now + timedelta(days=i))
-        if future_date.dst() != current_dst:
-            # Found the day of change
-            next_change_dt = future_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            break
-            
-    # Next offset: 
-    # If summer -> winter: we do -1 (e.g. 3:00 becomes 2:00)
-    # If winter -> summer: we do +1 (e.g. 2:00 becomes 3:00)
-    next_offset = -1 if is_summer else 1
+    transition = index.next_transition(ts)
+    if transition is None:
+        return is_summer, 0, None, 0
     
-    days_until = (next_change_dt - now).days if next_change_dt else 0
+    instant, delta = transition
+    next_change_dt = instant.astimezone(index.tz)
+    next_offset = delta / 3600
+    if next_offset.is_integer():
+        next_offset = int(next_offset)
+    
+    # Calendar days, so the countdown moves at local midnight
+    days_until = (next_change_dt.date() - local_now.date()).days
     
     return is_summer, days_until, next_change_dt, next_offset
 
 
-def update_clock_metrics():
+def compute_clock(tz_name: str, now: datetime = None) -> dict:
+    """Compute the clock and DST context of a timezone at an instant (default now)"""
+    is_summer, days_until, next_date, next_offset = get_dst_info(tz_name, now)
+    
+    status = "Summer Time (+1)" if is_summer else "Winter Time (0)"
+    logger.debug(
+        f"Clock {tz_name}: {status}, "
+        f"next change in {days_until} days ({next_offset:+1}h)"
+    )
+    
+    return {
+        'is_summer_time': is_summer,
+        'days_until_change': days_until,
+        'next_change_date': next_date.strftime('%Y-%m-%d') if next_date else 'Unknown',
+        'next_change_time': next_date.isoformat() if next_date else None,
+        'next_change_timestamp': next_date.timestamp() if next_date else 0,
+        'next_change_offset': next_offset,
+        'timezone': tz_name
+    }
+
+
+def clock_samples(sites: list, results: list, timezones: dict) -> Samples:
+    """Metric values of compute_clock results, per site and per extra timezone"""
+    samples = Samples()
+    for site, clock in zip(sites, results):
+        samples.set(clock_is_summer_time, 1 if clock['is_summer_time'] else 0, site=site.name)
+        samples.set(clock_days_until_dst_change, clock['days_until_change'], site=site.name)
+        samples.set(clock_dst_change_offset, clock['next_change_offset'], site=site.name)
+        samples.set(clock_next_dst_change_timestamp, clock['next_change_timestamp'], site=site.name)
+    
+    for tz_name, clock in timezones.items():
+        samples.set(clock_timezone_is_summer_time, 1 if clock['is_summer_time'] else 0, timezone=tz_name)
+        samples.set(clock_timezone_days_until_dst_change, clock['days_until_change'], timezone=tz_name)
+        samples.set(clock_timezone_dst_change_offset, clock['next_change_offset'], timezone=tz_name)
+        samples.set(clock_timezone_next_dst_change_timestamp, clock['next_change_timestamp'], timezone=tz_name)
+    return samples
+
+
+def update_clock_metrics(sites: list = None):
     """Update clock and DST metrics"""
-    try:
-        is_summer, days_until, next_date, next_offset = get_dst_info(config.timezone)
-        
-        # Update Prometheus metrics
-        clock_is_summer_time.set(1 if is_summer else 0)
-        clock_days_until_dst_change.set(days_until)
-        clock_dst_change_offset.set(next_offset)
-        
-        # Update JSON context
-        current_context['clock'] = {
-            'is_summer_time': is_summer,
-            'days_until_change': days_until,
-            'next_change_date': next_date.strftime('%Y-%m-%d') if next_date else 'Unknown',
-            'next_change_offset': next_offset,
-            'timezone': config.timezone
-        }
-        
-        status = "Summer Time (+1)" if is_summer else "Winter Time (0)"
-        logger.debug(
-            f"Clock metrics updated: {status}, "
-            f"next change in {days_until} days ({next_offset:+1}h)"
-        )
-        
-    except Exception as e:
-        logger.error(f"Error updating clock metrics: {e}")
+    sites = get_sites() if sites is None else sites
+    
+    # Sites sharing a timezone share the same DST information
+    by_zone = {}
+    for tz_name in [site.timezone for site in sites] + list(config.clock_timezones):
+        if tz_name not in by_zone:
+            by_zone[tz_name] = compute_clock(tz_name)
+    results = [by_zone[site.timezone] for site in sites]
+    
+    # Update Prometheus metrics
+    timezones = {tz_name: by_zone[tz_name] for tz_name in config.clock_timezones}
+    publish('clock', clock_samples(sites, results, timezones))
+    
+    # Update JSON context
+    update_site_context('clock', sites, results)
+    set_context('timezones', timezones)
+
+
+def next_clock_change(now: datetime, sites: list = None) -> datetime:
+    """Clock values change at local midnight and at the DST transition instants"""
+    sites = get_sites() if sites is None else sites
+    timezones = {site.timezone for site in sites} | set(config.clock_timezones)
+    candidates = [next_midnight(timezones, now)]
+    
+    for tz_name in timezones:
+        transition = get_transition_index(tz_name).next_transition(now.timestamp())
+        if transition is not None:
+            candidates.append(transition[0])
+    
+    return min(candidates)
@@ -16,10 +16,47 @@ class Config:
     longitude: float = float(os.getenv("LONGITUDE", "-0.4458"))
     timezone: str = os.getenv("TIMEZONE", "Europe/Paris")
     port: int = int(os.getenv("PORT", "8000"))
-    api_port: int = int(os.getenv("API_PORT", "8001"))
+    http_backlog: int = int(os.getenv("HTTP_BACKLOG", "1024"))
+    http_keepalive_timeout: float = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "75"))
+    http_workers: int = int(os.getenv("HTTP_WORKERS", "1"))  # > 1 = processes sharing the port
+    metrics_runtime: bool = os.getenv("METRICS_RUNTIME", "true").lower() in ("1", "true", "yes")  # process_* and python_* series
     country_code: str = os.getenv("COUNTRY_CODE", "FR")
+    subdivision: str = os.getenv("SUBDIVISION", "") or None
+    weekmask: str = os.getenv("WEEKMASK", "1111100")  # Monday to Sunday, 1 = working day
     hemisphere: str = os.getenv("HEMISPHERE", "north").lower()  # 'north' or 'south'
     schedule_file: str = os.getenv("SCHEDULE_FILE", "schedule.yaml")
+    schedule_check_interval: float = float(os.getenv("SCHEDULE_CHECK_INTERVAL", "10"))
+    birthday_top_k: int = int(os.getenv("BIRTHDAY_TOP_K", "10"))
+    birthday_window_days: int = int(os.getenv("BIRTHDAY_WINDOW_DAYS", "30"))
+    site: str = os.getenv("SITE", "default")
+    sites_file: str = os.getenv("SITES_FILE", "")
+    site_workers: int = int(os.getenv("SITE_WORKERS", "0"))  # 0 = one per CPU
+    site_shard_threshold: int = int(os.getenv("SITE_SHARD_THRESHOLD", "256"))
+    update_workers: int = int(os.getenv("UPDATE_WORKERS", "4"))
+    update_timeout: float = float(os.getenv("UPDATE_TIMEOUT", "60"))
+    holiday_years_before: int = int(os.getenv("HOLIDAY_YEARS_BEFORE", "1"))
+    holiday_years_after: int = int(os.getenv("HOLIDAY_YEARS_AFTER", "2"))
+    holiday_cache_size: int = int(os.getenv("HOLIDAY_CACHE_SIZE", "64"))
+    context_cache_size: int = int(os.getenv("CONTEXT_CACHE_SIZE", "4096"))
+    context_max_days: int = int(os.getenv("CONTEXT_MAX_DAYS", "3660"))  # /context dates around today
+    context_range_max_days: int = int(os.getenv("CONTEXT_RANGE_MAX_DAYS", "3660"))
+    workdays_max_days: int = int(os.getenv("WORKDAYS_MAX_DAYS", "3660"))  # /workdays dates around today
+    cache_dir: str = os.getenv("CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "tempus"))
+    snapshot_max_age: float = float(os.getenv("SNAPSHOT_MAX_AGE", "86400"))  # 0 = not persisted
+    push_url: str = os.getenv("PUSH_URL", "")  # remote-write or Pushgateway URL, empty = pull only
+    push_format: str = os.getenv("PUSH_FORMAT", "remote_write")  # 'remote_write' or 'pushgateway'
+    push_interval: float = float(os.getenv("PUSH_INTERVAL", "60"))  # remote write full resend, 0 = changes only
+    push_job: str = os.getenv("PUSH_JOB", "tempus")
+    push_instance: str = os.getenv("PUSH_INSTANCE", "") or None  # default hostname
+    push_batch_size: int = int(os.getenv("PUSH_BATCH_SIZE", "2000"))  # series per remote-write request
+    push_queue_size: int = int(os.getenv("PUSH_QUEUE_SIZE", "100"))  # requests waiting for a retry
+    push_timeout: float = float(os.getenv("PUSH_TIMEOUT", "10"))
+    stream_queue_size: int = int(os.getenv("STREAM_QUEUE_SIZE", "16"))  # messages per stream client before a resync
+    stream_keepalive: float = float(os.getenv("STREAM_KEEPALIVE", "30"))
+    stream_max_clients: int = int(os.getenv("STREAM_MAX_CLIENTS", "10000"))
+    clock_timezones: tuple = tuple(
+        tz.strip() for tz in os.getenv("CLOCK_TIMEZONES", "").split(",") if tz.strip()
+    )
 
 
 config = Config()
\ No newline at end of file
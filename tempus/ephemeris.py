@@ -0,0 +1,220 @@
+"""
+Vectorized solar ephemeris
+
+Computes dawn, sunrise, noon, sunset and dusk for a whole local calendar
+year in a single NumPy pass (NOAA equations, the same ones astral uses) and
+keeps them in a compact table indexed by day of year.
+"""
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+import numpy as np
+import pytz
+from tempus.tzindex import get_transition_index
+
+EVENTS = ('dawn', 'sunrise', 'noon', 'sunset', 'dusk')
+
+# Using 32 arc minutes as sun's apparent diameter
+SUN_APPARENT_RADIUS = 32.0 / (60.0 * 2.0)
+CIVIL_DEPRESSION = 6.0
+
+# Julian day of 0001-01-01 00:00 UTC minus one (date.toordinal() starts at 1)
+_JD_ORDINAL_OFFSET = 1721424.5
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_TABLE_CACHE_SIZE = 4096
+
+
+def delta_t(year: np.ndarray) -> np.ndarray:
+    """TT - UT in seconds (Espenak & Meeus polynomial expressions, 1900-2150)"""
+    y = np.asarray(year, dtype=np.float64)
+    u = (y - 1820) / 100
+    t1, t2, t3, t4, t5 = y - 1900, y - 1920, y - 1950, y - 1975, y - 2000
+    
+    return np.select(
+        [y < 1920, y < 1941, y < 1961, y < 1986, y < 2005, y < 2050, y < 2150],
+        [
+            -2.79 + 1.494119 * t1 - 0.0598939 * t1 ** 2 + 0.0061966 * t1 ** 3 - 0.000197 * t1 ** 4,
+            21.20 + 0.84493 * t2 - 0.076100 * t2 ** 2 + 0.0020936 * t2 ** 3,
+            29.07 + 0.407 * t3 - t3 ** 2 / 233 + t3 ** 3 / 2547,
+            45.45 + 1.067 * t4 - t4 ** 2 / 260 - t4 ** 3 / 718,
+            63.86 + 0.3345 * t5 - 0.060374 * t5 ** 2 + 0.0017275 * t5 ** 3
+            + 0.000651814 * t5 ** 4 + 0.00002373599 * t5 ** 5,
+            62.92 + 0.32217 * t5 + 0.005589 * t5 ** 2,
+            -20 + 32 * u ** 2 - 0.5628 * (2150 - y),
+        ],
+        # Long-term parabola past 2150
+        default=-20 + 32 * u ** 2
+    )
+
+
+def _refraction_at_zenith(zenith: float) -> float:
+    """Degrees of atmospheric refraction for the sun at the given zenith"""
+    elevation = 90 - zenith
+    if elevation >= 85.0:
+        return 0.0
+
+    te = np.tan(np.radians(elevation))
+    if elevation > 5.0:
+        correction = 58.1 / te - 0.07 / te ** 3 + 0.000086 / te ** 5
+    elif elevation > -0.575:
+        correction = 1735.0 + elevation * (
+            -518.2 + elevation * (103.4 + elevation * (-12.79 + elevation * 0.711))
+        )
+    else:
+        correction = -20.774 / te
+
+    return float(correction) / 3600.0
+
+
+def _solar_position(jc: np.ndarray) -> tuple:
+    """Return (declination in radians, equation of time in minutes)"""
+    l0 = np.radians((280.46646 + jc * (36000.76983 + 0.0003032 * jc)) % 360.0)
+    m = np.radians(357.52911 + jc * (35999.05029 - 0.0001537 * jc))
+    e = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+
+    c = (
+        np.sin(m) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+        + np.sin(2 * m) * (0.019993 - 0.000101 * jc)
+        + np.sin(3 * m) * 0.000289
+    )
+    omega = np.radians(125.04 - 1934.136 * jc)
+    apparent_long = np.radians(np.degrees(l0) + c - 0.00569 - 0.00478 * np.sin(omega))
+
+    seconds = 21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))
+    obliquity = np.radians(23.0 + (26.0 + seconds / 60.0) / 60.0 + 0.00256 * np.cos(omega))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(apparent_long))
+
+    y = np.tan(obliquity / 2.0) ** 2
+    eq_time = np.degrees(
+        y * np.sin(2 * l0)
+        - 2.0 * e * np.sin(m)
+        + 4.0 * e * y * np.sin(m) * np.cos(2 * l0)
+        - 0.5 * y * y * np.sin(4 * l0)
+        - 1.25 * e * e * np.sin(2 * m)
+    ) * 4.0
+
+    return declination, eq_time
+
+
+def _transit_minutes(jd: np.ndarray, latitude: float, longitude: float,
+                     zenith: float, rising: bool) -> np.ndarray:
+    """Minutes after UTC midnight at which the sun crosses `zenith`
+
+    NaN where the sun never reaches that zenith on the day.
+    """
+    latitude = np.radians(min(89.8, max(-89.8, latitude)))
+    cos_zenith = np.cos(np.radians(zenith + _refraction_at_zenith(zenith)))
+    adjustment = 0.0
+
+    for _ in range(2):
+        jc = (jd + adjustment - 2451545.0) / 36525.0
+        declination, eq_time = _solar_position(jc)
+
+        with np.errstate(invalid='ignore'):
+            hour_angle = np.degrees(np.arccos(
+                (cos_zenith - np.sin(latitude) * np.sin(declination))
+                / (np.cos(latitude) * np.cos(declination))
+            ))
+        if not rising:
+            hour_angle = -hour_angle
+
+        offset = (-longitude - hour_angle) * 4.0 - eq_time
+        offset = np.where(offset < -720.0, offset + 1440.0, offset)
+        time_utc = 720.0 + offset
+        adjustment = time_utc / 1440.0
+
+    return time_utc
+
+
+class SolarTable:
+    """Sun events of one location for one local calendar year
+
+    `events` has one row per day of year and one column per entry of
+    EVENTS, holding float32 seconds after UTC midnight of that date
+    (NaN when the event does not happen on that day).
+    """
+
+    def __init__(self, latitude: float, longitude: float, timezone: str, year: int):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.timezone = timezone
+        self.year = year
+        self.tz = pytz.timezone(timezone)
+        self.transitions = get_transition_index(timezone)
+        self.first_ordinal = date(year, 1, 1).toordinal()
+        days = date(year + 1, 1, 1).toordinal() - self.first_ordinal
+
+        # One extra UTC day on each side: a local day may need the transit
+        # computed for the neighbouring UTC date
+        ordinals = np.arange(self.first_ordinal - 1, self.first_ordinal + days + 1)
+        jd = ordinals + _JD_ORDINAL_OFFSET
+        day_starts = (ordinals - _EPOCH_ORDINAL) * 86400.0
+
+        self.events = np.full((days, len(EVENTS)), np.nan, dtype=np.float32)
+
+        transits = {
+            'dawn': (90.0 + CIVIL_DEPRESSION, True),
+            'sunrise': (90.0 + SUN_APPARENT_RADIUS, True),
+            'sunset': (90.0 + SUN_APPARENT_RADIUS, False),
+            'dusk': (90.0 + CIVIL_DEPRESSION, False),
+        }
+        for name, (zenith, rising) in transits.items():
+            instants = day_starts + _transit_minutes(jd, latitude, longitude, zenith, rising) * 60.0
+            self.events[:, EVENTS.index(name)] = self._match_local_days(instants, ordinals)
+
+        # Solar noon is taken on the UTC date matching the local date
+        _, eq_time = _solar_position((jd[1:-1] - 2451545.0) / 36525.0)
+        noon = np.floor((720.0 - 4.0 * longitude - eq_time) * 60.0)
+        self.events[:, EVENTS.index('noon')] = noon
+
+    def _match_local_days(self, instants: np.ndarray, ordinals: np.ndarray) -> np.ndarray:
+        """Pick, for every local day of the year, the transit falling on that day"""
+        local_ordinals = np.floor(
+            (instants + self.transitions.offsets_at(instants)) / 86400.0
+        ) + _EPOCH_ORDINAL
+        target = ordinals[1:-1]
+
+        same, before, after = instants[1:-1], instants[:-2], instants[2:]
+        same_day = local_ordinals[1:-1]
+        # Transit of the same UTC date landed on the previous local day: use
+        # the next UTC date, and the other way round
+        chosen = np.where(
+            same_day < target, after, np.where(same_day > target, before, same)
+        )
+        chosen_day = np.where(
+            same_day < target, local_ordinals[2:],
+            np.where(same_day > target, local_ordinals[:-2], same_day)
+        )
+        chosen = np.where(chosen_day == target, chosen, np.nan)
+        return chosen - (target - _EPOCH_ORDINAL) * 86400.0
+
+    def covers(self, day: date) -> bool:
+        return 0 <= day.toordinal() - self.first_ordinal < len(self.events)
+
+    def instants(self, day: date) -> np.ndarray:
+        """Epoch seconds of every event on `day` (NaN when it does not occur)"""
+        index = day.toordinal() - self.first_ordinal
+        if not 0 <= index < len(self.events):
+            raise ValueError(f"{day} is outside of the {self.year} solar table")
+        return self.events[index].astype(np.float64) + (day.toordinal() - _EPOCH_ORDINAL) * 86400.0
+
+    def lookup(self, day: date) -> dict:
+        """Return the sun events of `day` as local aware datetimes (or None)"""
+        result = {}
+        for name, ts in zip(EVENTS, self.instants(day)):
+            if np.isnan(ts):
+                result[name] = None
+            else:
+                utc = datetime(1970, 1, 1, tzinfo=dt_timezone.utc) + timedelta(seconds=float(ts))
+                result[name] = utc.astimezone(self.tz)
+        return result
+
+
+@lru_cache(maxsize=_TABLE_CACHE_SIZE)
+def solar_table(latitude: float, longitude: float, timezone: str, year: int) -> SolarTable:
+    """Return the (lazily built, cached) solar table for a location and year"""
+    return SolarTable(latitude, longitude, timezone, year)
+
+
+def sun_times(latitude: float, longitude: float, timezone: str, day: date) -> dict:
+    """Sun events for a local date, as a dict keyed like astral.sun.sun()"""
+    return solar_table(latitude, longitude, timezone, day.year).lookup(day)
@@ -0,0 +1,78 @@
+"""
+Context of any date
+
+Every section of the context is computed by a pure function of a site and
+an instant, so another day is described exactly like today. Results are
+memoized per site, date and schedule file version.
+"""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+import pytz
+from loguru import logger
+from tempus.config import config
+from tempus.birthdays import compute_birthdays, get_birthday_index
+from tempus.clock import compute_clock
+from tempus.holidays import compute_calendar
+from tempus.moon import compute_moon
+from tempus.schedule import get_schedule
+from tempus.seasons import compute_season
+from tempus.sites import Site
+from tempus.sun import compute_sun
+from tempus.trash import compute_trash
+
+# Keys of a dated context
+SECTIONS = (
+    'date', 'site', 'timestamp', 'sun', 'season', 'calendar',
+    'trash', 'moon', 'birthdays', 'clock', 'timezones'
+)
+
+
+def _section(name: str, func, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        logger.error(f"Error computing {name} context: {e}")
+        return None
+
+
+def context_at(site: Site, day: date) -> dict:
+    """Context of a site on a day, as seen at local noon"""
+    tz = pytz.timezone(site.timezone)
+    # Noon exists every day, DST transitions happen at night
+    now = tz.localize(datetime.combine(day, time(12)))
+    schedule = get_schedule(config.schedule_file)
+    sun = _section('sun', compute_sun, site, now)
+    
+    return {
+        'date': day.isoformat(),
+        'site': site.name,
+        'timestamp': now.isoformat(),
+        'sun': sun and sun['context'],
+        'season': _section('season', compute_season, site, now),
+        'calendar': _section('calendar', compute_calendar, site, now),
+        'trash': _section('trash', compute_trash, schedule.trash, day),
+        'moon': _section('moon', compute_moon, now, site.timezone),
+        'birthdays': _section('birthdays', compute_birthdays, get_birthday_index(schedule.birthdays), day),
+        'clock': _section('clock', compute_clock, site.timezone, now),
+        'timezones': {
+            tz_name: _section('clock', compute_clock, tz_name, now) for tz_name in config.clock_timezones
+        }
+    }
+
+
+@lru_cache(maxsize=config.context_cache_size)
+def _memoized_context(site: Site, day: date, schedule_signature: tuple) -> dict:
+    return context_at(site, day)
+
+
+def get_context(site: Site, day: date) -> dict:
+    """Memoized context of a site on a day, shared: do not modify"""
+    return _memoized_context(site, day, get_schedule(config.schedule_file).signature)
+
+
+def iter_context(site: Site, start: date, end: date):
+    """Context of every day in [start, end)"""
+    day = start
+    while day < end:
+        yield get_context(site, day)
+        day += timedelta(days=1)
@@ -1,57 +1,253 @@
 """
 Holiday and calendar metrics
 """
-from datetime import datetime
-import holidays
+import json
+import os
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from importlib.metadata import version
+import numpy as np
 from loguru import logger
+import pytz
 from tempus.config import config
+from tempus.scheduler import next_midnight
+from tempus.sites import Site, get_sites, map_sites
 from tempus.metrics import (
     is_public_holiday,
     is_weekend,
     is_working_day,
-    current_context
+    days_until_next_holiday,
+    next_holiday_info,
+    working_days_until_next_holiday,
+    working_days_left_in_month,
+    Samples,
+    publish,
+    update_site_context
 )
 
+# Bump when the on-disk index layout changes
+INDEX_FORMAT_VERSION = 1
 
-def update_holiday_metrics():
-    """Update holiday and calendar metrics"""
-    try:
-        now = datetime.now()
-        
-        # Get holidays for the country
-        country_holidays = holidays.country_holidays(
-            config.country_code,
-            years=now.year
+
+class HolidayIndex:
+    """Sorted holiday dates of a country (and subdivision) over a range of years"""
+    
+    def __init__(self, country_code: str, subdivision: str, first_year: int,
+                 last_year: int, dates: list, names: list):
+        self.country_code = country_code
+        self.subdivision = subdivision
+        self.first_year = first_year
+        self.last_year = last_year
+        self.dates = dates
+        self.names = names
+        # numpy form for business day arithmetic
+        self.days = np.array(dates, dtype='datetime64[D]')
+        self._calendars = {}
+    
+    @classmethod
+    def build(cls, country_code: str, subdivision: str, first_year: int, last_year: int):
+        """Build the index from the holidays package"""
+        # Imported on first use, persisted indexes do not need it
+        import holidays
+        calendar = holidays.country_holidays(
+            country_code,
+            subdiv=subdivision,
+            years=range(first_year, last_year + 1)
         )
-        
-        # Check if today is a holiday
-        is_holiday = now.date() in country_holidays
-        holiday_name = country_holidays.get(now.date(), None)
-        
-        # Check if weekend
-        is_wknd = now.weekday() >= 5
-        
-        # Check if working day (not weekend and not holiday)
-        is_work = not is_wknd and not is_holiday
-        
-        # Update metrics
-        is_public_holiday.set(1 if is_holiday else 0)
-        is_weekend.set(1 if is_wknd else 0)
-        is_working_day.set(1 if is_work else 0)
-        
-        # Update context for JSON API
-        current_context['calendar'] = {
-            'is_weekend': is_wknd,
-            'is_holiday': is_holiday,
-            'holiday_name': holiday_name,
-            'is_working_day': is_work,
-            'day_of_week': now.strftime('%A')
+        entries = sorted(calendar.items())
+        return cls(
+            country_code, subdivision, first_year, last_year,
+            [day for day, _ in entries], [name for _, name in entries]
+        )
+    
+    def covers(self, day: date) -> bool:
+        return self.first_year <= day.year <= self.last_year
+    
+    def get(self, day: date):
+        """Return the holiday name of day, or None"""
+        i = bisect_left(self.dates, day)
+        if i < len(self.dates) and self.dates[i] == day:
+            return self.names[i]
+        return None
+    
+    def next_holiday(self, day: date, include_today: bool = False):
+        """Return (date, name) of the first holiday after day, or None"""
+        i = bisect_left(self.dates, day if include_today else day + timedelta(days=1))
+        if i < len(self.dates):
+            return self.dates[i], self.names[i]
+        return None
+    
+    def busdaycalendar(self, weekmask: str = None) -> np.busdaycalendar:
+        """numpy business day calendar of this index for a weekmask"""
+        weekmask = weekmask or config.weekmask
+        calendar = self._calendars.get(weekmask)
+        if calendar is None:
+            calendar = np.busdaycalendar(weekmask=weekmask, holidays=self.days)
+            self._calendars[weekmask] = calendar
+        return calendar
+    
+    def working_days_until(self, start: date, end: date, weekmask: str = None) -> int:
+        """Count working days (weekmask days that are not holidays) in [start, end)"""
+        return int(np.busday_count(start, end, busdaycal=self.busdaycalendar(weekmask)))
+    
+    def to_dict(self) -> dict:
+        return {
+            'format': INDEX_FORMAT_VERSION,
+            'holidays_version': holidays_version(),
+            'country_code': self.country_code,
+            'subdivision': self.subdivision,
+            'first_year': self.first_year,
+            'last_year': self.last_year,
+            'dates': [day.isoformat() for day in self.dates],
+            'names': self.names
         }
-        
-        logger.debug(
-            f"Calendar metrics updated: holiday={is_holiday}, "
-            f"weekend={is_wknd}, working={is_work}"
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            data['country_code'], data['subdivision'], data['first_year'], data['last_year'],
+            [date.fromisoformat(day) for day in data['dates']], data['names']
         )
+
+
+@lru_cache(maxsize=None)
+def holidays_version() -> str:
+    """Version of the holidays package, without importing it"""
+    return version('holidays')
+
+
+def _index_path(country_code: str, subdivision: str, first_year: int, last_year: int) -> str:
+    key = country_code if not subdivision else f"{country_code}-{subdivision}"
+    return os.path.join(config.cache_dir, 'holidays', f"{key}-{first_year}-{last_year}.json")
+
+
+def _read_index(path: str):
+    """Load a persisted index, None when missing or stale"""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable holiday index {path}: {e}")
+        return None
+    
+    if data.get('format') != INDEX_FORMAT_VERSION or data.get('holidays_version') != holidays_version():
+        return None
+    return HolidayIndex.from_dict(data)
+
+
+def _write_index(path: str, index: HolidayIndex):
+    """Persist an index atomically, failures only cost a rebuild on restart"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index.to_dict(), f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Unable to persist holiday index {path}: {e}")
+
+
+@lru_cache(maxsize=config.holiday_cache_size)
+def load_holiday_index(country_code: str, subdivision: str, first_year: int, last_year: int) -> HolidayIndex:
+    """Return the holiday index for a range of years, from disk when possible"""
+    path = _index_path(country_code, subdivision, first_year, last_year)
+    index = _read_index(path)
+    if index is None:
+        index = HolidayIndex.build(country_code, subdivision, first_year, last_year)
+        _write_index(path, index)
+        logger.debug(f"Built holiday index {country_code}/{subdivision} {first_year}-{last_year}")
+    return index
+
+
+def get_holiday_index(country_code: str, subdivision: str, year: int) -> HolidayIndex:
+    """Holiday index around year, shared by every site of that country"""
+    return load_holiday_index(
+        country_code,
+        subdivision,
+        year - config.holiday_years_before,
+        year + max(1, config.holiday_years_after)
+    )
+
+
+def compute_calendar(site: Site, now: datetime = None) -> dict:
+    """Compute the calendar context of a site at an instant (default now)"""
+    tz = pytz.timezone(site.timezone)
+    now = datetime.now(tz) if now is None else now.astimezone(tz)
+    today = now.date()
+    
+    index = get_holiday_index(site.country_code, site.subdivision, today.year)
+    
+    # Check if today is a holiday
+    holiday_name = index.get(today)
+    is_holiday = holiday_name is not None
+    
+    # Check if weekend
+    is_wknd = config.weekmask[now.weekday()] == '0'
+    
+    # Check if working day (not weekend and not holiday)
+    is_work = not is_wknd and not is_holiday
+    
+    next_holiday = index.next_holiday(today)
+    month_end = (today.replace(day=28) + timedelta(days=4)).replace(day=1)
+    
+    logger.debug(
+        f"Calendar [{site.name}]: holiday={is_holiday}, "
+        f"weekend={is_wknd}, working={is_work}"
+    )
+    
+    return {
+        'is_weekend': is_wknd,
+        'is_holiday': is_holiday,
+        'holiday_name': holiday_name,
+        'is_working_day': is_work,
+        'day_of_week': now.strftime('%A'),
+        'next_holiday': {
+            'date': next_holiday[0].isoformat(),
+            'name': next_holiday[1],
+            'days_until': (next_holiday[0] - today).days,
+            'working_days_until': index.working_days_until(today, next_holiday[0])
+        } if next_holiday else None,
+        'working_days_left_in_month': index.working_days_until(today, month_end)
+    }
+
+
+def calendar_samples(sites: list, results: list) -> Samples:
+    """Metric values of compute_calendar results"""
+    samples = Samples()
+    for site, calendar in zip(sites, results):
+        if calendar is None:
+            continue
+        samples.set(is_public_holiday, 1 if calendar['is_holiday'] else 0, site=site.name)
+        samples.set(is_weekend, 1 if calendar['is_weekend'] else 0, site=site.name)
+        samples.set(is_working_day, 1 if calendar['is_working_day'] else 0, site=site.name)
+        samples.set(working_days_left_in_month, calendar['working_days_left_in_month'], site=site.name)
         
-    except Exception as e:
-        logger.error(f"Error updating holiday metrics: {e}")
\ No newline at end of file
+        next_holiday = calendar['next_holiday']
+        if next_holiday:
+            samples.set(days_until_next_holiday, next_holiday['days_until'], site=site.name)
+            samples.set(working_days_until_next_holiday, next_holiday['working_days_until'], site=site.name)
+            samples.set(
+                next_holiday_info, 1,
+                site=site.name, name=next_holiday['name'], date=next_holiday['date']
+            )
+    return samples
+
+
+def update_holiday_metrics(sites: list = None):
+    """Update holiday and calendar metrics"""
+    sites = get_sites() if sites is None else sites
+    results = map_sites(compute_calendar, sites)
+    
+    publish('holiday', calendar_samples(sites, results))
+    
+    # Update context for JSON API
+    update_site_context('calendar', sites, results)
+
+
+def next_holiday_change(now: datetime, sites: list = None) -> datetime:
+    """Calendar values change at the next local midnight of any site"""
+    sites = get_sites() if sites is None else sites
+    return next_midnight([site.timezone for site in sites], now)
@@ -1,46 +1,450 @@
 """
 Prometheus metrics definitions
+
+Updaters do not write to shared gauges: each run collects its values in a
+Samples object and publishes it as its section of an immutable Snapshot.
+A single collector renders the current snapshot, so scrapes always see a
+consistent state and series that are no longer produced disappear.
+
+The exposition body only changes with the snapshot: it is rendered once per
+snapshot version, kept as plain and gzip bytes, and served with an ETag.
+The exporter's own stats change on every updater run and are left out of
+that ETag.
+Process, platform and GC series live in RUNTIME_REGISTRY instead, rendered
+for every scrape and added to the cached body.
 """
-from prometheus_client import Gauge, start_http_server as prom_start_http
+import hashlib
+import os
+import threading
+import time
+import zlib
+from bisect import bisect_left
+from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import chain
+from types import MappingProxyType
+from prometheus_client import (
+    GC_COLLECTOR, PLATFORM_COLLECTOR, PROCESS_COLLECTOR, REGISTRY,
+    CONTENT_TYPE_PLAIN_0_0_4, CollectorRegistry, generate_latest
+)
+from prometheus_client.exposition import choose_encoder
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+from prometheus_client.utils import floatToGoString
+from prometheus_client.openmetrics import exposition as openmetrics
+
+
+@dataclass(frozen=True)
+class MetricSpec:
+    """Name, help text, label names and type of an exported metric"""
+    
+    name: str
+    documentation: str
+    labelnames: tuple = ()
+    type: str = 'gauge'  # 'gauge', 'counter' or 'histogram'
+    buckets: tuple = ()  # histogram upper bounds, +Inf excluded
+
+
+# Every exported metric, in exposition order
+METRICS = {}
+
+
+def gauge(name: str, documentation: str, labelnames=()) -> MetricSpec:
+    """Declare an exported gauge"""
+    spec = MetricSpec(name, documentation, tuple(labelnames))
+    METRICS[name] = spec
+    return spec
+
+
+def counter(name: str, documentation: str, labelnames=()) -> MetricSpec:
+    """Declare an exported counter, name ending with _total"""
+    spec = MetricSpec(name, documentation, tuple(labelnames), 'counter')
+    METRICS[name] = spec
+    return spec
+
+
+def histogram(name: str, documentation: str, labelnames=(), buckets=()) -> MetricSpec:
+    """Declare an exported histogram, its values are HistogramData.value()"""
+    spec = MetricSpec(name, documentation, tuple(labelnames), 'histogram', tuple(buckets))
+    METRICS[name] = spec
+    return spec
+
 
 # Solar metrics
-sun_sunrise_minutes = Gauge('sun_sunrise_minutes', 'Minutes since midnight for sunrise')
-sun_sunset_minutes = Gauge('sun_sunset_minutes', 'Minutes since midnight for sunset')
-sun_day_length_minutes = Gauge('sun_day_length_minutes', 'Total daylight in minutes')
-sun_day_gain_minutes = Gauge('sun_day_gain_minutes', 'Daily change in daylight')
-sun_is_growing_day = Gauge('sun_is_growing_day', 'Whether days are getting longer')
+sun_sunrise_minutes = gauge('sun_sunrise_minutes', 'Minutes since midnight for sunrise', ['site'])
+sun_sunset_minutes = gauge('sun_sunset_minutes', 'Minutes since midnight for sunset', ['site'])
+sun_day_length_minutes = gauge('sun_day_length_minutes', 'Total daylight in minutes', ['site'])
+sun_day_gain_minutes = gauge('sun_day_gain_minutes', 'Daily change in daylight', ['site'])
+sun_is_growing_day = gauge('sun_is_growing_day', 'Whether days are getting longer', ['site'])
+sun_is_up = gauge('sun_is_up', 'Whether the sun is currently above the horizon', ['site'])
 
 # Seasonal metrics
-season_id = Gauge('season_id', 'Current season indicator', ['season'])
-season_progress_percent = Gauge('season_progress_percent', 'Progress through season')
-days_until_spring = Gauge('days_until_spring', 'Days until spring')
-days_until_summer = Gauge('days_until_summer', 'Days until summer')
-days_until_fall = Gauge('days_until_fall', 'Days until fall')
-days_until_winter = Gauge('days_until_winter', 'Days until winter')
+season_id = gauge('season_id', 'Current season indicator', ['site', 'season'])
+season_progress_percent = gauge('season_progress_percent', 'Progress through season', ['site'])
+days_until_spring = gauge('days_until_spring', 'Days until spring', ['site'])
+days_until_summer = gauge('days_until_summer', 'Days until summer', ['site'])
+days_until_fall = gauge('days_until_fall', 'Days until fall', ['site'])
+days_until_winter = gauge('days_until_winter', 'Days until winter', ['site'])
 
 # Calendar metrics
-is_public_holiday = Gauge('is_public_holiday', 'Is public holiday')
-is_weekend = Gauge('is_weekend', 'Is weekend')
-is_working_day = Gauge('is_working_day', 'Is working day')
+is_public_holiday = gauge('is_public_holiday', 'Is public holiday', ['site'])
+is_weekend = gauge('is_weekend', 'Is weekend', ['site'])
+is_working_day = gauge('is_working_day', 'Is working day', ['site'])
+days_until_next_holiday = gauge('days_until_next_holiday', 'Days until next public holiday', ['site'])
+next_holiday_info = gauge('next_holiday_info', 'Next public holiday', ['site', 'name', 'date'])
+working_days_until_next_holiday = gauge('working_days_until_next_holiday', 'Working days until next public holiday', ['site'])
+working_days_left_in_month = gauge('working_days_left_in_month', 'Working days left in the month, today included', ['site'])
 
 # Trash metrics
-trash_collection_today = Gauge('trash_collection_today', 'Trash today', ['type'])
-trash_next_days = Gauge('trash_next_days', 'Days until next', ['type'])
+trash_collection_today = gauge('trash_collection_today', 'Trash today', ['type'])
+trash_next_days = gauge('trash_next_days', 'Days until next', ['type'])
 
 # Moon metrics
-moon_phase_day = Gauge('moon_phase_day', 'Current moon phase day (0-27)')
-moon_phase_info = Gauge('moon_phase_info', 'Current moon phase description', ['phase'])
+moon_phase_day = gauge('moon_phase_day', 'Current moon phase day (0-27)', ['site'])
+moon_phase_info = gauge('moon_phase_info', 'Current moon phase description', ['site', 'phase'])
+moon_illumination_fraction = gauge('moon_illumination_fraction', 'Illuminated fraction of the moon disk (0-1)', ['site'])
+days_until_full_moon = gauge('days_until_full_moon', 'Days until next full moon', ['site'])
+days_until_new_moon = gauge('days_until_new_moon', 'Days until next new moon', ['site'])
 
 # Clock metrics
-clock_is_summer_time = Gauge('clock_is_summer_time', 'Is currently in summer time (DST)')
-clock_days_until_dst_change = Gauge('clock_days_until_dst_change', 'Days until next time change')
-clock_dst_change_offset = Gauge('clock_dst_change_offset', 'Next time change offset (+1 or -1)')
+clock_is_summer_time = gauge('clock_is_summer_time', 'Is currently in summer time (DST)', ['site'])
+clock_days_until_dst_change = gauge('clock_days_until_dst_change', 'Days until next time change', ['site'])
+clock_dst_change_offset = gauge('clock_dst_change_offset', 'Next time change offset (+1 or -1)', ['site'])
+clock_next_dst_change_timestamp = gauge('clock_next_dst_change_timestamp_seconds', 'Exact UTC instant of the next time change', ['site'])
+
+# Clock metrics for the extra timezones of CLOCK_TIMEZONES
+clock_timezone_is_summer_time = gauge('clock_timezone_is_summer_time', 'Is currently in summer time (DST)', ['timezone'])
+clock_timezone_days_until_dst_change = gauge('clock_timezone_days_until_dst_change', 'Days until next time change', ['timezone'])
+clock_timezone_dst_change_offset = gauge('clock_timezone_dst_change_offset', 'Next time change offset (+1 or -1)', ['timezone'])
+clock_timezone_next_dst_change_timestamp = gauge('clock_timezone_next_dst_change_timestamp_seconds', 'Exact UTC instant of the next time change', ['timezone'])
 
 # Birthday metrics
-birthday_this_month = Gauge('birthday_this_month', 'Birthday this month', ['name', 'day'])
-birthday_days_until = Gauge('birthday_days_until', 'Days until birthday', ['name'])
-birthday_today = Gauge('birthday_today', 'Is birthday today', ['name'])
+birthday_upcoming_days = gauge('birthday_upcoming_days', 'Days until each of the next birthdays', ['rank', 'name', 'date'])
+birthdays_today = gauge('birthdays_today', 'Number of birthdays today')
+birthdays_upcoming = gauge('birthdays_upcoming', 'Number of birthdays within the configured window')
+
+# Self-instrumentation metrics
+tempus_update_duration_seconds = histogram(
+    'tempus_update_duration_seconds', 'Duration of updater runs', ['updater'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+tempus_update_errors_total = counter('tempus_update_errors_total', 'Updater runs that raised an error', ['updater'])
+tempus_update_timeouts_total = counter('tempus_update_timeouts_total', 'Updater runs still running after UPDATE_TIMEOUT', ['updater'])
+tempus_update_last_success_timestamp = gauge(
+    'tempus_update_last_success_timestamp_seconds', 'End of the last successful run of an updater', ['updater']
+)
+tempus_render_duration_seconds = histogram(
+    'tempus_render_duration_seconds', 'Duration of /metrics renderings, once per change of values', ['format'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+)
+tempus_resident_memory_bytes = gauge('tempus_resident_memory_bytes', 'Resident memory of the process after the last update')
+
+# Published after every updater run, in their own section: durations and
+# timestamps change every time, they are left out of the /metrics ETag
+STATS_SECTION = 'tempus'
+STATS_METRICS = frozenset(name for name in METRICS if name.startswith('tempus_'))
+
+
+class HistogramData:
+    """Observations of one histogram series"""
+    
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+    
+    def value(self) -> tuple:
+        """((upper bound, cumulative count), ...) with +Inf last, and the sum"""
+        total = 0
+        buckets = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            buckets.append((floatToGoString(bound), total))
+        return tuple(buckets), self.sum
+
+
+def resident_memory() -> int:
+    """Resident set size of the process in bytes, None when unknown"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class Samples:
+    """Values produced by one updater run, frozen by publish()"""
+    
+    def __init__(self):
+        self.values = {}
+    
+    def set(self, metric: MetricSpec, value, **labels):
+        """Set the value of a series, the last value wins for equal labels"""
+        if labels.keys() != set(metric.labelnames):
+            raise ValueError(f"{metric.name} expects labels {metric.labelnames}, got {tuple(labels)}")
+        key = tuple(str(labels[name]) for name in metric.labelnames)
+        if metric.type != 'histogram':
+            value = float(value)
+        self.values.setdefault(metric.name, {})[key] = value
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Immutable view of every published metric"""
+    
+    version: int = 0
+    timestamp: float = 0.0
+    # Section name to {metric name: ((label values, value), ...)}
+    sections: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    # Metric name to the series of all sections
+    samples: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    
+    def get(self, name: str, **labels):
+        """Value of one series, None when it is not published"""
+        spec = METRICS[name]
+        key = tuple(str(labels[label]) for label in spec.labelnames)
+        for series_labels, value in self.samples.get(name, ()):
+            if series_labels == key:
+                return value
+        return None
+
+
+_snapshot = Snapshot()
+_publish_lock = threading.Lock()
+
+
+def get_snapshot() -> Snapshot:
+    """Current snapshot, safe to read from any thread"""
+    return _snapshot
+
+
+def _freeze(samples: Samples) -> MappingProxyType:
+    return MappingProxyType({
+        name: tuple(series.items()) for name, series in samples.values.items()
+    })
+
+
+def publish(section: str, samples: Samples) -> Snapshot:
+    """Replace one section of the snapshot and swap the new snapshot in
+    
+    A section identical to the published one keeps the current snapshot and
+    its version.
+    """
+    global _snapshot
+    frozen = _freeze(samples)
+    
+    with _publish_lock:
+        if _snapshot.sections.get(section) == frozen:
+            return _snapshot
+        sections = dict(_snapshot.sections)
+        sections[section] = frozen
+        _snapshot = _next_snapshot(sections, time.time())
+        return _snapshot
+
+
+def _next_snapshot(sections: dict, timestamp: float) -> Snapshot:
+    """Snapshot following the current one with these sections, under _publish_lock"""
+    merged = {}
+    for name in METRICS:
+        parts = [values[name] for values in sections.values() if name in values]
+        if parts:
+            merged[name] = tuple(chain.from_iterable(parts))
+    
+    return Snapshot(
+        version=_snapshot.version + 1,
+        timestamp=timestamp,
+        sections=MappingProxyType(sections),
+        samples=MappingProxyType(merged)
+    )
+
+
+_FAMILIES = {
+    'gauge': GaugeMetricFamily,
+    'counter': CounterMetricFamily,
+    'histogram': HistogramMetricFamily
+}
+
+
+class SnapshotCollector:
+    """Renders a snapshot as metric families, the current one by default
+    
+    stats: True to render the STATS_METRICS only, False to render the other
+    metrics only, None for all of them.
+    """
+    
+    def __init__(self, snapshot: Snapshot = None, stats: bool = None):
+        self.snapshot = snapshot
+        self.stats = stats
+    
+    def describe(self):
+        for spec in METRICS.values():
+            yield _FAMILIES[spec.type](spec.name, spec.documentation, labels=spec.labelnames)
+    
+    def collect(self):
+        snapshot = self.snapshot or _snapshot
+        for spec in METRICS.values():
+            if self.stats is not None and (spec.name in STATS_METRICS) != self.stats:
+                continue
+            family = _FAMILIES[spec.type](spec.name, spec.documentation, labels=spec.labelnames)
+            for labels, value in snapshot.samples.get(spec.name, ()):
+                if spec.type == 'histogram':
+                    buckets, total = value
+                    family.add_metric(labels, list(buckets), total)
+                else:
+                    family.add_metric(labels, value)
+            yield family
+
+
+REGISTRY.register(SnapshotCollector())
+# Process, platform and GC values change on every scrape and would be stale
+# in a body cached per snapshot version: they are rendered for each response
+RUNTIME_REGISTRY = CollectorRegistry(auto_describe=True)
+for collector in (PROCESS_COLLECTOR, PLATFORM_COLLECTOR, GC_COLLECTOR):
+    try:
+        REGISTRY.unregister(collector)
+    except KeyError:
+        pass
+    RUNTIME_REGISTRY.register(collector)
+
+
+def render_runtime(openmetrics_format: bool = False) -> bytes:
+    """Live process_* and python_* series, without the OpenMetrics EOF line"""
+    if openmetrics_format:
+        return openmetrics.generate_latest(RUNTIME_REGISTRY).removesuffix(b'# EOF\n')
+    return generate_latest(RUNTIME_REGISTRY)
+
+
+@dataclass(frozen=True)
+class Exposition:
+    """Rendered /metrics body of one snapshot version
+    
+    Series can be added at the end of the body (before the OpenMetrics EOF)
+    without compressing it again: the gzip stream of the body is kept open.
+    """
+    
+    version: int
+    content_type: str
+    body: bytes
+    gzip_body: bytes
+    # Validator of the body before the updater stats, and the length of that part
+    etag: str
+    values_size: int = 0
+    # Length of the body before its trailer, gzip stream of that part and
+    # the compressor that produced it
+    head_size: int = 0
+    gzip_head: bytes = b''
+    compressor: object = field(default=None, compare=False, repr=False)
+    
+    def body_with(self, extra: bytes) -> bytes:
+        """Body with extra series"""
+        return self.body[:self.head_size] + extra + self.body[self.head_size:]
+    
+    def gzip_body_with(self, extra: bytes) -> bytes:
+        """Compressed body with extra series"""
+        compressor = self.compressor.copy()
+        return self.gzip_head + compressor.compress(extra + self.body[self.head_size:]) + compressor.flush()
+
+
+# Latest rendered exposition, keyed by OpenMetrics or text format
+_expositions = {}
+_render_lock = threading.Lock()
+# Rendering durations by format, published with the next update
+render_durations = {
+    fmt: HistogramData(tempus_render_duration_seconds.buckets) for fmt in ('text', 'openmetrics')
+}
+
+
+def render_exposition(snapshot: Snapshot, openmetrics_format: bool = False) -> Exposition:
+    """Render a snapshot in the text or OpenMetrics format, the updater stats last"""
+    values, stats = SnapshotCollector(snapshot, stats=False), SnapshotCollector(snapshot, stats=True)
+    if openmetrics_format:
+        head = openmetrics.generate_latest(values).removesuffix(b'# EOF\n')
+        body = head + openmetrics.generate_latest(stats)
+        return _exposition(snapshot.version, openmetrics.CONTENT_TYPE_LATEST, body, len(head))
+    head = generate_latest(values)
+    return _exposition(snapshot.version, CONTENT_TYPE_PLAIN_0_0_4, head + generate_latest(stats), len(head))
+
+
+def _exposition(version: int, content_type: str, body: bytes, values_size: int = None) -> Exposition:
+    values_size = len(body) if values_size is None else values_size
+    head_size = len(body.removesuffix(b'# EOF\n'))
+    # A gzip stream, with a zero mtime: identical bodies compress to identical bytes
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    gzip_head = compressor.compress(body[:head_size]) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    tail = compressor.copy()
+    return Exposition(
+        version=version,
+        content_type=content_type,
+        body=body,
+        gzip_body=gzip_head + tail.compress(body[head_size:]) + tail.flush(),
+        etag='W/"' + hashlib.blake2b(body[:values_size], digest_size=12).hexdigest() + '"',
+        values_size=values_size,
+        head_size=head_size,
+        gzip_head=gzip_head,
+        compressor=compressor
+    )
+
+
+def get_exposition(openmetrics_format: bool = False) -> Exposition:
+    """Exposition of the current snapshot, rendered at most once per version"""
+    snapshot = _snapshot
+    exposition = _expositions.get(openmetrics_format)
+    if exposition is not None and exposition.version == snapshot.version:
+        return exposition
+    
+    with _render_lock:
+        # Another scrape may have rendered it meanwhile
+        snapshot = _snapshot
+        exposition = _expositions.get(openmetrics_format)
+        if exposition is None or exposition.version != snapshot.version:
+            # Rendering reads _snapshot again, which may be newer: the body
+            # is then re-rendered on the next scrape, never served stale
+            start = time.perf_counter()
+            exposition = render_exposition(snapshot, openmetrics_format)
+            render_durations['openmetrics' if openmetrics_format else 'text'].observe(time.perf_counter() - start)
+            _expositions[openmetrics_format] = exposition
+        return exposition
+
+
+def accepts_openmetrics(accept: str) -> bool:
+    """Whether an Accept header asks for OpenMetrics, the 0.0.4 text format otherwise"""
+    return choose_encoder(accept)[1].startswith('application/openmetrics-text')
+
+
+def accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    """Whether an Accept-Encoding header allows a content coding"""
+    for item in (accept_encoding or '').split(','):
+        name, *params = item.split(';')
+        if name.strip().lower() not in (coding, '*'):
+            continue
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip"""
+    return accepts_encoding(accept_encoding, 'gzip')
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header with an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == opaque for tag in if_none_match.split(','))
+
 
 # Store current context for JSON API
 clock_info = {
@@ -58,9 +462,107 @@ current_context = {
     'trash': {},
     'moon': {},
     'birthdays': {},
-    'clock': clock_info
+    'clock': clock_info,
+    'timezones': {}
 }
 
-def start_http_server(port: int):
-    """Start Prometheus HTTP server"""
-    prom_start_http(port)
\ No newline at end of file
+# Per-site sections (sun, season, calendar, moon, clock) keyed by site name,
+# the first site is also mirrored at the top level of current_context
+site_contexts = {}
+
+# Bumped after every context change, with the time of that change: sections
+# are replaced and never modified in place, so the API can cache their JSON
+_context_version = 0
+_context_modified = time.time()
+
+
+# Called after every context change, from the thread that made it
+context_listeners = []
+
+
+def _context_changed():
+    global _context_version, _context_modified
+    _context_version += 1
+    _context_modified = time.time()
+    for listener in context_listeners:
+        listener()
+
+
+def context_version() -> tuple:
+    """(version, last change timestamp) of the context"""
+    return _context_version, _context_modified
+
+
+def set_context(section: str, value):
+    """Replace a top-level section of the context"""
+    with _publish_lock:
+        current_context[section] = value
+        _context_changed()
+
+
+def update_site_context(section: str, sites: list, contexts: list):
+    """Store a per-site context section, mirroring the first site at the top level"""
+    with _publish_lock:
+        for site, context in zip(sites, contexts):
+            if context is not None:
+                site_contexts.setdefault(site.name, {})[section] = context
+        
+        if contexts and contexts[0] is not None:
+            current_context[section] = contexts[0]
+        _context_changed()
+
+
+def dump_state() -> dict:
+    """Copy of the snapshot, its text exposition and the context, as JSON types
+    
+    The updater stats are left out: they belong to the process that made them.
+    """
+    snapshot = _snapshot
+    exposition = get_exposition()
+    with _publish_lock:
+        context = dict(current_context)
+        sites = {name: dict(sections) for name, sections in site_contexts.items()}
+    
+    return {
+        'timestamp': snapshot.timestamp,
+        'sections': {
+            section: {name: [[list(labels), value] for labels, value in series] for name, series in values.items()}
+            for section, values in snapshot.sections.items() if section != STATS_SECTION
+        },
+        # A newer snapshot may have been rendered meanwhile
+        'exposition': exposition.body[:exposition.values_size].decode() if exposition.version == snapshot.version else None,
+        'context': context,
+        'site_contexts': sites
+    }
+
+
+def _thaw(spec: MetricSpec, value):
+    if spec.type == 'histogram':
+        buckets, total = value
+        return tuple(tuple(bucket) for bucket in buckets), total
+    return value
+
+
+def load_state(state: dict) -> Snapshot:
+    """Make a dump_state() copy the current snapshot and context"""
+    global _snapshot
+    sections = {}
+    for section, values in state['sections'].items():
+        sections[section] = MappingProxyType({
+            name: tuple((tuple(labels), _thaw(METRICS[name], value)) for labels, value in series)
+            for name, series in values.items() if name in METRICS
+        })
+    
+    with _publish_lock:
+        _snapshot = _next_snapshot(sections, state['timestamp'])
+        snapshot = _snapshot
+        current_context.update(state['context'])
+        for name, site_sections in state['site_contexts'].items():
+            site_contexts.setdefault(name, {}).update(site_sections)
+        _context_changed()
+    
+    # The body rendered before the restart is the one of these values
+    if state.get('exposition') is not None:
+        with _render_lock:
+            _expositions[False] = _exposition(snapshot.version, CONTENT_TYPE_PLAIN_0_0_4, state['exposition'].encode())
+    return snapshot
\ No newline at end of file
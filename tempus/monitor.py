@@ -2,99 +2,349 @@
 Main monitoring loop
 """
 import asyncio
+import multiprocessing
+import os
 import signal
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
 from tempus.config import config
-from tempus.sun import update_sun_metrics
-from tempus.seasons import update_season_metrics
-from tempus.holidays import update_holiday_metrics
-from tempus.trash import update_trash_metrics
-from tempus.moon import update_moon_metrics
-from tempus.birthdays import update_birthday_metrics
-from tempus.clock import update_clock_metrics
-from tempus.metrics import start_http_server
-from tempus.api import start_api_server
-
-
-def run_all_updates():
-    """Run all metric updates"""
-    update_sun_metrics()
-    update_season_metrics()
-    update_holiday_metrics()
-    update_trash_metrics()
-    update_moon_metrics()
-    update_birthday_metrics()
-    update_clock_metrics()
-
-
-async def daily_updates(start_shutdown):
-    """Run daily updates at midnight"""
-    last_date = None
+from tempus.sun import update_sun_metrics, next_sun_day, update_sun_up, next_sun_up_change
+from tempus.seasons import update_season_metrics, next_season_change
+from tempus.holidays import update_holiday_metrics, next_holiday_change
+from tempus.trash import update_trash_metrics, next_trash_change
+from tempus.moon import update_moon_metrics, next_moon_change
+from tempus.birthdays import update_birthday_metrics, next_birthday_change
+from tempus.clock import update_clock_metrics, next_clock_change
+from tempus.metrics import (
+    HistogramData,
+    STATS_SECTION,
+    Samples,
+    publish,
+    render_durations,
+    resident_memory,
+    tempus_render_duration_seconds,
+    tempus_resident_memory_bytes,
+    tempus_update_duration_seconds,
+    tempus_update_errors_total,
+    tempus_update_last_success_timestamp,
+    tempus_update_timeouts_total
+)
+from tempus.persist import restore_snapshot, save_snapshot
+from tempus.schedule import invalidate_schedule, reload_schedule
+from tempus.scheduler import Scheduler
+from tempus.sites import get_sites, shutdown_pool
+from tempus.textfile import write_textfile
+
+# Every updater with the function declaring when its output next changes
+UPDATERS = {
+    'sun': (update_sun_metrics, next_sun_day),
+    'sun_up': (update_sun_up, next_sun_up_change),
+    'season': (update_season_metrics, next_season_change),
+    'holiday': (update_holiday_metrics, next_holiday_change),
+    'trash': (update_trash_metrics, next_trash_change),
+    'moon': (update_moon_metrics, next_moon_change),
+    'birthday': (update_birthday_metrics, next_birthday_change),
+    'clock': (update_clock_metrics, next_clock_change),
+}
+
+# Updaters reading the schedule file, re-run as soon as it changes
+SCHEDULE_UPDATERS = ('trash', 'birthday')
+
+
+_executor = None
+# Updaters still running in a worker thread, possibly past their timeout
+_running = set()
+# Textfile rewritten after every batch of updates, instead of serving HTTP
+_textfile = None
+# Pushes snapshot changes when PUSH_URL is set
+_pusher = None
+
+
+class UpdateStats:
+    """Durations, errors, timeouts and last success of the updaters"""
     
-    while not start_shutdown.is_set():
-        now = datetime.now()
-        
-        if last_date != now.date():
-            logger.info(f"Running daily updates for {now.date()}")
-            try:
-                run_all_updates()
-                last_date = now.date()
-            except Exception as e:
-                logger.error(f"Error in daily updates: {e}")
-        
-        # Calculate seconds until the next minute
-        sleep_seconds = 60 - datetime.now().second
+    def __init__(self):
+        # Written from the worker threads
+        self.lock = threading.Lock()
+        self.durations = {}
+        self.errors = {}
+        self.timeouts = {}
+        self.last_success = {}
+    
+    def record(self, name: str, duration: float, ok: bool):
+        with self.lock:
+            self.durations.setdefault(name, HistogramData(tempus_update_duration_seconds.buckets)).observe(duration)
+            self.errors[name] = self.errors.get(name, 0) + (0 if ok else 1)
+            if ok:
+                self.last_success[name] = time.time()
+    
+    def timed_out(self, name: str):
+        with self.lock:
+            self.timeouts[name] = self.timeouts.get(name, 0) + 1
+    
+    def samples(self) -> Samples:
+        """Self-instrumentation metric values"""
+        samples = Samples()
+        with self.lock:
+            for name in sorted(UPDATERS.keys() | self.durations.keys()):
+                histogram = self.durations.get(name) or HistogramData(tempus_update_duration_seconds.buckets)
+                samples.set(tempus_update_duration_seconds, histogram.value(), updater=name)
+                samples.set(tempus_update_errors_total, self.errors.get(name, 0), updater=name)
+                samples.set(tempus_update_timeouts_total, self.timeouts.get(name, 0), updater=name)
+                if name in self.last_success:
+                    samples.set(tempus_update_last_success_timestamp, self.last_success[name], updater=name)
         
+        for fmt, histogram in render_durations.items():
+            samples.set(tempus_render_duration_seconds, histogram.value(), format=fmt)
+        rss = resident_memory()
+        if rss is not None:
+            samples.set(tempus_resident_memory_bytes, rss)
+        return samples
+
+
+update_stats = UpdateStats()
+
+
+def run_all_updates() -> list:
+    """Run every updater once in this thread, return the names of those that failed"""
+    failed = []
+    for name, (update, _) in UPDATERS.items():
+        try:
+            _run_tracked(name, update)
+        except Exception as e:
+            logger.error(f"Error in {name} update: {e}")
+            failed.append(name)
+    return failed
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=config.update_workers,
+            thread_name_prefix="tempus-update"
+        )
+    return _executor
+
+
+def _run_tracked(name: str, update):
+    start = time.perf_counter()
+    ok = False
+    try:
+        update()
+        ok = True
+    finally:
+        update_stats.record(name, time.perf_counter() - start, ok)
+        _running.discard(name)
+
+
+def _publish_stats():
+    """Publish the updater stats, left out of the /metrics ETag"""
+    # Durations and timestamps would change the textfile on every run,
+    # node_exporter reports its age and parse errors instead
+    if not _textfile:
+        publish(STATS_SECTION, update_stats.samples())
+
+
+def _run_published(name: str, update):
+    """_run_tracked, then the updater stats from the same worker thread"""
+    try:
+        _run_tracked(name, update)
+    finally:
+        _publish_stats()
+
+
+async def run_update(name: str):
+    """Run one updater in the worker pool, isolated from the others"""
+    if name in _running:
+        logger.warning(f"Skipping {name} update, previous run still in progress")
+        return
+    
+    update, _ = UPDATERS[name]
+    loop = asyncio.get_running_loop()
+    _running.add(name)
+    future = loop.run_in_executor(_get_executor(), _run_published, name, update)
+    
+    try:
+        # shield: a timeout stops waiting but lets the thread finish its run
+        await asyncio.wait_for(asyncio.shield(future), timeout=config.update_timeout)
+    except asyncio.TimeoutError:
+        update_stats.timed_out(name)
+        logger.error(f"{name} update timed out after {config.update_timeout}s")
+        # Update workers may all be busy, the default executor is not
+        await loop.run_in_executor(None, _publish_stats)
+    except Exception as e:
+        logger.error(f"Error in {name} update: {e}")
+
+
+async def run_updates(names):
+    """Run updaters concurrently off the event loop, then persist the snapshot"""
+    await asyncio.gather(*(run_update(name) for name in names))
+    loop = asyncio.get_running_loop()
+    if config.snapshot_max_age > 0 and not _textfile:
+        # The exposition may have to be rendered first
+        await loop.run_in_executor(_get_executor(), save_snapshot)
+    if _textfile:
+        try:
+            await loop.run_in_executor(_get_executor(), write_textfile, _textfile)
+        except OSError as e:
+            logger.error(f"Unable to write {_textfile}: {e}")
+    if _pusher:
+        _pusher.notify()
+
+
+async def scheduled_updates(start_shutdown):
+    """Run every updater once, then each one exactly when its output changes"""
+    logger.info("Running initial updates...")
+    await run_updates(UPDATERS)
+    
+    scheduler = Scheduler()
+    for name, (update, next_change) in UPDATERS.items():
+        scheduler.add(name, update, next_change)
+    
+    await scheduler.run(
+        start_shutdown,
+        run_jobs=lambda jobs: run_updates(job.name for job in jobs)
+    )
+
+
+async def watch_schedule(start_shutdown, reload_requested=None):
+    """Refresh schedule based metrics when the schedule file changes
+    
+    The file is checked every `schedule_check_interval` seconds (a stat
+    call), and re-read unconditionally when `reload_requested` is set.
+    """
+    reload_requested = reload_requested or asyncio.Event()
+    
+    while not start_shutdown.is_set():
         try:
-            await asyncio.wait_for(start_shutdown.wait(), timeout=sleep_seconds)
+            await asyncio.wait_for(reload_requested.wait(), timeout=config.schedule_check_interval)
         except asyncio.TimeoutError:
             pass
+        
+        if reload_requested.is_set():
+            reload_requested.clear()
+            logger.info("Reloading schedule file")
+            invalidate_schedule(config.schedule_file)
+        
+        if reload_schedule(config.schedule_file):
+            await run_updates(SCHEDULE_UPDATERS)
 
-async def run_monitor(start_shutdown):
-    """Run the monitor with both update loop and API server"""
-    # Start API server task
-    api_task = asyncio.create_task(start_api_server(config.api_port))
+async def run_monitor(start_shutdown, reload_requested=None, reuse_port: bool = False, textfile: str = None):
+    """Run the monitor with both update loop and HTTP server
+    
+    With a textfile path, the metrics are written to that file after every
+    batch of updates instead of being served.
+    """
+    global _textfile, _pusher
+    _textfile = textfile
+    tasks = []
     
-    # Start daily updates task
-    updates_task = asyncio.create_task(daily_updates(start_shutdown))
+    if config.push_url:
+        from tempus.push import Pusher
+        _pusher = Pusher()
+        tasks.append(asyncio.create_task(_pusher.run()))
+    
+    if not textfile:
+        # aiohttp is the slowest import, batch uses of the updaters do without it
+        from tempus.api import start_api_server
+        
+        # Last values of the previous run, served until the updaters revalidate them
+        if config.snapshot_max_age > 0:
+            restore_snapshot()
+        
+        # Start HTTP server task
+        tasks.append(asyncio.create_task(start_api_server(config.port, reuse_port)))
+    
+    # Start scheduled updates task
+    tasks.append(asyncio.create_task(scheduled_updates(start_shutdown)))
+    
+    # Start schedule file watcher task
+    tasks.append(asyncio.create_task(watch_schedule(start_shutdown, reload_requested)))
     
     # Wait for shutdown signal
     await start_shutdown.wait()
     
     # Cancel tasks
     logger.info("Cancelling tasks...")
-    api_task.cancel()
-    updates_task.cancel()
+    for task in tasks:
+        task.cancel()
     
     # Wait for tasks to finish
-    await asyncio.gather(api_task, updates_task, return_exceptions=True)
+    await asyncio.gather(*tasks, return_exceptions=True)
 
 
-def start_monitor():
-    """Start the monitoring service"""
-    logger.info("Starting Tempus Exporter")
-    logger.info(f"Location: {config.latitude}, {config.longitude}")
-    
-    start_http_server(config.port)
-    logger.info(f"Metrics available at http://0.0.0.0:{config.port}/metrics")
-    logger.info(f"JSON API available at http://0.0.0.0:{config.api_port}/context")
-    
+def run_worker(reuse_port: bool = False, textfile: str = None):
+    """Run updaters and the HTTP server (or textfile) in this process until SIGTERM or SIGINT"""
     start_shutdown = asyncio.Event()
+    reload_requested = asyncio.Event()
     
     def signal_handler(sig, frame):
         logger.info(f"Received signal {sig}, shutting down...")
         start_shutdown.set()
     
+    def reload_handler(sig, frame):
+        logger.info(f"Received signal {sig}, reloading schedule...")
+        reload_requested.set()
+    
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
-    
-    logger.info("Running initial updates...")
-    run_all_updates()
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, reload_handler)
     
     try:
-        asyncio.run(run_monitor(start_shutdown))
+        asyncio.run(run_monitor(start_shutdown, reload_requested, reuse_port, textfile))
     except KeyboardInterrupt:
         logger.info("Keyboard interrupt received")
+    finally:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        shutdown_pool()
+
+
+def run_workers(count: int):
+    """Run worker processes listening on the same port with SO_REUSEPORT
+    
+    Every worker runs its own updaters, the kernel spreads connections
+    between them. Signals are forwarded to the workers.
+    """
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(True,), name=f"tempus-worker-{i}")
+        for i in range(count)
+    ]
+    for worker in workers:
+        worker.start()
+    logger.info(f"Started {count} HTTP workers")
+    
+    def forward(sig, frame):
+        for worker in workers:
+            if worker.is_alive():
+                os.kill(worker.pid, sig)
+    
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, forward)
+    
+    for worker in workers:
+        worker.join()
+
+
+def start_monitor():
+    """Start the monitoring service"""
+    logger.info("Starting Tempus Exporter")
+    sites = get_sites()
+    if len(sites) == 1:
+        logger.info(f"Location: {sites[0].latitude}, {sites[0].longitude}")
+    
+    logger.info(f"Metrics available at http://0.0.0.0:{config.port}/metrics")
+    logger.info(f"JSON API available at http://0.0.0.0:{config.port}/context")
+    
+    if config.http_workers > 1:
+        run_workers(config.http_workers)
+    else:
+        run_worker()
     
     logger.info("Tempus Exporter stopped")
\ No newline at end of file
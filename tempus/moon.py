@@ -1,10 +1,168 @@
 """
 Moon phase monitoring
 """
-from datetime import datetime
-from astral import moon
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from loguru import logger
-from tempus.metrics import moon_phase_day, moon_phase_info, current_context
+import numpy as np
+from tempus.ephemeris import delta_t
+from tempus.scheduler import next_midnight
+from tempus.sites import get_sites
+from tempus.tzindex import get_transition_index
+from tempus.metrics import (
+    moon_phase_day,
+    moon_phase_info,
+    moon_illumination_fraction,
+    days_until_full_moon,
+    days_until_new_moon,
+    Samples,
+    publish,
+    update_site_context
+)
+
+# Principal phases in lunation order, and the phase following each of them
+PHASE_EVENTS = ('New Moon', 'First Quarter', 'Full Moon', 'Last Quarter')
+BETWEEN_PHASES = ('Waxing Crescent', 'Waxing Gibbous', 'Waning Gibbous', 'Waning Crescent')
+
+# Years covered by the precomputed table
+TABLE_FIRST_YEAR = 1900
+TABLE_LAST_YEAR = 2200
+
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_SYNODIC_MONTH = 29.530588861
+
+# Meeus, Astronomical Algorithms, ch. 49: periodic corrections as
+# (coefficient, power of E, multiples of M, M', F, Omega)
+_NEW_MOON_TERMS = [
+    (-0.40720, 0, 0, 1, 0, 0), (0.17241, 1, 1, 0, 0, 0), (0.01608, 0, 0, 2, 0, 0),
+    (0.01039, 0, 0, 0, 2, 0), (0.00739, 1, -1, 1, 0, 0), (-0.00514, 1, 1, 1, 0, 0),
+    (0.00208, 2, 2, 0, 0, 0), (-0.00111, 0, 0, 1, -2, 0), (-0.00057, 0, 0, 1, 2, 0),
+    (0.00056, 1, 1, 2, 0, 0), (-0.00042, 0, 0, 3, 0, 0), (0.00042, 1, 1, 0, 2, 0),
+    (0.00038, 1, 1, 0, -2, 0), (-0.00024, 1, -1, 2, 0, 0), (-0.00017, 0, 0, 0, 0, 1),
+    (-0.00007, 0, 2, 1, 0, 0), (0.00004, 0, 0, 2, -2, 0), (0.00004, 0, 3, 0, 0, 0),
+    (0.00003, 0, 1, 1, -2, 0), (0.00003, 0, 0, 2, 2, 0), (-0.00003, 0, 1, 1, 2, 0),
+    (0.00003, 0, -1, 1, 2, 0), (-0.00002, 0, -1, 1, -2, 0), (-0.00002, 0, 1, 3, 0, 0),
+    (0.00002, 0, 0, 4, 0, 0),
+]
+_FULL_MOON_TERMS = [
+    (-0.40614, 0, 0, 1, 0, 0), (0.17302, 1, 1, 0, 0, 0), (0.01614, 0, 0, 2, 0, 0),
+    (0.01043, 0, 0, 0, 2, 0), (0.00734, 1, -1, 1, 0, 0), (-0.00515, 1, 1, 1, 0, 0),
+    (0.00209, 2, 2, 0, 0, 0),
+] + _NEW_MOON_TERMS[7:]
+_QUARTER_TERMS = [
+    (-0.62801, 0, 0, 1, 0, 0), (0.17172, 1, 1, 0, 0, 0), (-0.01183, 1, 1, 1, 0, 0),
+    (0.00862, 0, 0, 2, 0, 0), (0.00804, 0, 0, 0, 2, 0), (0.00454, 1, -1, 1, 0, 0),
+    (0.00204, 2, 2, 0, 0, 0), (-0.00180, 0, 0, 1, -2, 0), (-0.00070, 0, 0, 1, 2, 0),
+    (-0.00040, 0, 0, 3, 0, 0), (-0.00034, 1, -1, 2, 0, 0), (0.00032, 1, 1, 0, 2, 0),
+    (0.00032, 1, 1, 0, -2, 0), (-0.00028, 2, 2, 1, 0, 0), (0.00027, 1, 1, 2, 0, 0),
+    (-0.00017, 0, 0, 0, 0, 1), (-0.00005, 0, -1, 1, -2, 0), (0.00004, 0, 0, 2, 2, 0),
+    (-0.00004, 0, 1, 1, 2, 0), (0.00004, 0, -2, 1, 0, 0), (0.00003, 0, 1, 1, -2, 0),
+    (0.00003, 0, 3, 0, 0, 0), (0.00002, 0, 0, 2, -2, 0), (0.00002, 0, -1, 1, 2, 0),
+    (-0.00002, 0, 1, 3, 0, 0),
+]
+# Planetary arguments A2..A14: (coefficient, constant, rate per lunation),
+# A1 also has a T^2 term
+_PLANETARY_TERMS = [
+    (0.000165, 251.88, 0.016321),
+    (0.000164, 251.83, 26.651886), (0.000126, 349.42, 36.412478),
+    (0.000110, 84.66, 18.206239), (0.000062, 141.74, 53.303771),
+    (0.000060, 207.14, 2.453732), (0.000056, 154.84, 7.306860),
+    (0.000047, 34.52, 27.261239), (0.000042, 207.19, 0.121824),
+    (0.000040, 291.34, 1.844379), (0.000037, 161.72, 24.198154),
+    (0.000035, 239.56, 25.513099), (0.000023, 331.55, 3.592518),
+]
+
+
+def _periodic(terms: list, e, m, mp, f, omega):
+    return sum(
+        coef * e ** e_power * np.sin(a * m + b * mp + c * f + d * omega)
+        for coef, e_power, a, b, c, d in terms
+    )
+
+
+def compute_lunations(k: np.ndarray) -> np.ndarray:
+    """UTC epoch seconds of the lunar phases numbered k
+    
+    Integer k are new moons, k + 0.25 first quarters, k + 0.5 full moons
+    and k + 0.75 last quarters (k = 0 is the new moon of 2000-01-06).
+    """
+    k = np.asarray(k, dtype=np.float64)
+    t = k / 1236.85
+    jde = (2451550.09766 + _SYNODIC_MONTH * k + 0.00015437 * t ** 2
+           - 0.000000150 * t ** 3 + 0.00000000073 * t ** 4)
+    
+    e = 1 - 0.002516 * t - 0.0000074 * t ** 2
+    m = np.radians(2.5534 + 29.10535670 * k - 0.0000014 * t ** 2 - 0.00000011 * t ** 3)
+    mp = np.radians(201.5643 + 385.81693528 * k + 0.0107582 * t ** 2
+                    + 0.00001238 * t ** 3 - 0.000000058 * t ** 4)
+    f = np.radians(160.7108 + 390.67050284 * k - 0.0016118 * t ** 2
+                   - 0.00000227 * t ** 3 + 0.000000011 * t ** 4)
+    omega = np.radians(124.7746 - 1.56375588 * k + 0.0020672 * t ** 2 + 0.00000215 * t ** 3)
+    args = (e, m, mp, f, omega)
+    
+    quarter = np.round((k % 1) * 4) % 4
+    w = (0.00306 - 0.00038 * e * np.cos(m) + 0.00026 * np.cos(mp)
+         - 0.00002 * np.cos(mp - m) + 0.00002 * np.cos(mp + m) + 0.00002 * np.cos(2 * f))
+    jde += np.select(
+        [quarter == 0, quarter == 2, quarter == 1],
+        [_periodic(_NEW_MOON_TERMS, *args), _periodic(_FULL_MOON_TERMS, *args),
+         _periodic(_QUARTER_TERMS, *args) + w],
+        default=_periodic(_QUARTER_TERMS, *args) - w
+    )
+    
+    jde += 0.000325 * np.sin(np.radians(299.77 + 0.107408 * k - 0.009173 * t ** 2))
+    jde += sum(
+        coef * np.sin(np.radians(base + rate * k)) for coef, base, rate in _PLANETARY_TERMS
+    )
+    
+    # Dynamical time to universal time, then to unix time
+    return (jde - 2440587.5) * 86400.0 - delta_t(2000 + k / 12.3685)
+
+
+@lru_cache(maxsize=None)
+def lunation_table() -> tuple:
+    """Sorted (instants, phase kinds) for TABLE_FIRST_YEAR to TABLE_LAST_YEAR
+    
+    Kinds index PHASE_EVENTS.
+    """
+    first = np.floor((TABLE_FIRST_YEAR - 2000) * 12.3685)
+    last = np.ceil((TABLE_LAST_YEAR + 1 - 2000) * 12.3685)
+    k = np.arange(first, last, 0.25)
+    kinds = np.round((k % 1) * 4).astype(int)
+    return compute_lunations(k).tolist(), kinds.tolist()
+
+
+def illumination(instants: np.ndarray) -> np.ndarray:
+    """Illuminated fraction of the moon disk (0-1) at UTC epoch seconds
+    
+    Meeus ch. 48 low accuracy phase angle, good to about 0.01.
+    """
+    t = (np.asarray(instants, dtype=np.float64) / 86400.0 + 2440587.5 - 2451545.0) / 36525
+    d = np.radians(297.8501921 + 445267.1114034 * t - 0.0018819 * t ** 2)
+    m = np.radians(357.5291092 + 35999.0502909 * t - 0.0001536 * t ** 2)
+    mp = np.radians(134.9633964 + 477198.8675055 * t + 0.0087414 * t ** 2)
+    
+    phase_angle = np.radians(
+        180 - np.degrees(d) - 6.289 * np.sin(mp) + 2.100 * np.sin(m)
+        - 1.274 * np.sin(2 * d - mp) - 0.658 * np.sin(2 * d)
+        - 0.214 * np.sin(2 * mp) - 0.110 * np.sin(d)
+    )
+    return (1 + np.cos(phase_angle)) / 2
+
+
+def _local_day(ts: float, tz_name: str) -> int:
+    """Days since epoch of the local calendar date of ts"""
+    return int((ts + get_transition_index(tz_name).offset_at(ts)) // 86400)
+
+
+def _bisect_table(ts: float) -> tuple:
+    instants, kinds = lunation_table()
+    i = bisect_right(instants, ts)
+    if i == 0 or i >= len(instants) - 4:
+        raise ValueError(f"Date outside of the lunation table ({TABLE_FIRST_YEAR}-{TABLE_LAST_YEAR})")
+    return instants, kinds, i
+
 
 def get_moon_phase_name(phase_day):
     """
@@ -28,30 +186,95 @@ def get_moon_phase_name(phase_day):
     else:
         return "Waning Crescent"
 
-def update_moon_metrics():
+
+def get_moon_phase(now: datetime, tz_name: str = 'UTC') -> str:
+    """Name of the moon phase on the local date of `now`
+    
+    A principal phase names the whole local day it happens on, days in
+    between take the name of the phase following the previous event.
+    """
+    ts = now.timestamp()
+    instants, kinds, i = _bisect_table(ts)
+    today = _local_day(ts, tz_name)
+    
+    if _local_day(instants[i], tz_name) == today:
+        return PHASE_EVENTS[kinds[i]]
+    if _local_day(instants[i - 1], tz_name) == today:
+        return PHASE_EVENTS[kinds[i - 1]]
+    return BETWEEN_PHASES[kinds[i - 1]]
+
+
+def _next_phase(instants: list, kinds: list, i: int, kind: int) -> float:
+    """Instant of the first phase of the given kind at or after index i"""
+    return next(instants[j] for j in range(i, i + 4) if kinds[j] == kind)
+
+
+def compute_moon(now: datetime, tz_name: str = 'UTC') -> dict:
+    """Compute the moon context at an instant, days counted in local dates"""
+    ts = now.timestamp()
+    instants, kinds, i = _bisect_table(ts)
+    today = _local_day(ts, tz_name)
+    
+    # Lunation age on the 0-28 scale of astral.moon.phase
+    new_index = i - 1 - (kinds[i - 1] % 4)
+    start, end = instants[new_index], instants[new_index + 4]
+    next_full = _next_phase(instants, kinds, i, PHASE_EVENTS.index('Full Moon'))
+    next_new = _next_phase(instants, kinds, i, PHASE_EVENTS.index('New Moon'))
+    
+    return {
+        'day': round((ts - start) / (end - start) * 28, 2),
+        'phase': get_moon_phase(now, tz_name),
+        'illumination': round(float(illumination(ts)), 3),
+        'days_until_full_moon': _local_day(next_full, tz_name) - today,
+        'days_until_new_moon': _local_day(next_new, tz_name) - today,
+        'next_full_moon': (_EPOCH_UTC + timedelta(seconds=next_full)).isoformat(),
+        'next_new_moon': (_EPOCH_UTC + timedelta(seconds=next_new)).isoformat(),
+    }
+
+
+def next_moon_event(now: datetime) -> datetime:
+    """UTC instant of the next principal moon phase"""
+    instants, _, i = _bisect_table(now.timestamp())
+    return _EPOCH_UTC + timedelta(seconds=instants[i])
+
+
+def moon_samples(sites: list, results: list) -> Samples:
+    """Metric values of compute_moon results"""
+    samples = Samples()
+    for site, result in zip(sites, results):
+        samples.set(moon_phase_day, result['day'], site=site.name)
+        samples.set(moon_phase_info, 1, site=site.name, phase=result['phase'])
+        samples.set(moon_illumination_fraction, result['illumination'], site=site.name)
+        samples.set(days_until_full_moon, result['days_until_full_moon'], site=site.name)
+        samples.set(days_until_new_moon, result['days_until_new_moon'], site=site.name)
+    return samples
+
+
+def update_moon_metrics(sites: list = None):
     """Update moon metrics"""
-    try:
-        now = datetime.now()
-        
-        # astral.moon.phase returns 0..27.99
-        # 0 = New Moon, 7 = First Quarter, 14 = Full Moon, 21 = Last Quarter
-        phase = moon.phase(now)
-        
-        phase_name = get_moon_phase_name(phase)
-        
-        logger.debug(f"Moon: day={phase:.1f} phase={phase_name}")
-        
-        moon_phase_day.set(phase)
-        
-        # Reset info metric
-        moon_phase_info.clear()
-        moon_phase_info.labels(phase=phase_name).set(1)
-        
-        # Update context
-        current_context['moon'] = {
-            'day': round(phase, 2),
-            'phase': phase_name
-        }
-        
-    except Exception as e:
-        logger.error(f"Error updating moon metrics: {e}")
+    sites = get_sites() if sites is None else sites
+    now = datetime.now(timezone.utc)
+    
+    # Sites sharing a timezone share the same local date
+    by_zone = {}
+    results = []
+    for site in sites:
+        if site.timezone not in by_zone:
+            result = compute_moon(now, site.timezone)
+            by_zone[site.timezone] = result
+            logger.debug(
+                f"Moon {site.timezone}: day={result['day']} phase={result['phase']} "
+                f"illumination={result['illumination']}"
+            )
+        results.append(by_zone[site.timezone])
+    
+    publish('moon', moon_samples(sites, results))
+    
+    # Update context
+    update_site_context('moon', sites, results)
+
+
+def next_moon_change(now: datetime, sites: list = None) -> datetime:
+    """Moon values change at local midnight and at the principal phases"""
+    sites = get_sites() if sites is None else sites
+    return min(next_midnight([site.timezone for site in sites], now), next_moon_event(now))
@@ -0,0 +1,79 @@
+"""
+Snapshot persistence
+
+The published snapshot, its rendered /metrics body and the JSON API context
+are saved under CACHE_DIR after every batch of updates. A restarted exporter
+restores them before its HTTP server starts, so it serves its last values at
+once instead of empty gauges while the updaters revalidate them. The updater
+stats are not saved: counters and timestamps start over with the process.
+"""
+import hashlib
+import json
+import os
+import time
+from loguru import logger
+from tempus.config import config
+from tempus.metrics import METRICS, dump_state, load_state
+from tempus.sites import get_sites
+
+# Bump when the on-disk snapshot layout changes
+SNAPSHOT_FORMAT_VERSION = 4
+
+
+def snapshot_path() -> str:
+    return os.path.join(config.cache_dir, 'snapshot.json')
+
+
+def _signature(sites: list) -> str:
+    """Digest of the sites and metric declarations the snapshot was made with"""
+    declarations = [(spec.name, spec.labelnames, spec.type, spec.buckets) for spec in METRICS.values()]
+    return hashlib.blake2b(repr((sites, declarations)).encode(), digest_size=12).hexdigest()
+
+
+def save_snapshot(path: str = None):
+    """Persist the current snapshot atomically, failures only cost a cold start"""
+    path = path or snapshot_path()
+    state = {
+        'format': SNAPSHOT_FORMAT_VERSION,
+        'signature': _signature(get_sites()),
+        **dump_state()
+    }
+    
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Unable to persist snapshot {path}: {e}")
+
+
+def restore_snapshot(path: str = None) -> bool:
+    """Serve the persisted snapshot until the updaters replace it
+    
+    Snapshots older than `snapshot_max_age` seconds, or made with other
+    sites or metrics, are ignored. Returns whether one was restored.
+    """
+    path = path or snapshot_path()
+    try:
+        with open(path, 'r') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return False
+    
+    if state.get('format') != SNAPSHOT_FORMAT_VERSION or state.get('signature') != _signature(get_sites()):
+        logger.info(f"Ignoring snapshot {path} of another version or configuration")
+        return False
+    
+    age = time.time() - state['timestamp']
+    if age > config.snapshot_max_age:
+        logger.info(f"Ignoring snapshot {path} from {age:.0f}s ago")
+        return False
+    
+    load_state(state)
+    logger.info(f"Restored snapshot from {age:.0f}s ago, revalidating")
+    return True
\ No newline at end of file
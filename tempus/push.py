@@ -0,0 +1,271 @@
+"""
+Push mode
+
+Sites behind NAT cannot be scraped: with PUSH_URL set, the snapshot is
+pushed to a Prometheus remote-write endpoint or to a Pushgateway
+(PUSH_FORMAT). Values change rarely, so pushes follow snapshot changes.
+Remote write only sends the series that changed, with staleness markers for
+those that disappeared, and resends everything every PUSH_INTERVAL seconds
+so that no series goes stale in Prometheus between changes.
+
+Requests wait in a bounded queue and are retried with exponential backoff,
+over one keep-alive aiohttp session.
+"""
+import asyncio
+import random
+import socket
+import struct
+import time
+from base64 import urlsafe_b64encode
+from collections import deque
+import aiohttp
+from loguru import logger
+from tempus.config import config
+from tempus.metrics import METRICS, get_exposition, get_snapshot
+
+try:
+    import snappy
+except ImportError:
+    snappy = None
+
+# Prometheus staleness marker, a NaN with a specific payload
+STALE_NAN = struct.pack('<Q', 0x7ff0000000000002)
+# Delays between attempts of a failed request, doubled up to the maximum
+PUSH_RETRY_MIN = 0.5
+PUSH_RETRY_MAX = 30.0
+
+REMOTE_WRITE_HEADERS = {
+    'Content-Type': 'application/x-protobuf',
+    'Content-Encoding': 'snappy',
+    'X-Prometheus-Remote-Write-Version': '0.1.0',
+}
+PUSHGATEWAY_HEADERS = {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _field(number: int, payload: bytes) -> bytes:
+    """Length-delimited protobuf field"""
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+
+def snappy_compress(data: bytes) -> bytes:
+    """Snappy block format, by python-snappy when installed
+    
+    Otherwise the data is stored as literals: a valid block for any
+    decoder, only not compressed.
+    """
+    if snappy is not None:
+        return snappy.compress(data)
+    
+    out = bytearray(_varint(len(data)))
+    for start in range(0, len(data), 65536):
+        chunk = data[start:start + 65536]
+        length = len(chunk) - 1
+        if length < 60:
+            out.append(length << 2)
+        elif length < 256:
+            out += bytes((60 << 2, length))
+        else:
+            out.append(61 << 2)
+            out += length.to_bytes(2, 'little')
+        out += chunk
+    return bytes(out)
+
+
+def snapshot_series(snapshot) -> dict:
+    """{(metric name, ((label, value), ...)): value} of a snapshot
+    
+    Histograms are split in their _bucket, _sum and _count series.
+    """
+    series = {}
+    for name, values in snapshot.samples.items():
+        spec = METRICS[name]
+        for labels, value in values:
+            pairs = tuple(zip(spec.labelnames, labels))
+            if spec.type == 'histogram':
+                buckets, total = value
+                for bound, count in buckets:
+                    series[(f"{name}_bucket", pairs + (('le', bound),))] = float(count)
+                series[(f"{name}_sum", pairs)] = total
+                series[(f"{name}_count", pairs)] = float(buckets[-1][1])
+            else:
+                series[(name, pairs)] = value
+    return series
+
+
+def encode_labels(name: str, pairs: tuple, extra_labels: tuple = ()) -> bytes:
+    """Label fields of a TimeSeries message, sorted by name"""
+    labels = sorted((('__name__', name),) + pairs + extra_labels)
+    return b''.join(_field(1, _field(1, key.encode()) + _field(2, str(value).encode())) for key, value in labels)
+
+
+def encode_write_request(series: list, timestamp_ms: int, extra_labels: tuple = (), cache: dict = None) -> bytes:
+    """Remote-write WriteRequest of ((name, label pairs), value) series
+    
+    A None value is written as a staleness marker. Encoded labels are kept
+    in cache, when given, as the same series are pushed again and again.
+    """
+    cache = {} if cache is None else cache
+    timestamp = b'\x10' + _varint(timestamp_ms)
+    out = bytearray()
+    for key, value in series:
+        labels = cache.get(key)
+        if labels is None:
+            labels = cache[key] = encode_labels(*key, extra_labels)
+        sample = b'\x09' + (STALE_NAN if value is None else struct.pack('<d', value)) + timestamp
+        out += _field(1, labels + _field(2, sample))
+    return bytes(out)
+
+
+def _path_segment(name: str, value: str) -> str:
+    """Pushgateway grouping key segment, base64 when the value needs it"""
+    if value and '/' not in value:
+        return f"/{name}/{value}"
+    return f"/{name}@base64/{urlsafe_b64encode(value.encode()).decode() or '='}"
+
+
+class Pusher:
+    """Pushes snapshot changes from the event loop"""
+    
+    def __init__(self, url: str = None, push_format: str = None):
+        self.url = (url or config.push_url).rstrip('/')
+        self.format = push_format or config.push_format
+        if self.format not in ('remote_write', 'pushgateway'):
+            raise ValueError(f"unsupported push format {self.format!r}")
+        
+        self.instance = config.push_instance or socket.gethostname()
+        self.queue = deque()
+        self.changed = asyncio.Event()
+        # Series values last queued, and the snapshot version they came from
+        self.sent = {}
+        # Encoded labels of the series in sent
+        self.labels = {}
+        self.version = None
+        self.last_full = None
+        self.retry_at = 0.0
+        self.failures = 0
+    
+    def notify(self):
+        """Signal a snapshot change"""
+        self.changed.set()
+    
+    def _target(self) -> str:
+        if self.format == 'pushgateway':
+            return self.url + '/metrics' + _path_segment('job', config.push_job) + _path_segment('instance', self.instance)
+        return self.url
+    
+    def _full_due(self, now: float) -> bool:
+        if self.format != 'remote_write' or config.push_interval <= 0:
+            return False
+        return self.last_full is None or now - self.last_full >= config.push_interval
+    
+    def _bodies(self, full: bool) -> list:
+        """Request bodies bringing the receiver up to date with the current snapshot"""
+        if self.format == 'pushgateway':
+            return [get_exposition().body]
+        
+        current = snapshot_series(get_snapshot())
+        if full:
+            changes = list(current.items())
+        else:
+            changes = [(key, value) for key, value in current.items() if self.sent.get(key) != value]
+        removed = self.sent.keys() - current.keys()
+        changes += [(key, None) for key in removed]
+        self.sent = current
+        
+        timestamp_ms = int(time.time() * 1000)
+        extra_labels = (('instance', self.instance), ('job', config.push_job))
+        size = config.push_batch_size
+        bodies = [
+            snappy_compress(encode_write_request(changes[i:i + size], timestamp_ms, extra_labels, self.labels))
+            for i in range(0, len(changes), size)
+        ]
+        for key in removed:
+            self.labels.pop(key, None)
+        return bodies
+    
+    def _enqueue(self, bodies: list):
+        if self.format == 'pushgateway':
+            # Each push replaces the whole group, only the latest one matters
+            self.queue.clear()
+        for body in bodies:
+            if len(self.queue) >= config.push_queue_size:
+                self.queue.popleft()
+                logger.warning(f"Push queue full, dropped the oldest request to {self.url}")
+            self.queue.append(body)
+    
+    async def _send(self, session: aiohttp.ClientSession, body: bytes) -> str:
+        """'ok', 'retry' or 'drop'"""
+        remote_write = self.format == 'remote_write'
+        try:
+            async with session.request(
+                'POST' if remote_write else 'PUT', self._target(), data=body,
+                headers=REMOTE_WRITE_HEADERS if remote_write else PUSHGATEWAY_HEADERS
+            ) as resp:
+                if resp.status < 300:
+                    return 'ok'
+                reason = (await resp.text())[:200]
+                if resp.status == 429 or resp.status >= 500:
+                    logger.warning(f"Push to {self.url} failed with {resp.status}, retrying: {reason}")
+                    return 'retry'
+                logger.error(f"Push to {self.url} rejected with {resp.status}, dropped: {reason}")
+                return 'drop'
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Push to {self.url} failed, retrying: {e!r}")
+            return 'retry'
+    
+    async def _flush(self, session: aiohttp.ClientSession):
+        while self.queue:
+            result = await self._send(session, self.queue[0])
+            if result == 'retry':
+                delay = min(PUSH_RETRY_MAX, PUSH_RETRY_MIN * 2 ** self.failures)
+                self.failures += 1
+                # Jitter, so that a fleet does not retry in step
+                self.retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+                return
+            self.queue.popleft()
+            self.failures = 0
+    
+    def _timeout(self, now: float):
+        """Seconds until a full resend or a retry is due, None to wait for a change"""
+        deadlines = []
+        if self.queue:
+            deadlines.append(self.retry_at)
+        if self.format == 'remote_write' and config.push_interval > 0:
+            deadlines.append((self.last_full or now) + config.push_interval)
+        return max(0.0, min(deadlines) - now) if deadlines else None
+    
+    async def run(self):
+        """Push until cancelled"""
+        loop = asyncio.get_running_loop()
+        connector = aiohttp.TCPConnector(limit=2, keepalive_timeout=config.http_keepalive_timeout)
+        timeout = aiohttp.ClientTimeout(total=config.push_timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            logger.info(f"Pushing metrics to {self._target()} ({self.format})")
+            while True:
+                self.changed.clear()
+                now = time.monotonic()
+                full = self._full_due(now)
+                snapshot = get_snapshot()
+                if full or snapshot.version != self.version:
+                    self.version = snapshot.version
+                    if full:
+                        self.last_full = now
+                    # Encoding many sites takes a while, off the event loop
+                    self._enqueue(await loop.run_in_executor(None, self._bodies, full))
+                
+                if self.queue and time.monotonic() >= self.retry_at:
+                    await self._flush(session)
+                
+                try:
+                    await asyncio.wait_for(self.changed.wait(), timeout=self._timeout(time.monotonic()))
+                except asyncio.TimeoutError:
+                    pass
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""
+Recurrence rules for collection schedules
+
+A small RRULE-like engine: weekly series every N weeks, monthly series on
+the nth weekday every N months, exception dates and shifts of occurrences
+falling on public holidays. Rules are compiled once and expanded lazily
+into date iterators, and an OccurrenceQueue keeps the next occurrence of
+every rule in a min-heap.
+"""
+import heapq
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+DAYS_MAP = {
+    'Monday': 0, 'Tuesday': 1, 'Wednesday': 2,
+    'Thursday': 3, 'Friday': 4, 'Saturday': 5, 'Sunday': 6
+}
+FREQUENCIES = ('weekly', 'biweekly', 'monthly')
+HOLIDAY_SHIFTS = ('none', 'next', 'previous', 'skip')
+
+# A Monday, origin of weekly series without a reference date
+_WEEK_ORIGIN = date(1970, 1, 5)
+# Give up looking for the next occurrence this far after the previous one
+SEARCH_HORIZON = timedelta(days=5 * 366)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A compiled recurrence rule"""
+    
+    frequency: str  # 'weekly' or 'monthly'
+    weekday: int
+    interval: int = 1  # every N weeks or months
+    nth: int = None  # monthly: 1 to 5, or -1 for the last weekday of the month
+    reference_date: date = None  # a date of the series, needed when interval > 1
+    exceptions: frozenset = field(default_factory=frozenset)
+    holiday_shift: str = 'none'
+    country_code: str = None
+    subdivision: str = None
+    
+    def _weekly(self, start: date):
+        # First rule weekday on or after the reference date
+        anchor = self.reference_date or _WEEK_ORIGIN
+        anchor += timedelta(days=(self.weekday - anchor.weekday()) % 7)
+        step = 7 * self.interval
+        # First date of the series on or after start
+        day = anchor + timedelta(days=-(-(start - anchor).days // step) * step)
+        while True:
+            yield day
+            day += timedelta(days=step)
+    
+    def _monthly(self, start: date):
+        anchor = self.reference_date or start
+        anchor_month = anchor.year * 12 + anchor.month - 1
+        month = start.year * 12 + start.month - 1
+        month += (anchor_month - month) % self.interval
+        while True:
+            day = nth_weekday(month // 12, month % 12 + 1, self.weekday, self.nth)
+            if day is not None and day >= start:
+                yield day
+            month += self.interval
+    
+    def _shift(self, day: date, is_holiday):
+        if self.holiday_shift == 'none' or is_holiday is None or not is_holiday(day):
+            return day
+        if self.holiday_shift == 'skip':
+            return None
+        step = timedelta(days=1 if self.holiday_shift == 'next' else -1)
+        while is_holiday(day):
+            day += step
+        return day
+    
+    def occurrences(self, start: date, is_holiday=None):
+        """Iterate the occurrences on or after start, in order
+        
+        is_holiday is a date predicate used by holiday shifts.
+        """
+        # Occurrences shifted back from the next week can land after start
+        lookback = timedelta(days=7) if self.holiday_shift == 'previous' else timedelta(0)
+        base = self._monthly if self.frequency == 'monthly' else self._weekly
+        last = start
+        
+        for day in base(start - lookback):
+            # Every date excepted or skipped for too long: no more occurrences
+            if day > last + SEARCH_HORIZON:
+                return
+            if day in self.exceptions:
+                continue
+            day = self._shift(day, is_holiday)
+            if day is not None and day >= start:
+                last = day
+                yield day
+    
+    def next_occurrence(self, start: date, is_holiday=None):
+        """First occurrence on or after start, None when there is none"""
+        return next(self.occurrences(start, is_holiday), None)
+
+
+def nth_weekday(year: int, month: int, weekday: int, nth: int):
+    """Date of the nth weekday of a month (-1 for the last), None if missing"""
+    if nth < 0:
+        last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        return last - timedelta(days=(last.weekday() - weekday) % 7)
+    
+    first = date(year, month, 1)
+    day = first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (nth - 1))
+    return day if day.month == month else None
+
+
+def _to_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value), "%Y-%m-%d").date()
+
+
+def parse_rule(entry: dict) -> Rule:
+    """Compile a schedule entry into a rule, raise ValueError when invalid"""
+    frequency = entry.get('frequency', 'weekly')
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"unsupported frequency {frequency!r}")
+    
+    day_name = entry.get('day', 'Monday')
+    if day_name not in DAYS_MAP:
+        raise ValueError(f"unknown day {day_name!r}")
+    
+    interval = int(entry.get('interval', 2 if frequency == 'biweekly' else 1))
+    if interval < 1:
+        raise ValueError(f"invalid interval {interval}")
+    
+    reference_date = entry.get('reference_date')
+    reference_date = _to_date(reference_date) if reference_date is not None else None
+    if interval > 1 and reference_date is None:
+        raise ValueError(f"reference_date is required every {interval} {frequency}")
+    
+    nth = None
+    if frequency == 'monthly':
+        nth = int(entry.get('nth', 1))
+        if nth not in (-1, 1, 2, 3, 4, 5):
+            raise ValueError(f"invalid nth {nth}")
+    
+    holiday_shift = entry.get('holiday_shift', 'none')
+    if holiday_shift not in HOLIDAY_SHIFTS:
+        raise ValueError(f"invalid holiday_shift {holiday_shift!r}")
+    
+    return Rule(
+        frequency='monthly' if frequency == 'monthly' else 'weekly',
+        weekday=DAYS_MAP[day_name],
+        interval=interval,
+        nth=nth,
+        reference_date=reference_date,
+        exceptions=frozenset(_to_date(day) for day in entry.get('exceptions') or []),
+        holiday_shift=holiday_shift,
+        country_code=entry.get('country_code'),
+        subdivision=entry.get('subdivision')
+    )
+
+
+class OccurrenceQueue:
+    """Next occurrence of many rules, kept in a min-heap
+    
+    Moving to a new day only touches the rules whose occurrence has passed,
+    at O(log n) each.
+    """
+    
+    def __init__(self, rules: dict, start: date, holiday_checker=None):
+        """rules maps keys to Rule, holiday_checker(rule) returns its is_holiday"""
+        self.start = start
+        self._heap = []
+        self._next = {}
+        for key, rule in rules.items():
+            is_holiday = holiday_checker(rule) if holiday_checker else None
+            self._push(key, rule.occurrences(start, is_holiday))
+        heapq.heapify(self._heap)
+    
+    def _push(self, key, iterator, heap: bool = False):
+        day = next(iterator, None)
+        self._next[key] = day
+        if day is not None:
+            entry = (day, key, iterator)
+            if heap:
+                heapq.heappush(self._heap, entry)
+            else:
+                self._heap.append(entry)
+    
+    def advance(self, today: date):
+        """Drop occurrences before today"""
+        while self._heap and self._heap[0][0] < today:
+            _, key, iterator = heapq.heappop(self._heap)
+            self._push(key, iterator, heap=True)
+    
+    def peek(self):
+        """(date, key) of the earliest upcoming occurrence, or None"""
+        if not self._heap:
+            return None
+        day, key, _ = self._heap[0]
+        return day, key
+    
+    def next_date(self, key):
+        """Next occurrence of a rule, None when it has no more"""
+        return self._next.get(key)
+    
+    def items(self):
+        return self._next.items()
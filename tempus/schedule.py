@@ -0,0 +1,139 @@
+"""
+Schedule file loading
+
+The schedule file is parsed and validated once into typed entries shared
+by the trash and birthday trackers. The compiled form is kept until the
+file changes (inode, mtime or size) or a reload is requested.
+"""
+import os
+import threading
+from dataclasses import dataclass, field, replace
+from datetime import date
+import yaml
+from loguru import logger
+from tempus.recurrence import Rule, parse_rule
+
+
+@dataclass(frozen=True)
+class TrashEntry:
+    """A trash collection schedule"""
+    
+    type: str
+    rule: Rule
+
+
+@dataclass(frozen=True)
+class BirthdayEntry:
+    """A yearly event on a month and day"""
+    
+    name: str
+    month: int
+    day: int
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """Compiled schedule file, never mutated once published"""
+    
+    trash: dict = field(default_factory=dict)
+    birthdays: tuple = ()
+    # (inode, mtime_ns, size) of the file it was compiled from
+    signature: tuple = None
+
+
+_schedules = {}
+_lock = threading.Lock()
+
+
+def parse_trash_entry(trash_type: str, entry: dict) -> TrashEntry:
+    """Validate a `trash` entry of the schedule file"""
+    return TrashEntry(type=str(trash_type), rule=parse_rule(entry))
+
+
+def parse_birthday_entry(entry: dict) -> BirthdayEntry:
+    """Validate a `birthdays` entry of the schedule file (date as MM-DD)"""
+    name = entry.get('name')
+    if not name:
+        raise ValueError("missing name")
+    
+    month, day = map(int, str(entry['date']).split('-'))
+    # Leap year, so that 02-29 is accepted
+    date(2000, month, day)
+    
+    return BirthdayEntry(name=str(name), month=month, day=day)
+
+
+def compile_schedule(data: dict, signature: tuple = None) -> Schedule:
+    """Build a schedule from parsed YAML, skipping invalid entries"""
+    trash = {}
+    for trash_type, entry in (data.get('trash') or {}).items():
+        try:
+            trash[str(trash_type)] = parse_trash_entry(trash_type, entry)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid trash entry {trash_type}: {e}")
+    
+    birthdays = []
+    for entry in data.get('birthdays') or []:
+        try:
+            birthdays.append(parse_birthday_entry(entry))
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid birthday entry {entry}: {e}")
+    
+    return Schedule(trash=trash, birthdays=tuple(birthdays), signature=signature)
+
+
+def _file_signature(path: str) -> tuple:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def get_schedule(path: str) -> Schedule:
+    """Return the compiled schedule of a file, recompiled only when it changed"""
+    signature = _file_signature(path)
+    current = _schedules.get(path)
+    if current is not None and current.signature == signature:
+        return current
+    
+    with _lock:
+        # Another thread may have reloaded it meanwhile
+        current = _schedules.get(path)
+        if current is not None and current.signature == signature:
+            return current
+        
+        if signature is None:
+            logger.warning(f"Schedule file {path} not found")
+            schedule = Schedule()
+        else:
+            try:
+                with open(path, 'r') as f:
+                    data = yaml.safe_load(f) or {}
+                schedule = compile_schedule(data, signature)
+                logger.info(
+                    f"Loaded schedule {path}: {len(schedule.trash)} trash, "
+                    f"{len(schedule.birthdays)} birthdays"
+                )
+            except Exception as e:
+                # Keep serving the last good version until the file changes again
+                logger.error(f"Error loading schedule {path}: {e}")
+                schedule = replace(current or Schedule(), signature=signature)
+        
+        _schedules[path] = schedule
+        return schedule
+
+
+def invalidate_schedule(path: str = None):
+    """Force the next get_schedule to re-read a file (every file when None)"""
+    with _lock:
+        if path is None:
+            _schedules.clear()
+        else:
+            _schedules.pop(path, None)
+
+
+def reload_schedule(path: str) -> bool:
+    """Recompile the schedule if its file changed, return whether it did"""
+    previous = _schedules.get(path)
+    return get_schedule(path) is not previous
@@ -0,0 +1,120 @@
+"""
+Event-driven update scheduler
+
+Each job declares the next instant its output changes (local midnight, a DST
+transition, a sunrise...). Deadlines are kept in a heap and the loop sleeps
+exactly until the earliest one.
+"""
+import asyncio
+import heapq
+import itertools
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+from typing import Callable
+from loguru import logger
+import pytz
+
+# Never reschedule a job closer than this, protects against a next_change
+# returning an instant that is already past
+MIN_INTERVAL = timedelta(seconds=1)
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def next_local_midnight(tz_name: str, now: datetime) -> datetime:
+    """Return the next 00:00 local time in tz_name after now, as UTC"""
+    tz = pytz.timezone(tz_name)
+    tomorrow = now.astimezone(tz).date() + timedelta(days=1)
+    # is_dst=False resolves zones where midnight falls in a DST gap
+    midnight = tz.localize(datetime.combine(tomorrow, time()), is_dst=False)
+    return midnight.astimezone(timezone.utc)
+
+
+def next_midnight(timezones, now: datetime) -> datetime:
+    """Return the earliest next local midnight among timezones"""
+    return min(next_local_midnight(tz_name, now) for tz_name in set(timezones))
+
+
+@dataclass
+class Job:
+    """An update function and the callable declaring its next change"""
+
+    name: str
+    run: Callable
+    next_change: Callable
+    deadline: datetime = None
+
+
+class Scheduler:
+    """Min-heap of job deadlines"""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+
+    def add(self, name: str, run: Callable, next_change: Callable, now: datetime = None):
+        """Register a job, next_change(now) returns the next aware instant it must run"""
+        self._push(Job(name, run, next_change), now or utc_now())
+
+    def _push(self, job: Job, now: datetime):
+        try:
+            deadline = job.next_change(now)
+        except Exception as e:
+            logger.error(f"Error computing next change for {job.name}: {e}")
+            deadline = None
+
+        if deadline is None:
+            deadline = next_local_midnight('UTC', now)
+        job.deadline = max(deadline.astimezone(timezone.utc), now + MIN_INTERVAL)
+        heapq.heappush(self._heap, (job.deadline, next(self._counter), job))
+        logger.debug(f"Next {job.name} update at {job.deadline.isoformat()}")
+
+    def next_deadline(self) -> datetime:
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> list:
+        """Remove and return every job whose deadline is reached"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def reschedule(self, jobs: list, now: datetime):
+        for job in jobs:
+            self._push(job, now)
+
+    async def run(self, shutdown: asyncio.Event, run_jobs: Callable = None):
+        """Sleep until the earliest deadline, run due jobs, repeat until shutdown
+
+        run_jobs(jobs) may be given to customize how a batch of due jobs is
+        executed, it can be a coroutine function.
+        """
+        while not shutdown.is_set() and self._heap:
+            delay = (self.next_deadline() - utc_now()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(shutdown.wait(), timeout=delay)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                # Timers may fire a little early, go back to sleep for the rest
+                continue
+
+            now = utc_now()
+            jobs = self.pop_due(now)
+            logger.info(f"Running updates: {', '.join(job.name for job in jobs)}")
+
+            if run_jobs is None:
+                for job in jobs:
+                    try:
+                        job.run()
+                    except Exception as e:
+                        logger.error(f"Error in {job.name} update: {e}")
+            else:
+                result = run_jobs(jobs)
+                if asyncio.iscoroutine(result):
+                    await result
+
+            self.reschedule(jobs, utc_now())
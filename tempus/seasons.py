@@ -1,9 +1,16 @@
 """
 Seasonal metrics and calculations
 """
-from datetime import datetime
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from loguru import logger
-from tempus.config import config
+import numpy as np
+import pytz
+from tempus.ephemeris import delta_t
+from tempus.scheduler import next_midnight
+from tempus.sites import Site, get_sites, map_sites
+from tempus.tzindex import get_transition_index
 from tempus.metrics import (
     season_id,
     season_progress_percent,
@@ -11,151 +18,204 @@ from tempus.metrics import (
     days_until_summer,
     days_until_fall,
     days_until_winter,
-    current_context
+    Samples,
+    publish,
+    update_site_context
 )
 
 
+# Equinoxes and solstices in calendar order, with the season each one starts
+SEASON_EVENTS = ('march_equinox', 'june_solstice', 'september_equinox', 'december_solstice')
+HEMISPHERE_SEASONS = {
+    'north': ('spring', 'summer', 'fall', 'winter'),
+    'south': ('fall', 'winter', 'spring', 'summer'),
+}
+
+# Years covered by the precomputed table
+TABLE_FIRST_YEAR = 1900
+TABLE_LAST_YEAR = 2200
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=timezone.utc)
+
+# Meeus, Astronomical Algorithms, table 27.A/B: mean instants (JDE) for
+# years 1000-3000, as polynomials of Y = (year - 2000) / 1000
+_MEAN_EVENT_TERMS = np.array([
+    [2451623.80984, 365242.37404, 0.05169, -0.00411, -0.00057],
+    [2451716.56767, 365241.62603, 0.00325, 0.00888, -0.00030],
+    [2451810.21715, 365242.01767, -0.11575, 0.00337, 0.00078],
+    [2451900.05952, 365242.74049, -0.06223, -0.00823, 0.00032],
+])
+
+# Meeus table 27.C: periodic terms A, B (degrees), C (degrees per century)
+_PERIODIC_TERMS = np.array([
+    [485, 324.96, 1934.136], [203, 337.23, 32964.467], [199, 342.08, 20.186],
+    [182, 27.85, 445267.112], [156, 73.14, 45036.886], [136, 171.52, 22518.443],
+    [77, 222.54, 65928.934], [74, 296.72, 3034.906], [70, 243.58, 9037.513],
+    [58, 119.81, 33718.147], [52, 297.17, 150.678], [50, 21.02, 2281.226],
+    [45, 247.54, 29929.562], [44, 325.15, 31555.956], [29, 60.93, 4443.417],
+    [18, 155.12, 67555.328], [17, 288.79, 4562.452], [16, 198.04, 62894.029],
+    [14, 199.76, 31436.921], [12, 95.39, 14577.848], [12, 287.11, 31931.756],
+    [12, 320.81, 34777.259], [9, 227.73, 1222.114], [8, 15.45, 16859.074],
+])
+
+
+def compute_season_events(years: np.ndarray) -> np.ndarray:
+    """UTC epoch seconds of the 4 equinoxes/solstices of each year, shape (years, 4)"""
+    years = np.asarray(years, dtype=np.float64)
+    y = ((years - 2000) / 1000)[:, None]
+    jde0 = sum(_MEAN_EVENT_TERMS[:, k] * y ** k for k in range(5))
+    
+    t = (jde0 - 2451545.0) / 36525
+    w = np.radians(35999.373 * t - 2.47)
+    delta_lambda = 1 + 0.0334 * np.cos(w) + 0.0007 * np.cos(2 * w)
+    a, b, c = _PERIODIC_TERMS.T
+    s = (a * np.cos(np.radians(b + c * t[..., None]))).sum(axis=-1)
+    jde = jde0 + 0.00001 * s / delta_lambda
+    
+    # Dynamical time to universal time, then to unix time
+    return (jde - 2440587.5) * 86400.0 - delta_t(years)[:, None]
+
+
+@lru_cache(maxsize=None)
+def season_table() -> tuple:
+    """Sorted (instants, event kinds) for TABLE_FIRST_YEAR to TABLE_LAST_YEAR
+    
+    Kinds index SEASON_EVENTS. Plain lists make scalar bisect lookups cheap.
+    """
+    events = compute_season_events(np.arange(TABLE_FIRST_YEAR, TABLE_LAST_YEAR + 1))
+    kinds = np.broadcast_to(np.arange(len(SEASON_EVENTS)), events.shape)
+    return events.ravel().tolist(), kinds.ravel().tolist()
+
+
+def _timestamp(date: datetime) -> float:
+    """Epoch seconds of date, naive datetimes are taken as UTC"""
+    if date.tzinfo is None:
+        return (date - _EPOCH).total_seconds()
+    return date.timestamp()
+
+
+def _local_day(ts: float, tzinfo) -> int:
+    """Days since epoch of the local calendar date of ts in tzinfo"""
+    if tzinfo is None:
+        offset = 0
+    elif getattr(tzinfo, 'zone', None):
+        offset = get_transition_index(tzinfo.zone).offset_at(ts)
+    else:
+        offset = tzinfo.utcoffset(_EPOCH_UTC + timedelta(seconds=ts)).total_seconds()
+    return int((ts + offset) // 86400)
+
+
+def _bisect_table(ts: float) -> tuple:
+    instants, kinds = season_table()
+    i = bisect_right(instants, ts)
+    if i == 0 or i >= len(instants) - 4:
+        raise ValueError(f"Date outside of the season table ({TABLE_FIRST_YEAR}-{TABLE_LAST_YEAR})")
+    return instants, kinds, i
+
+
 def get_season_info(date: datetime, hemisphere: str = 'north') -> tuple:
     """Get season name, progress, and days until next event
     
+    Seasons start at the astronomical equinox and solstice instants.
+    
     Args:
-        date: Current date
+        date: Current date (naive datetimes are taken as UTC)
         hemisphere: 'north' or 'south'
     """
-    month = date.month
-    day = date.day
+    ts = _timestamp(date)
+    instants, kinds, i = _bisect_table(ts)
+    start, end = instants[i - 1], instants[i]
     
-    # Season boundaries for Northern hemisphere
-    if hemisphere == 'north':
-        if (month == 3 and day >= 20) or (month > 3 and month < 6) or (month == 6 and day < 21):
-            current_season = 'spring'
-            season_start = datetime(date.year, 3, 20)
-            season_end = datetime(date.year, 6, 21)
-        elif (month == 6 and day >= 21) or (month > 6 and month < 9) or (month == 9 and day < 22):
-            current_season = 'summer'
-            season_start = datetime(date.year, 6, 21)
-            season_end = datetime(date.year, 9, 22)
-        elif (month == 9 and day >= 22) or (month > 9 and month < 12) or (month == 12 and day < 21):
-            current_season = 'fall'
-            season_start = datetime(date.year, 9, 22)
-            season_end = datetime(date.year, 12, 21)
-        else:
-            current_season = 'winter'
-            if month == 12:
-                season_start = datetime(date.year, 12, 21)
-                season_end = datetime(date.year + 1, 3, 20)
-            else:
-                season_start = datetime(date.year - 1, 12, 21)
-                season_end = datetime(date.year, 3, 20)
-    else:  # Southern hemisphere - seasons are reversed
-        if (month == 9 and day >= 22) or (month > 9 and month < 12) or (month == 12 and day < 21):
-            current_season = 'spring'
-            season_start = datetime(date.year, 9, 22)
-            season_end = datetime(date.year, 12, 21)
-        elif (month == 12 and day >= 21) or (month > 12) or (month < 3) or (month == 3 and day < 20):
-            current_season = 'summer'
-            if month == 12:
-                season_start = datetime(date.year, 12, 21)
-                season_end = datetime(date.year + 1, 3, 20)
-            else:
-                season_start = datetime(date.year - 1, 12, 21)
-                season_end = datetime(date.year, 3, 20)
-        elif (month == 3 and day >= 20) or (month > 3 and month < 6) or (month == 6 and day < 21):
-            current_season = 'fall'
-            season_start = datetime(date.year, 3, 20)
-            season_end = datetime(date.year, 6, 21)
-        else:
-            current_season = 'winter'
-            season_start = datetime(date.year, 6, 21)
-            season_end = datetime(date.year, 9, 22)
-    
-    # Calculate progress
-    total_days = (season_end - season_start).days
-    elapsed_days = (date - season_start).days
-    progress = min(100, max(0, (elapsed_days / total_days) * 100))
-    days_to_next = (season_end - date).days
+    current_season = HEMISPHERE_SEASONS[hemisphere][kinds[i - 1]]
+    progress = min(100, max(0, (ts - start) / (end - start) * 100))
+    days_to_next = _local_day(end, date.tzinfo) - _local_day(ts, date.tzinfo)
     
     return current_season, progress, max(0, days_to_next)
 
 
-def get_days_until_seasons(date: datetime) -> dict:
+def get_days_until_seasons(date: datetime, hemisphere: str = 'north') -> dict:
     """Calculate days until each season start
     
     Args:
-        date: Current date
+        date: Current date (naive datetimes are taken as UTC)
+        hemisphere: 'north' or 'south'
         
     Returns:
         Dictionary with days until each season
     """
-    year = date.year
-    
-    # Season start dates (Northern hemisphere dates - used as reference)
-    spring_start = datetime(year, 3, 20)
-    summer_start = datetime(year, 6, 21)
-    fall_start = datetime(year, 9, 22)
-    winter_start = datetime(year, 12, 21)
+    ts = _timestamp(date)
+    instants, kinds, i = _bisect_table(ts)
+    today = _local_day(ts, date.tzinfo)
+    seasons = HEMISPHERE_SEASONS[hemisphere]
     
-    # Calculate days until each season
-    days_to_spring = (spring_start - date).days
-    days_to_summer = (summer_start - date).days
-    days_to_fall = (fall_start - date).days
-    days_to_winter = (winter_start - date).days
+    return {
+        seasons[kinds[j]]: _local_day(instants[j], date.tzinfo) - today
+        for j in range(i, i + 4)
+    }
+
+
+def next_season_event(now: datetime) -> datetime:
+    """UTC instant of the next equinox or solstice"""
+    instants, _, i = _bisect_table(now.timestamp())
+    return _EPOCH_UTC + timedelta(seconds=instants[i])
+
+
+def compute_season(site: Site, now: datetime = None) -> dict:
+    """Compute the season context of a site at an instant (default now)"""
+    tz = pytz.timezone(site.timezone)
+    now = datetime.now(tz) if now is None else now.astimezone(tz)
+    season_name, progress, days_to_event = get_season_info(now, site.hemisphere)
+    days_until_seasons = get_days_until_seasons(now, site.hemisphere)
     
-    # If a season has passed this year, calculate for next year
-    if days_to_spring < 0:
-        days_to_spring = (datetime(year + 1, 3, 20) - date).days
-    if days_to_summer < 0:
-        days_to_summer = (datetime(year + 1, 6, 21) - date).days
-    if days_to_fall < 0:
-        days_to_fall = (datetime(year + 1, 9, 22) - date).days
-    if days_to_winter < 0:
-        days_to_winter = (datetime(year + 1, 12, 21) - date).days
+    logger.debug(
+        f"Season [{site.name}] ({site.hemisphere}): {season_name} at {progress:.1f}%, "
+        f"spring:{days_until_seasons['spring']}d, summer:{days_until_seasons['summer']}d, "
+        f"fall:{days_until_seasons['fall']}d, winter:{days_until_seasons['winter']}d"
+    )
     
     return {
-        'spring': days_to_spring,
-        'summer': days_to_summer,
-        'fall': days_to_fall,
-        'winter': days_to_winter
+        'name': season_name,
+        'progress': round(progress, 1),
+        'days_until_spring': days_until_seasons['spring'],
+        'days_until_summer': days_until_seasons['summer'],
+        'days_until_fall': days_until_seasons['fall'],
+        'days_until_winter': days_until_seasons['winter'],
+        'hemisphere': site.hemisphere
     }
 
 
-def update_season_metrics():
-    """Update seasonal metrics"""
-    try:
-        now = datetime.now()
-        season_name, progress, days_to_event = get_season_info(now, config.hemisphere)
-        
-        # Reset all season indicators
-        for season in ['winter', 'spring', 'summer', 'fall']:
-            season_id.labels(season=season).set(0)
+def season_samples(sites: list, results: list) -> Samples:
+    """Metric values of compute_season results"""
+    samples = Samples()
+    for site, season in zip(sites, results):
+        if season is None:
+            continue
         
-        # Set current season
-        season_id.labels(season=season_name).set(1)
-        season_progress_percent.set(progress)
+        # One indicator per season, 1 for the current one
+        for name in ['winter', 'spring', 'summer', 'fall']:
+            samples.set(season_id, 1 if name == season['name'] else 0, site=site.name, season=name)
         
-        # Calculate and set days until each season
-        days_until_seasons = get_days_until_seasons(now)
-        days_until_spring.set(days_until_seasons['spring'])
-        days_until_summer.set(days_until_seasons['summer'])
-        days_until_fall.set(days_until_seasons['fall'])
-        days_until_winter.set(days_until_seasons['winter'])
-        
-        # Update context for JSON API
-        current_context['season'] = {
-            'name': season_name,
-            'progress': round(progress, 1),
-            'days_until_spring': days_until_seasons['spring'],
-            'days_until_summer': days_until_seasons['summer'],
-            'days_until_fall': days_until_seasons['fall'],
-            'days_until_winter': days_until_seasons['winter'],
-            'hemisphere': config.hemisphere
-        }
-        
-        logger.debug(
-            f"Season metrics updated ({config.hemisphere}): {season_name} at {progress:.1f}%, "
-            f"spring:{days_until_seasons['spring']}d, summer:{days_until_seasons['summer']}d, "
-            f"fall:{days_until_seasons['fall']}d, winter:{days_until_seasons['winter']}d"
-        )
-        
-    except Exception as e:
-        logger.error(f"Error updating season metrics: {e}")
\ No newline at end of file
+        samples.set(season_progress_percent, season['progress'], site=site.name)
+        samples.set(days_until_spring, season['days_until_spring'], site=site.name)
+        samples.set(days_until_summer, season['days_until_summer'], site=site.name)
+        samples.set(days_until_fall, season['days_until_fall'], site=site.name)
+        samples.set(days_until_winter, season['days_until_winter'], site=site.name)
+    return samples
+
+
+def update_season_metrics(sites: list = None):
+    """Update seasonal metrics"""
+    sites = get_sites() if sites is None else sites
+    results = map_sites(compute_season, sites)
+    
+    publish('season', season_samples(sites, results))
+    
+    # Update context for JSON API
+    update_site_context('season', sites, results)
+
+
+def next_season_change(now: datetime, sites: list = None) -> datetime:
+    """Season values change at local midnight and at equinoxes and solstices"""
+    sites = get_sites() if sites is None else sites
+    return min(next_midnight([site.timezone for site in sites], now), next_season_event(now))
@@ -0,0 +1,175 @@
+"""
+Site definitions for multi-site mode
+"""
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from loguru import logger
+from tempus.config import config
+
+
+@dataclass(frozen=True)
+class Site:
+    """A location served by the exporter"""
+    
+    name: str
+    latitude: float
+    longitude: float
+    timezone: str
+    country_code: str
+    hemisphere: str
+    subdivision: str = None
+
+
+_sites = None
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def default_site() -> Site:
+    """Build the single site described by the environment configuration"""
+    return Site(
+        name=config.site,
+        latitude=config.latitude,
+        longitude=config.longitude,
+        timezone=config.timezone,
+        country_code=config.country_code,
+        hemisphere=config.hemisphere,
+        subdivision=config.subdivision
+    )
+
+
+def parse_site(entry: dict) -> Site:
+    """Build a site from a sites file entry, falling back to config defaults"""
+    latitude = float(entry.get('latitude', config.latitude))
+    hemisphere = entry.get('hemisphere') or ('north' if latitude >= 0 else 'south')
+    
+    return Site(
+        name=str(entry['name']),
+        latitude=latitude,
+        longitude=float(entry.get('longitude', config.longitude)),
+        timezone=entry.get('timezone', config.timezone),
+        country_code=entry.get('country_code', config.country_code),
+        hemisphere=hemisphere.lower(),
+        subdivision=entry.get('subdivision', config.subdivision)
+    )
+
+
+def load_sites(path: str = None) -> list:
+    """Load sites from YAML file, or the default site when no file is set"""
+    path = config.sites_file if path is None else path
+    if not path:
+        return [default_site()]
+    
+    if not os.path.exists(path):
+        logger.warning(f"Sites file {path} not found, using default site")
+        return [default_site()]
+    
+    # Only needed with a sites file
+    import yaml
+    with open(path, 'r') as f:
+        data = yaml.safe_load(f) or {}
+    
+    sites = []
+    names = set()
+    for entry in data.get('sites', []):
+        try:
+            site = parse_site(entry)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid site entry {entry}: {e}")
+            continue
+        
+        if site.name in names:
+            logger.error(f"Duplicate site name {site.name}, ignoring")
+            continue
+        
+        names.add(site.name)
+        sites.append(site)
+    
+    if not sites:
+        logger.warning(f"No valid site in {path}, using default site")
+        return [default_site()]
+    
+    return sites
+
+
+def get_sites() -> list:
+    """Return the configured sites, loaded once"""
+    global _sites
+    if _sites is None:
+        _sites = load_sites()
+        logger.info(f"Serving {len(_sites)} site(s)")
+    return _sites
+
+
+def _log_level():
+    """Lowest level logged by this process, None when nothing is"""
+    # Loguru has no public accessor for the level of its handlers
+    level = logger._core.min_level
+    return level if isinstance(level, int) else None
+
+
+def _init_worker(settings: dict, log_level: int):
+    # Workers do not inherit the config changes made after startup, nor
+    # the log handlers
+    for name, value in settings.items():
+        setattr(config, name, value)
+    logger.remove()
+    if log_level is not None:
+        logger.add(sys.stderr, level=log_level)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    # Updaters run concurrently, only one of them may create the pool
+    with _pool_lock:
+        if _pool is None:
+            # The pool is created from updater threads: a forked worker could
+            # inherit a lock held by another thread (logging, publish) and
+            # never get it released, so workers start from a clean process
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(
+                max_workers=config.site_workers or None,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(vars(config), _log_level())
+            )
+        return _pool
+
+
+def _call_for_site(func, site: Site):
+    """Run func for one site, a failing site yields None"""
+    try:
+        return func(site)
+    except Exception as e:
+        logger.error(f"Error computing {func.__name__} for site {site.name}: {e}")
+        return None
+
+
+def map_sites(func, sites: list) -> list:
+    """Apply func to every site, sharded over a process pool for large site lists
+    
+    Results are returned in the same order as sites, with None for sites
+    that failed. func must be a module level function so it can be sent to
+    the worker processes.
+    """
+    call = partial(_call_for_site, func)
+    if len(sites) < config.site_shard_threshold:
+        return [call(site) for site in sites]
+    
+    workers = config.site_workers or os.cpu_count() or 1
+    chunksize = max(1, len(sites) // (workers * 4))
+    return list(_get_pool().map(call, sites, chunksize=chunksize))
+
+
+def shutdown_pool():
+    """Stop the site worker processes"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
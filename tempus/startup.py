@@ -0,0 +1,85 @@
+"""
+Startup profiling
+
+`python -m tempus --profile-startup` imports the dependencies and modules of
+the exporter one by one, then runs each startup step once (sites, schedule,
+snapshot, every updater, first /metrics and /context bodies) and prints how
+long each one took. Only the standard library is imported here, so that
+the import times include everything the exporter loads.
+"""
+import importlib
+import sys
+import time
+
+# Third-party dependencies, then the package modules, in dependency order:
+# each import only costs what the previous ones did not load
+DEPENDENCIES = ('loguru', 'dotenv', 'pytz', 'numpy', 'yaml', 'prometheus_client', 'holidays', 'aiohttp.web')
+MODULES = (
+    'tempus.config', 'tempus.metrics', 'tempus.sites', 'tempus.schedule',
+    'tempus.sun', 'tempus.seasons', 'tempus.holidays', 'tempus.trash',
+    'tempus.moon', 'tempus.clock', 'tempus.birthdays', 'tempus.persist',
+    'tempus.api', 'tempus.monitor'
+)
+
+
+def _timed(steps: list, name: str, func, *args):
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+        error = None
+    except Exception as e:
+        result = None
+        error = f"{type(e).__name__}: {e}"
+    steps.append((name, time.perf_counter() - start, error))
+    return result
+
+
+def profile_startup() -> list:
+    """(step, seconds, error or None) of every import and startup step"""
+    steps = []
+    for name in DEPENDENCIES + MODULES:
+        already = name in sys.modules
+        _timed(steps, f"import {name}" + (" (loaded)" if already else ""), importlib.import_module, name)
+    
+    from loguru import logger
+    from tempus.api import ContextCache
+    from tempus.config import config
+    from tempus.metrics import get_exposition
+    from tempus.monitor import UPDATERS
+    from tempus.persist import restore_snapshot
+    from tempus.schedule import get_schedule
+    from tempus.sites import get_sites, shutdown_pool
+    
+    # Per-update debug logs would be measured too
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    
+    try:
+        _timed(steps, "load sites", get_sites)
+        _timed(steps, "load schedule", get_schedule, config.schedule_file)
+        if config.snapshot_max_age > 0:
+            _timed(steps, "restore snapshot", restore_snapshot)
+        for name, (update, _) in UPDATERS.items():
+            _timed(steps, f"update {name}", update)
+        _timed(steps, "render /metrics", get_exposition)
+        _timed(steps, "render /context", ContextCache().get)
+    finally:
+        shutdown_pool()
+    return steps
+
+
+def print_profile(steps: list, out=sys.stdout):
+    """Breakdown table of profile_startup() steps, slowest first within each part"""
+    imports = [step for step in steps if step[0].startswith('import ')]
+    startup = [step for step in steps if not step[0].startswith('import ')]
+    
+    width = max(len(name) for name, _, _ in steps)
+    for title, part in (("Imports", imports), ("Startup", startup)):
+        total = sum(seconds for _, seconds, _ in part)
+        out.write(f"{title:<{width + 2}} {total * 1000:>9.1f} ms\n")
+        for name, seconds, error in sorted(part, key=lambda step: -step[1]):
+            line = f"  {name:<{width}} {seconds * 1000:>9.1f} ms"
+            out.write(line + (f"  {error}" if error else "") + "\n")
+    
+    total = sum(seconds for _, seconds, _ in steps)
+    out.write(f"{'Total':<{width + 2}} {total * 1000:>9.1f} ms\n")
\ No newline at end of file
@@ -1,76 +1,190 @@
 """
 Solar calculations and metrics
+
+Sun times only change with the local date, so the sun section is updated
+at local midnights. sun_is_up flips at every sunrise and sunset of every
+site: it is a section of its own, where each deadline only recomputes the
+sites whose sunrise or sunset was reached.
 """
-from datetime import datetime, timedelta
-from astral import LocationInfo
-from astral.sun import sun
+from datetime import datetime, timedelta, timezone
 from loguru import logger
 import pytz
-from tempus.config import config
+from tempus.ephemeris import sun_times
+from tempus.scheduler import next_local_midnight, next_midnight
+from tempus.sites import Site, get_sites, map_sites
 from tempus.metrics import (
     sun_sunrise_minutes,
     sun_sunset_minutes,
     sun_day_length_minutes,
     sun_day_gain_minutes,
     sun_is_growing_day,
-    current_context
+    sun_is_up,
+    set_context,
+    Samples,
+    publish,
+    update_site_context
 )
 
-def update_sun_metrics():
-    """Update all solar metrics"""
-    try:
-        # Get timezone
-        tz = pytz.timezone(config.timezone)
-        now = datetime.now(tz)
-        
-        location = LocationInfo(
-            name="Location",
-            region="Region",
-            timezone=config.timezone,
-            latitude=config.latitude,
-            longitude=config.longitude
-        )
-        
-        # Calculate sun times - astral handles timezone correctly via LocationInfo
-        today_sun = sun(location.observer, date=now.date(), tzinfo=location.timezone)
-        yesterday_sun = sun(location.observer, date=(now - timedelta(days=1)).date(), tzinfo=location.timezone)
-        
-        sunrise_local = today_sun['sunrise']
-        sunset_local = today_sun['sunset']
-        yesterday_sunrise = yesterday_sun['sunrise']
-        yesterday_sunset = yesterday_sun['sunset']
-        
-        sunrise_minutes = sunrise_local.hour * 60 + sunrise_local.minute
-        sunset_minutes = sunset_local.hour * 60 + sunset_local.minute
-        day_length = sunset_minutes - sunrise_minutes
-        
-        yesterday_length = (
-            (yesterday_sunset.hour * 60 + yesterday_sunset.minute) -
-            (yesterday_sunrise.hour * 60 + yesterday_sunrise.minute)
-        )
-        
-        day_gain = day_length - yesterday_length
-        is_growing = 1 if day_gain > 0 else 0
-
-        sun_sunrise_minutes.set(sunrise_minutes)
-        sun_sunset_minutes.set(sunset_minutes)
-        sun_day_length_minutes.set(day_length)
-        sun_day_gain_minutes.set(day_gain)
-        sun_is_growing_day.set(is_growing)
-
-        # Update context for JSON API
-        current_context['timestamp'] = now.isoformat()
-        current_context['sun'] = {
+def compute_sun(site: Site, now: datetime = None) -> dict:
+    """Compute the solar values of a site at an instant (default now)"""
+    tz = pytz.timezone(site.timezone)
+    now = datetime.now(tz) if now is None else now.astimezone(tz)
+    
+    # Sun times come from the precomputed yearly ephemeris table
+    location = (site.latitude, site.longitude, site.timezone)
+    today_sun = sun_times(*location, now.date())
+    yesterday_sun = sun_times(*location, (now - timedelta(days=1)).date())
+    
+    if None in (today_sun['sunrise'], today_sun['sunset'],
+                yesterday_sun['sunrise'], yesterday_sun['sunset']):
+        raise ValueError("Sun does not rise or set at this location on this day")
+    
+    sunrise_local = today_sun['sunrise']
+    sunset_local = today_sun['sunset']
+    yesterday_sunrise = yesterday_sun['sunrise']
+    yesterday_sunset = yesterday_sun['sunset']
+    
+    sunrise_minutes = sunrise_local.hour * 60 + sunrise_local.minute
+    sunset_minutes = sunset_local.hour * 60 + sunset_local.minute
+    day_length = sunset_minutes - sunrise_minutes
+    
+    yesterday_length = (
+        (yesterday_sunset.hour * 60 + yesterday_sunset.minute) -
+        (yesterday_sunrise.hour * 60 + yesterday_sunrise.minute)
+    )
+    
+    day_gain = day_length - yesterday_length
+    
+    logger.debug(
+        f"Sun [{site.name}]: rise={sunrise_local.strftime('%H:%M')} "
+        f"set={sunset_local.strftime('%H:%M')} "
+        f"length={day_length}min change={day_gain:+d}min"
+    )
+    
+    return {
+        'timestamp': now.isoformat(),
+        'sunrise_minutes': sunrise_minutes,
+        'sunset_minutes': sunset_minutes,
+        'day_length': day_length,
+        'day_gain': day_gain,
+        'is_growing': 1 if day_gain > 0 else 0,
+        'is_up': 1 if sunrise_local <= now < sunset_local else 0,
+        'context': {
             'sunrise': sunrise_local.strftime('%H:%M'),
             'sunset': sunset_local.strftime('%H:%M'),
             'day_length': f"{day_length // 60}h{day_length % 60:02d}m",
             'daily_change': f"{'+' if day_gain >= 0 else ''}{day_gain}min",
         }
+    }
+
+# Site name to (is_up or None when the sun does not rise or set, next flip)
+_sun_up = {}
+
+def sun_samples(sites: list, results: list, is_up: bool = True) -> Samples:
+    """Metric values of compute_sun results, sun_is_up included when is_up"""
+    samples = Samples()
+    for site, result in zip(sites, results):
+        if result is None:
+            continue
+        samples.set(sun_sunrise_minutes, result['sunrise_minutes'], site=site.name)
+        samples.set(sun_sunset_minutes, result['sunset_minutes'], site=site.name)
+        samples.set(sun_day_length_minutes, result['day_length'], site=site.name)
+        samples.set(sun_day_gain_minutes, result['day_gain'], site=site.name)
+        samples.set(sun_is_growing_day, result['is_growing'], site=site.name)
+        if is_up:
+            samples.set(sun_is_up, result['is_up'], site=site.name)
+    return samples
+
+def update_sun_metrics(sites: list = None):
+    """Update all solar metrics"""
+    sites = get_sites() if sites is None else sites
+    results = map_sites(compute_sun, sites)
+    
+    publish('sun', sun_samples(sites, results, is_up=False))
+    
+    # Update context for JSON API
+    if results and results[0] is not None:
+        set_context('timestamp', results[0]['timestamp'])
+    update_site_context('sun', sites, [r and r['context'] for r in results])
+
+def next_sun_day(now: datetime, sites: list = None) -> datetime:
+    """Next instant the sun times change: a local midnight"""
+    sites = get_sites() if sites is None else sites
+    return next_midnight([site.timezone for site in sites], now)
+
+def _sun_up_at(site: Site, now: datetime) -> tuple:
+    """(is_up or None, next instant it flips) of a site"""
+    tz = pytz.timezone(site.timezone)
+    local_date = now.astimezone(tz).date()
+    location = (site.latitude, site.longitude, site.timezone)
+    today = sun_times(*location, local_date)
+    if today['sunrise'] is None or today['sunset'] is None:
+        # Polar day or night, checked again on the next local day
+        return None, next_local_midnight(site.timezone, now)
+    
+    is_up = 1 if today['sunrise'] <= now < today['sunset'] else 0
+    for event in ('sunrise', 'sunset'):
+        if today[event] > now:
+            return is_up, today[event].astimezone(timezone.utc)
+    
+    tomorrow = sun_times(*location, local_date + timedelta(days=1))
+    if tomorrow['sunrise'] is None:
+        return is_up, next_local_midnight(site.timezone, now)
+    return is_up, tomorrow['sunrise'].astimezone(timezone.utc)
+
+def _refresh_sun_up(sites: list, now: datetime) -> bool:
+    """Recompute the sites whose flip is reached, return whether a value changed"""
+    changed = len(_sun_up) != len(sites)
+    current = {}
+    for site in sites:
+        state = _sun_up.get(site.name)
+        if state is None or state[1] <= now:
+            try:
+                new_state = _sun_up_at(site, now)
+            except Exception as e:
+                logger.error(f"Error computing sun_is_up for site {site.name}: {e}")
+                new_state = (None, next_local_midnight('UTC', now))
+            changed = changed or state is None or state[0] != new_state[0]
+            state = new_state
+        current[site.name] = state
+    
+    _sun_up.clear()
+    _sun_up.update(current)
+    return changed
+
+def update_sun_up(sites: list = None, now: datetime = None):
+    """Update sun_is_up of the sites that reached their sunrise or sunset"""
+    sites = get_sites() if sites is None else sites
+    now = datetime.now(timezone.utc) if now is None else now
+    if not _refresh_sun_up(sites, now):
+        return
+    
+    samples = Samples()
+    for site in sites:
+        is_up = _sun_up[site.name][0]
+        if is_up is not None:
+            samples.set(sun_is_up, is_up, site=site.name)
+    publish('sun_up', samples)
+
+def next_sun_up_change(now: datetime, sites: list = None) -> datetime:
+    """Next sunrise or sunset among the sites"""
+    sites = get_sites() if sites is None else sites
+    if any(site.name not in _sun_up for site in sites):
+        _refresh_sun_up(sites, now)
+    return min(_sun_up[site.name][1] for site in sites)
+
+def next_sun_change(now: datetime, sites: list = None) -> datetime:
+    """Next instant any sun value, sun_is_up included, changes: a local midnight, sunrise or sunset"""
+    sites = get_sites() if sites is None else sites
+    candidates = []
+    
+    for site in sites:
+        candidates.append(next_local_midnight(site.timezone, now))
         
-        logger.debug(
-            f"Sun: rise={sunrise_local.strftime('%H:%M')} set={sunset_local.strftime('%H:%M')} "
-            f"length={day_length}min change={day_gain:+d}min"
-        )
-        
-    except Exception as e:
-        logger.error(f"Error updating sun metrics: {e}")
\ No newline at end of file
+        local_date = now.astimezone(pytz.timezone(site.timezone)).date()
+        times = sun_times(site.latitude, site.longitude, site.timezone, local_date)
+        for event in ('sunrise', 'sunset'):
+            if times[event] is not None and times[event] > now:
+                candidates.append(times[event].astimezone(timezone.utc))
+    
+    return min(candidates)
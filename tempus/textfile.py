@@ -0,0 +1,39 @@
+"""
+Node exporter textfile output
+
+On hosts that cannot open a port, `python -m tempus textfile --out
+/var/lib/node_exporter/tempus.prom` runs every updater once, writes the
+exposition for the node_exporter textfile collector and exits, for cron.
+With `--watch` it keeps running and rewrites the file each time updaters
+run, on the exporter schedule, without the HTTP server.
+"""
+import os
+from tempus.metrics import get_exposition
+
+
+def write_textfile(path: str) -> bool:
+    """Write the current exposition to path, unless the file already holds it
+    
+    The body goes to a temporary file of the same directory, renamed over
+    path: the collector never reads a partial file, and only reads *.prom
+    files. Returns whether the file was written.
+    """
+    body = get_exposition().body
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == body:
+                return False
+    except FileNotFoundError:
+        pass
+    
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return True
\ No newline at end of file
@@ -1,108 +1,111 @@
 """
 Trash collection tracking
 """
-import yaml
-import os
-from datetime import datetime, timedelta
+from datetime import date, datetime
 from loguru import logger
+import pytz
 from tempus.config import config
+from tempus.holidays import get_holiday_index
+from tempus.recurrence import OccurrenceQueue, Rule
+from tempus.schedule import TrashEntry, get_schedule
+from tempus.scheduler import next_local_midnight
 from tempus.metrics import (
     trash_collection_today,
     trash_next_days,
-    current_context
+    Samples,
+    publish,
+    set_context
 )
 
-DAYS_MAP = {
-    'Monday': 0, 'Tuesday': 1, 'Wednesday': 2, 
-    'Thursday': 3, 'Friday': 4, 'Saturday': 5, 'Sunday': 6
-}
+# Next collection of every trash type, rebuilt when the schedule changes
+_queue = None
+_queue_schedule = None
 
-def load_schedule():
-    """Load schedule from YAML file"""
-    try:
-        if not os.path.exists(config.schedule_file):
-            logger.warning(f"Schedule file {config.schedule_file} not found")
-            return {}
-            
-        with open(config.schedule_file, 'r') as f:
-            data = yaml.safe_load(f)
-            return data.get('trash', {})
-    except Exception as e:
-        logger.error(f"Error loading schedule: {e}")
-        return {}
 
-def get_next_collection_days(today, trash_config):
+def load_schedule() -> dict:
+    """Trash entries of the schedule file, keyed by type"""
+    return get_schedule(config.schedule_file).trash
+
+def holiday_checker(rule: Rule):
+    """Public holiday predicate used by the holiday shift of a rule"""
+    if rule.holiday_shift == 'none':
+        return None
+    
+    country_code = rule.country_code or config.country_code
+    subdivision = rule.subdivision if rule.country_code else rule.subdivision or config.subdivision
+    
+    def is_holiday(day: date) -> bool:
+        return get_holiday_index(country_code, subdivision, day.year).get(day) is not None
+    
+    return is_holiday
+
+def get_next_collection_days(today, entry: TrashEntry):
     """
     Calculate days until next collection.
-    Returns 0 if today is collection day.
+    Returns 0 if today is collection day, 999 if there is none.
     """
-    frequency = trash_config.get('frequency', 'weekly')
-    day_name = trash_config.get('day', 'Monday')
-    target_weekday = DAYS_MAP.get(day_name, 0)
-    
-    today_weekday = today.weekday()
+    today = today.date()
+    next_date = entry.rule.next_occurrence(today, holiday_checker(entry.rule))
+    if next_date is None:
+        return 999
+    return (next_date - today).days
+
+def get_collection_queue(schedule: dict, today: date) -> OccurrenceQueue:
+    """Heap of the next collection of every type, moved forward to today"""
+    global _queue, _queue_schedule
     
-    # Calculate days until next occurrence of the weekday
-    days_until_weekday = (target_weekday - today_weekday) % 7
-    next_weekday_date = today + timedelta(days=days_until_weekday)
+    if _queue is None or _queue_schedule is not schedule or today < _queue.start:
+        rules = {trash_type: entry.rule for trash_type, entry in schedule.items()}
+        _queue = OccurrenceQueue(rules, today, holiday_checker)
+        _queue_schedule = schedule
     
-    if frequency == 'weekly':
-        return days_until_weekday
-        
-    elif frequency == 'biweekly':
-        ref_date_str = trash_config.get('reference_date')
-        if not ref_date_str:
-            logger.warning("No reference_date for biweekly schedule")
-            return 999
-            
-        ref_date = datetime.strptime(str(ref_date_str), "%Y-%m-%d").date()
-        
-        # Check if next_weekday_date aligns with reference week
-        # (next_weekday_date - ref_date) should be multiple of 14 days
-        
-        diff_days = (next_weekday_date.date() - ref_date).days
-        
-        if diff_days % 14 == 0:
-            return days_until_weekday
-        else:
-            # It's the week after
-            return days_until_weekday + 7
-            
-    return 999
+    _queue.advance(today)
+    return _queue
+
+def collection_context(today: date, next_date: date) -> dict:
+    """Context of a trash type given its next collection date"""
+    days_until = 999 if next_date is None else (next_date - today).days
+    return {
+        'today': days_until == 0,
+        'next_in_days': days_until,
+        'next_date': next_date.isoformat() if next_date else None
+    }
+
+def compute_trash(schedule: dict, today: date) -> dict:
+    """Collection context of every trash type of a schedule on a day"""
+    return {
+        trash_type: collection_context(today, entry.rule.next_occurrence(today, holiday_checker(entry.rule)))
+        for trash_type, entry in schedule.items()
+    }
+
+def trash_samples(trash_info: dict) -> Samples:
+    """Metric values of a trash context"""
+    samples = Samples()
+    for trash_type, info in trash_info.items():
+        samples.set(trash_collection_today, 1 if info['today'] else 0, type=trash_type)
+        samples.set(trash_next_days, info['next_in_days'], type=trash_type)
+    return samples
 
 def update_trash_metrics():
     """Update trash collection metrics"""
-    try:
-        schedule = load_schedule()
-        if not schedule:
-            return
+    schedule = load_schedule()
+    today = datetime.now(pytz.timezone(config.timezone)).date()
+    queue = get_collection_queue(schedule, today)
+    trash_info = {
+        trash_type: collection_context(today, next_date) for trash_type, next_date in queue.items()
+    }
+    
+    # Types removed from the schedule are simply not published anymore
+    publish('trash', trash_samples(trash_info))
+    
+    # Update context for JSON API
+    set_context('trash', trash_info)
+    
+    upcoming = queue.peek()
+    if upcoming:
+        logger.debug(f"Trash metrics updated, next collection: {upcoming[1]} on {upcoming[0]}")
+
 
-        now = datetime.now()
-        trash_info = {}
-        
-        # Reset metrics? Current implementation of prometheus_client keeps old labels.
-        # Ideally we might want to clear them if config changes drastically, 
-        # but for now we just update/set them.
-        
-        for trash_type, trash_config in schedule.items():
-            days_until = get_next_collection_days(now, trash_config)
-            
-            is_today = (days_until == 0)
-            
-            trash_collection_today.labels(type=trash_type).set(1 if is_today else 0)
-            trash_next_days.labels(type=trash_type).set(days_until)
-            
-            trash_info[trash_type] = {
-                'today': is_today,
-                'next_in_days': days_until
-            }
-            
-            logger.debug(f"Trash {trash_type}: today={is_today} next_in={days_until}")
-        
-        # Update context for JSON API
-        current_context['trash'] = trash_info
-        
-        logger.debug("Trash metrics updated")
-        
-    except Exception as e:
-        logger.error(f"Error updating trash metrics: {e}")
\ No newline at end of file
+def next_trash_change(now: datetime) -> datetime:
+    """Trash values change at local midnight in the configured timezone"""
+    return next_local_midnight(config.timezone, now)
@@ -0,0 +1,77 @@
+"""
+Timezone transition index
+
+Offset changes of a zone are read once from the tz database transition
+tables shipped with pytz, lookups are then a bisect over sorted instants.
+"""
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import numpy as np
+import pytz
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class TransitionIndex:
+    """Sorted UTC instants at which the offset of a timezone changes"""
+
+    def __init__(self, tz_name: str):
+        self.timezone = tz_name
+        self.tz = pytz.timezone(tz_name)
+
+        transitions = getattr(self.tz, '_utc_transition_times', None)
+        if not transitions:
+            # Fixed offset zone such as UTC
+            offset = self.tz.utcoffset(datetime(2000, 1, 1))
+            self.instants = [-np.inf]
+            self.offsets = [int(offset.total_seconds())]
+            self.dst = [0]
+        else:
+            self.instants, self.offsets, self.dst = [], [], []
+            for start, (offset, dst, _) in zip(transitions, self.tz._transition_info):
+                offset = int(offset.total_seconds())
+                # Only keep entries that actually move the clock
+                if self.offsets and offset == self.offsets[-1]:
+                    continue
+                self.instants.append(
+                    -np.inf if start.year == 1 else (start - _EPOCH).total_seconds()
+                )
+                self.offsets.append(offset)
+                self.dst.append(int(dst.total_seconds()))
+
+        self._instants = np.array(self.instants)
+        self._offsets = np.array(self.offsets, dtype=np.float64)
+
+    def _index(self, ts: float) -> int:
+        return max(0, bisect_right(self.instants, ts) - 1)
+
+    def offset_at(self, ts: float) -> int:
+        """UTC offset in seconds at an epoch instant"""
+        return self.offsets[self._index(ts)]
+
+    def is_dst_at(self, ts: float) -> bool:
+        return self.dst[self._index(ts)] != 0
+
+    def offsets_at(self, instants: np.ndarray) -> np.ndarray:
+        """Vectorized offset_at (NaN instants get an arbitrary offset)"""
+        index = np.searchsorted(self._instants, np.nan_to_num(instants), side='right') - 1
+        return self._offsets[np.clip(index, 0, len(self._offsets) - 1)]
+
+    def next_transition(self, ts: float) -> tuple:
+        """Return (UTC datetime, offset delta in seconds) of the next change after ts
+
+        Returns None when the tz database has no later transition.
+        """
+        index = bisect_right(self.instants, ts)
+        if index >= len(self.instants):
+            return None
+
+        instant = _EPOCH.replace(tzinfo=timezone.utc) + timedelta(seconds=self.instants[index])
+        return instant, self.offsets[index] - self.offsets[index - 1]
+
+
+@lru_cache(maxsize=None)
+def get_transition_index(tz_name: str) -> TransitionIndex:
+    """Return the (cached) transition index of a timezone"""
+    return TransitionIndex(tz_name)
@@ -0,0 +1,78 @@
+"""
+Business day arithmetic over the holiday calendars
+"""
+from datetime import date
+import numpy as np
+from tempus.config import config
+from tempus.holidays import HolidayIndex, load_holiday_index
+
+
+def _to_days(value) -> np.ndarray:
+    return np.asarray(value, dtype='datetime64[D]')
+
+
+def get_calendar_index(country_code: str, subdivision: str, first: date, last: date) -> HolidayIndex:
+    """Holiday index covering [first, last], extended to the usual window
+    
+    Queries inside the configured window of years share the same cached
+    index as the metrics.
+    """
+    this_year = date.today().year
+    return load_holiday_index(
+        country_code,
+        subdivision,
+        min(first.year, this_year - config.holiday_years_before),
+        max(last.year, this_year + max(1, config.holiday_years_after))
+    )
+
+
+def _index_for(start, end, country_code, subdivision) -> HolidayIndex:
+    if isinstance(start, date) and isinstance(end, date):
+        first, last = min(start, end), max(start, end)
+    else:
+        start, end = _to_days(start), _to_days(end)
+        first = min(start.min(), end.min()).astype(date)
+        last = max(start.max(), end.max()).astype(date)
+    return get_calendar_index(country_code or config.country_code, subdivision, first, last)
+
+
+def count_workdays(start, end, country_code: str = None, subdivision: str = None,
+                   weekmask: str = None):
+    """Number of working days in [start, end), like numpy.busday_count
+    
+    start and end may be dates or arrays of dates, the result has the
+    broadcast shape (a plain int for scalars).
+    """
+    index = _index_for(start, end, country_code, subdivision)
+    result = np.busday_count(start, end, busdaycal=index.busdaycalendar(weekmask))
+    return int(result) if np.ndim(result) == 0 else result
+
+
+def offset_workdays(start, days, country_code: str = None, subdivision: str = None,
+                    weekmask: str = None):
+    """Date `days` working days after start, like numpy.busday_offset
+    
+    A start falling on a non working day is first rolled forward (backward
+    for negative offsets, element by element).
+    """
+    days = np.asarray(days)
+    start_days = _to_days(start)
+    if days.size == 0:
+        return np.empty(np.broadcast_shapes(start_days.shape, days.shape), dtype='datetime64[D]')
+    
+    # Bound the index with the calendar distance the offset can reach: the
+    # weeks it takes at this weekmask, with room for the holidays
+    weekdays = int(np.busdaycalendar(weekmask=weekmask or config.weekmask).weekmask.sum())
+    span = np.timedelta64(int(np.abs(days).max()) * 7 // weekdays * 5 // 4 + 14, 'D')
+    while True:
+        index = _index_for(start_days - span, start_days + span, country_code, subdivision)
+        calendar = index.busdaycalendar(weekmask)
+        result = np.where(
+            days >= 0,
+            np.busday_offset(start_days, days, roll='forward', busdaycal=calendar),
+            np.busday_offset(start_days, days, roll='backward', busdaycal=calendar)
+        )[()]
+        # Past the index, holidays would be missing from the count
+        if index.covers(np.min(result).astype(date)) and index.covers(np.max(result).astype(date)):
+            return result.astype(date) if np.ndim(result) == 0 else result
+        span *= 2
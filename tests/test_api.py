@@ -0,0 +1,295 @@
+import sys
+import os
+import asyncio
+import gzip
+import json
+import tempfile
+from datetime import date, timedelta
+from unittest.mock import patch
+from aiohttp.test_utils import TestClient, TestServer
+from prometheus_client.parser import text_string_to_metric_families
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tempus.api import CONTEXT_STREAM, ContextStream, create_app
+from tempus.config import config
+from tempus.metrics import Samples, publish, current_context, set_context, trash_next_days
+
+def test_metrics_endpoint():
+    print("Testing /metrics endpoint...")
+    
+    async def scenario():
+        async with TestClient(TestServer(create_app())) as client:
+            samples = Samples()
+            samples.set(trash_next_days, 5, type='blue')
+            publish('trash', samples)
+            
+            resp = await client.get('/metrics', headers={'Accept-Encoding': 'gzip'}, auto_decompress=False)
+            assert resp.status == 200
+            assert resp.headers['Content-Encoding'] == 'gzip'
+            assert resp.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            etag = resp.headers['ETag']
+            assert b'trash_next_days{type="blue"} 5.0' in gzip.decompress(await resp.read())
+            
+            # Unchanged snapshot: 304 without a body
+            resp = await client.get('/metrics', headers={'If-None-Match': etag})
+            assert resp.status == 304
+            
+            # A new value changes the ETag
+            samples.set(trash_next_days, 6, type='blue')
+            publish('trash', samples)
+            resp = await client.get('/metrics', headers={'If-None-Match': etag})
+            assert resp.status == 200
+            assert resp.headers['ETag'] != etag
+            assert b'trash_next_days{type="blue"} 6.0' in await resp.read()
+            
+            # OpenMetrics when the scraper asks for it
+            resp = await client.get('/metrics', headers={'Accept': 'application/openmetrics-text; version=1.0.0'})
+            assert resp.headers['Content-Type'].startswith('application/openmetrics-text')
+            assert (await resp.read()).endswith(b'# EOF\n')
+            
+            # The 0.0.4 text format otherwise, older scrapers parse it
+            resp = await client.get('/metrics', headers={'Accept': 'application/openmetrics-text; version=0.0.1'})
+            assert resp.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    
+    asyncio.run(scenario())
+    
+    print("SUCCESS: /metrics endpoint verified.")
+
+def test_metrics_runtime():
+    print("Testing process and Python series on /metrics...")
+    
+    async def scenario():
+        async with TestClient(TestServer(create_app())) as client:
+            resp = await client.get('/metrics', headers={'Accept-Encoding': 'gzip'}, auto_decompress=False)
+            body = gzip.decompress(await resp.read())
+            families = {family.name for family in text_string_to_metric_families(body.decode())}
+            assert {'process_cpu_seconds', 'python_info', 'python_gc_objects_collected', 'trash_next_days'} <= families
+            
+            # The ETag validates the cached part, the runtime series left out
+            etag = resp.headers['ETag']
+            resp = await client.get('/metrics', headers={'If-None-Match': etag})
+            assert resp.status == 304
+            
+            with patch.object(config, 'metrics_runtime', False):
+                resp = await client.get('/metrics')
+                assert resp.headers['ETag'] == etag
+                assert b'python_info' not in await resp.read()
+            
+            resp = await client.get('/metrics', headers={'Accept': 'application/openmetrics-text; version=1.0.0'})
+            body = await resp.read()
+            assert body.count(b'# EOF') == 1 and body.endswith(b'# EOF\n')
+            assert b'python_info' in body
+    
+    asyncio.run(scenario())
+    
+    print("SUCCESS: Runtime series verified.")
+
+def test_context_endpoint():
+    print("Testing /context endpoint on the same app...")
+    
+    async def scenario():
+        async with TestClient(TestServer(create_app())) as client:
+            resp = await client.get('/context')
+            assert resp.status == 200
+            assert (await resp.json()).keys() == current_context.keys()
+            
+            resp = await client.get('/context?site=nowhere')
+            assert resp.status == 404
+    
+    asyncio.run(scenario())
+    
+    print("SUCCESS: /context endpoint verified.")
+
+def test_context_cache():
+    print("Testing cached /context...")
+    
+    async def scenario():
+        async with TestClient(TestServer(create_app())) as client:
+            set_context('trash', {'black': {'today': True, 'next_in_days': 0, 'next_date': '2026-10-18'}})
+            
+            resp = await client.get('/context', headers={'Accept-Encoding': 'gzip'}, auto_decompress=False)
+            assert resp.headers['Content-Encoding'] == 'gzip'
+            assert json.loads(gzip.decompress(await resp.read())) == json.loads(json.dumps(current_context))
+            etag = resp.headers['ETag']
+            last_modified = resp.headers['Last-Modified']
+            
+            # Conditional requests
+            resp = await client.get('/context', headers={'If-None-Match': etag})
+            assert resp.status == 304
+            resp = await client.get('/context', headers={'If-Modified-Since': last_modified})
+            assert resp.status == 304
+            
+            # A change within the same second is not hidden by the date
+            set_context('trash', {'black': {'today': False, 'next_in_days': 7, 'next_date': '2026-10-25'}})
+            resp = await client.get('/context', headers={'If-Modified-Since': last_modified})
+            assert resp.status == 200
+            
+            # Selected sections are assembled from the cached fragments
+            resp = await client.get('/context?sections=trash,clock')
+            body = await resp.text()
+            assert body == json.dumps({'trash': current_context['trash'], 'clock': current_context['clock']})
+            assert resp.headers['ETag'] != etag
+            
+            resp = await client.get('/context?sections=trash,nothing')
+            assert resp.status == 400
+            
+            # A context change invalidates the cached bodies
+            set_context('trash', {})
+            resp = await client.get('/context?sections=trash', headers={'If-None-Match': etag})
+            assert resp.status == 200
+            assert await resp.json() == {'trash': {}}
+    
+    asyncio.run(scenario())
+    
+    print("SUCCESS: Cached /context verified.")
+
+def test_dated_context():
+    print("Testing /context?date= and /context/range...")
+    
+    async def scenario():
+        async with TestClient(TestServer(create_app())) as client:
+            resp = await client.get('/context?date=2026-12-25&sections=date,calendar')
+            assert resp.status == 200
+            context = await resp.json()
+            assert context['date'] == '2026-12-25'
+            assert context.keys() == {'date', 'calendar'}
+            
+            resp = await client.get('/context/range?from=2026-12-24&to=2026-12-27&sections=date,season')
+            assert resp.status == 200
+            assert resp.headers['Content-Type'] == 'application/x-ndjson'
+            lines = (await resp.text()).splitlines()
+            assert [json.loads(line)['date'] for line in lines] == ['2026-12-24', '2026-12-25', '2026-12-26']
+            
+            resp = await client.get('/context/range?from=2026-12-24&to=2026-12-24')
+            assert resp.status == 400
+            resp = await client.get('/context/range?from=2026-01-01&to=2027-01-01&sections=nothing')
+            assert resp.status == 400
+            resp = await client.get('/context?date=2026-12-25&site=nowhere')
+            assert resp.status == 404
+    
+    async def far_dates(cache_dir):
+        async with TestClient(TestServer(create_app())) as client:
+            resp = await client.get('/context?date=2500-06-01')
+            assert resp.status == 400
+            resp = await client.get('/context/range?from=2499-12-30&to=2500-01-02')
+            assert resp.status == 400
+            today = date.today()
+            resp = await client.get(f'/context/range?from={today - timedelta(days=3)}&to={today + timedelta(days=3)}')
+            assert resp.status == 400
+        # Refused before any holiday index is built
+        assert not any(files for _, _, files in os.walk(cache_dir))
+    
+    # Dated contexts build and persist holiday indexes
+    with tempfile.TemporaryDirectory() as cache_dir, patch.object(config, 'cache_dir', cache_dir):
+        asyncio.run(scenario())
+    with tempfile.TemporaryDirectory() as cache_dir, patch.object(config, 'cache_dir', cache_dir), \
+         patch.object(config, 'context_max_days', 2):
+        asyncio.run(far_dates(cache_dir))
+    
+    print("SUCCESS: Dated context verified.")
+
+async def _read_event(resp) -> tuple:
+    lines = (await asyncio.wait_for(resp.content.readuntil(b'\n\n'), timeout=5)).decode().strip().splitlines()
+    fields = dict(line.split(': ', 1) for line in lines)
+    return fields['event'], json.loads(fields['data'])
+
+def test_context_stream():
+    print("Testing /context/stream over SSE...")
+    
+    async def scenario():
+        async with TestClient(TestServer(create_app())) as client:
+            set_context('trash', {})
+            resp = await client.get('/context/stream')
+            assert resp.status == 200
+            assert resp.headers['Content-Type'] == 'text/event-stream'
+            event, data = await _read_event(resp)
+            assert event == 'context'
+            assert data == json.loads(json.dumps(current_context))
+            
+            # Only the changed section is sent
+            set_context('trash', {'black': {'today': True, 'next_in_days': 0, 'next_date': '2026-10-18'}})
+            event, data = await _read_event(resp)
+            assert event == 'diff'
+            assert data == {'trash': current_context['trash']}
+            
+            filtered = await client.get('/context/stream?sections=trash')
+            assert (await _read_event(filtered)) == ('context', {'trash': current_context['trash']})
+            
+            resp = await client.get('/context/stream?sections=nothing')
+            assert resp.status == 400
+            resp = await client.get('/context/stream?site=nowhere')
+            assert resp.status == 404
+    
+    asyncio.run(scenario())
+    
+    print("SUCCESS: SSE stream verified.")
+
+def test_context_stream_websocket():
+    print("Testing /context/stream over WebSocket...")
+    
+    async def scenario():
+        async with TestClient(TestServer(create_app())) as client:
+            async with client.ws_connect('/context/stream?sections=trash') as ws:
+                message = await ws.receive_json(timeout=5)
+                assert message['event'] == 'context'
+                assert message['data'] == {'trash': current_context['trash']}
+                
+                set_context('trash', {'blue': {'today': False, 'next_in_days': 3, 'next_date': '2026-10-21'}})
+                message = await ws.receive_json(timeout=5)
+                assert message['event'] == 'diff'
+                assert message['data'] == {'trash': current_context['trash']}
+                assert message['id'] > 0
+            
+            # Closed clients are unsubscribed
+            for _ in range(50):
+                if not len(client.app[CONTEXT_STREAM]):
+                    break
+                await asyncio.sleep(0.01)
+            assert len(client.app[CONTEXT_STREAM]) == 0
+    
+    asyncio.run(scenario())
+    
+    print("SUCCESS: WebSocket stream verified.")
+
+def test_context_stream_backpressure():
+    print("Testing bounded stream queues...")
+    
+    async def scenario():
+        stream = ContextStream()
+        with patch.object(config, 'stream_queue_size', 3):
+            slow = stream.subscribe(None, ('trash',))
+            fast = stream.subscribe(None, ('trash',))
+            await fast.get()
+            for day in range(5):
+                set_context('trash', {'day': day})
+                stream.broadcast()
+                assert [event for event, _, _ in await fast.get()] == ['diff']
+            
+            # The slow client got the whole view again instead of the diffs
+            # it could not hold, then the diffs that followed
+            messages = await slow.get()
+            assert len(messages) <= 3
+            assert messages[0][0] == 'context'
+            context = {}
+            for _, _, data in messages:
+                context.update(json.loads(data))
+            assert context == {'trash': {'day': 4}}
+            
+            stream.unsubscribe(slow)
+            stream.unsubscribe(fast)
+            assert len(stream) == 0 and not stream.views
+    
+    asyncio.run(scenario())
+    
+    print("SUCCESS: Stream backpressure verified.")
+
+if __name__ == "__main__":
+    test_metrics_endpoint()
+    test_metrics_runtime()
+    test_context_endpoint()
+    test_context_cache()
+    test_dated_context()
+    test_context_stream()
+    test_context_stream_websocket()
+    test_context_stream_backpressure()
@@ -0,0 +1,70 @@
+import sys
+import os
+import tempfile
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from prometheus_client.openmetrics.parser import text_string_to_metric_families
+from tempus.backfill import generate_backfill, parse_instant, parse_step
+from tempus.config import config
+from tempus.sites import Site
+
+SITES = [
+    Site('caen', 49.2297, -0.4458, 'Europe/Paris', 'FR', 'north'),
+    Site('sydney', -33.87, 151.21, 'Australia/Sydney', 'AU', 'south')
+]
+
+def test_parse_arguments():
+    print("Testing backfill arguments...")
+    
+    assert parse_step('60') == 60
+    assert parse_step('5m') == 300
+    assert parse_step('1h') == 3600
+    for value in ('0', '1w', '-1', 'm'):
+        try:
+            parse_step(value)
+            assert False
+        except ValueError:
+            pass
+    
+    assert parse_instant('2026-03-29') == datetime(2026, 3, 29, tzinfo=timezone.utc)
+    assert parse_instant('2026-03-29T02:00:00+02:00') == datetime(2026, 3, 29, tzinfo=timezone.utc)
+    
+    print("SUCCESS: Backfill arguments verified.")
+
+def test_generate_backfill():
+    print("Testing OpenMetrics backfill...")
+    
+    start = parse_instant('2026-03-28')
+    end = parse_instant('2026-03-30')
+    
+    with patch.object(config, 'cache_dir', tempfile.mkdtemp()), \
+         patch.object(config, 'schedule_file', 'missing.yaml'):
+        text = ''.join(generate_backfill(start, end, 300, SITES))
+    
+    assert text.endswith('# EOF\n')
+    # The strict parser rejects interleaved families and a missing EOF
+    families = {family.name: family for family in text_string_to_metric_families(text)}
+    assert 'sun_is_up' in families and 'season_progress_percent' in families
+    
+    # Every series has a sample every step over the whole range
+    summer = [s for s in families['clock_is_summer_time'].samples if s.labels['site'] == 'caen']
+    assert len(summer) == 2 * 24 * 12
+    assert [float(s.timestamp) for s in summer[:2]] == [start.timestamp(), start.timestamp() + 300]
+    
+    # Paris switches to summer time at 01:00 UTC on March 29
+    switch = datetime(2026, 3, 29, 1, tzinfo=timezone.utc).timestamp()
+    assert all(s.value == (1 if float(s.timestamp) >= switch else 0) for s in summer)
+    
+    # The sun is up during the day only, in local time
+    is_up = {float(s.timestamp): s.value for s in families['sun_is_up'].samples if s.labels['site'] == 'sydney'}
+    assert is_up[datetime(2026, 3, 28, 2, tzinfo=timezone.utc).timestamp()] == 1
+    assert is_up[datetime(2026, 3, 28, 12, tzinfo=timezone.utc).timestamp()] == 0
+    
+    print("SUCCESS: OpenMetrics backfill verified.")
+
+if __name__ == "__main__":
+    test_parse_arguments()
+    test_generate_backfill()
@@ -1,7 +1,8 @@
 import sys
 import os
 import yaml
-from datetime import datetime
+import time
+from datetime import datetime, date
 from unittest.mock import patch, MagicMock
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -9,7 +10,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # Mock config before importing birthdays
 with patch('tempus.config.config') as mock_config:
     mock_config.schedule_file = "test_birthdays_schedule.yaml"
-    from tempus.birthdays import get_days_until_birthday, load_birthdays, update_birthday_metrics
+    from tempus.birthdays import get_days_until_birthday, load_birthdays, update_birthday_metrics, BirthdayIndex
+
+from tempus.schedule import BirthdayEntry
+from prometheus_client import REGISTRY
+from tempus.metrics import current_context
 
 def test_birthday_logic():
     print("Testing Birthday Logic...")
@@ -49,7 +54,7 @@ def test_birthday_logic():
         # Test loading
         loaded = load_birthdays()
         assert len(loaded) == 3
-        assert loaded[0]['name'] == 'Alice'
+        assert loaded[0].name == 'Alice'
         
         print("SUCCESS: Birthday logic verified.")
         
@@ -57,5 +62,80 @@ def test_birthday_logic():
         if os.path.exists('test_birthdays_schedule.yaml'):
             os.remove('test_birthdays_schedule.yaml')
 
+def test_birthday_index():
+    print("Testing Birthday Index...")
+    
+    index = BirthdayIndex([
+        BirthdayEntry('Leap', 2, 29),
+        BirthdayEntry('Eve', 12, 31),
+        BirthdayEntry('Feb', 2, 28),
+        BirthdayEntry('Mar', 3, 1),
+        BirthdayEntry('Jan', 1, 1),
+    ])
+    
+    # Common year: 02-29 is celebrated on 02-28
+    upcoming = [(days, entry.name) for days, _, entry in index.upcoming(date(2026, 2, 27), limit=3)]
+    assert upcoming == [(1, 'Feb'), (1, 'Leap'), (2, 'Mar')]
+    assert get_days_until_birthday(datetime(2026, 3, 1), '02-29') == 364
+    
+    # Leap year keeps its own day
+    upcoming = [(days, entry.name) for days, _, entry in index.upcoming(date(2028, 2, 28), limit=2)]
+    assert upcoming == [(0, 'Feb'), (1, 'Leap')]
+    
+    # Wraps around the end of the year
+    within = index.upcoming(date(2026, 12, 30), within_days=3)
+    assert [(days, day) for days, day, _ in within] == [(1, date(2026, 12, 31)), (2, date(2027, 1, 1))]
+    
+    # Every entry at most once
+    assert len(index.upcoming(date(2026, 6, 1))) == 5
+    assert [entry.name for entry in index.in_month(2)] == ['Feb', 'Leap']
+    assert [entry.name for entry in index.in_month(12)] == ['Eve']
+    
+    # Large lists stay cheap to query
+    days = [(month, day) for month in range(1, 13) for day in range(1, 29)]
+    big = BirthdayIndex([BirthdayEntry(f"person-{i}", *days[i % len(days)]) for i in range(50000)])
+    start = time.perf_counter()
+    top = big.upcoming(date(2026, 7, 14), limit=10)
+    assert time.perf_counter() - start < 0.01
+    assert [day for _, day, _ in top] == [date(2026, 7, 14)] * 10
+    
+    print("SUCCESS: Birthday index verified.")
+
+def test_birthday_metrics():
+    print("Testing Birthday Metrics...")
+    
+    test_schedule = {'birthdays': [{'name': f"person-{i}", 'date': f"01-{i:02d}"} for i in range(1, 29)]}
+    with open('test_birthdays_schedule.yaml', 'w') as f:
+        yaml.dump(test_schedule, f)
+    
+    try:
+        with patch('tempus.birthdays.config') as mock_config, \
+             patch('tempus.birthdays.datetime') as mock_date:
+            mock_config.schedule_file = 'test_birthdays_schedule.yaml'
+            mock_config.timezone = 'Europe/Paris'
+            mock_config.birthday_top_k = 3
+            mock_config.birthday_window_days = 7
+            mock_date.now.return_value = datetime(2026, 1, 18, 12, 0, 0)
+            
+            update_birthday_metrics()
+        
+        # Only the next K birthdays are exported
+        samples = [m for m in REGISTRY.collect() if m.name == 'birthday_upcoming_days'][0].samples
+        assert [(s.labels['rank'], s.labels['name'], s.value) for s in samples] == [
+            ('1', 'person-18', 0), ('2', 'person-19', 1), ('3', 'person-20', 2)
+        ]
+        assert REGISTRY.get_sample_value('birthdays_today') == 1
+        assert REGISTRY.get_sample_value('birthdays_upcoming') == 8
+        assert current_context['birthdays']['today'] == ['person-18']
+        assert len(current_context['birthdays']['this_month']) == 28
+        
+        print("SUCCESS: Birthday metrics verified.")
+    
+    finally:
+        if os.path.exists('test_birthdays_schedule.yaml'):
+            os.remove('test_birthdays_schedule.yaml')
+
 if __name__ == "__main__":
     test_birthday_logic()
+    test_birthday_index()
+    test_birthday_metrics()
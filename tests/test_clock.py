@@ -0,0 +1,67 @@
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytz
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tempus.tzindex import get_transition_index
+from tempus.clock import get_dst_info
+
+def test_transition_index():
+    print("Testing timezone transition index...")
+    
+    index = get_transition_index('Europe/Paris')
+    assert get_transition_index('Europe/Paris') is index
+    
+    # Spring forward 2026-03-29 at 01:00 UTC, +1h
+    instant, delta = index.next_transition(datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp())
+    assert instant == datetime(2026, 3, 29, 1, 0, tzinfo=timezone.utc)
+    assert delta == 3600
+    
+    # Fall back 2026-10-25 at 01:00 UTC, -1h
+    instant, delta = index.next_transition(instant.timestamp())
+    assert instant == datetime(2026, 10, 25, 1, 0, tzinfo=timezone.utc)
+    assert delta == -3600
+    
+    # Fixed offset zones have no transition
+    assert get_transition_index('UTC').next_transition(0) is None
+    
+    # Offsets agree with pytz hour by hour over a year, for several zones
+    for tz_name in ['America/New_York', 'Australia/Lord_Howe', 'America/Santiago']:
+        index = get_transition_index(tz_name)
+        tz = pytz.timezone(tz_name)
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for hour in range(0, 365 * 24, 5):
+            moment = start + timedelta(hours=hour)
+            expected = moment.astimezone(tz).utcoffset().total_seconds()
+            assert index.offset_at(moment.timestamp()) == expected, (tz_name, moment)
+    
+    print("SUCCESS: Transition index verified.")
+
+def test_dst_info():
+    print("Testing DST info...")
+    
+    # Evening of 2026-03-28 in Paris: change tomorrow at 03:00 local
+    now = datetime(2026, 3, 28, 20, 0, tzinfo=timezone.utc)
+    is_summer, days_until, next_change, offset = get_dst_info('Europe/Paris', now)
+    assert not is_summer
+    assert days_until == 1
+    assert next_change.isoformat() == '2026-03-29T03:00:00+02:00'
+    assert offset == 1
+    
+    # Lord Howe Island shifts by half an hour
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    is_summer, days_until, next_change, offset = get_dst_info('Australia/Lord_Howe', now)
+    assert is_summer
+    assert offset == -0.5
+    
+    # No DST in UTC
+    assert get_dst_info('UTC', now) == (False, 0, None, 0)
+    
+    print("SUCCESS: DST info verified.")
+
+if __name__ == "__main__":
+    test_transition_index()
+    test_dst_info()
@@ -0,0 +1,65 @@
+import sys
+import os
+from datetime import date, timedelta
+
+import pytz
+from astral import Observer
+from astral import sun as astral_sun
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tempus.ephemeris import EVENTS, solar_table, sun_times
+
+LOCATIONS = [
+    (49.2297, -0.4458, 'Europe/Paris'),
+    (40.71, -74.0, 'America/New_York'),
+    (-33.87, 151.2, 'Australia/Sydney'),
+    (69.65, 18.96, 'Europe/Oslo'),
+    (21.3, -157.8, 'Pacific/Honolulu'),
+]
+
+def test_ephemeris_matches_astral():
+    print("Testing ephemeris table against astral...")
+    
+    worst = 0.0
+    for latitude, longitude, tz_name in LOCATIONS:
+        observer = Observer(latitude, longitude)
+        tz = pytz.timezone(tz_name)
+        
+        # Sample every 5 years from 1960 to 2060, every 17 days
+        for year in range(1960, 2061, 5):
+            for offset in range(0, 365, 17):
+                day = date(year, 1, 1) + timedelta(days=offset)
+                table = sun_times(latitude, longitude, tz_name, day)
+                
+                for event in EVENTS:
+                    try:
+                        expected = getattr(astral_sun, event)(observer, day, tzinfo=tz)
+                    except ValueError:
+                        # Polar day/night: the table has no event either
+                        assert table[event] is None, (tz_name, day, event)
+                        continue
+                    
+                    assert table[event] is not None, (tz_name, day, event)
+                    worst = max(worst, abs((table[event] - expected).total_seconds()))
+    
+    print(f"Worst difference: {worst:.3f}s")
+    assert worst < 60
+    print("SUCCESS: Ephemeris verified.")
+
+def test_table_cache():
+    print("Testing solar table cache...")
+    
+    table = solar_table(49.2297, -0.4458, 'Europe/Paris', 2026)
+    assert table.events.shape == (365, len(EVENTS))
+    assert solar_table(49.2297, -0.4458, 'Europe/Paris', 2026) is table
+    
+    # A new year or location builds a new table
+    assert solar_table(49.2297, -0.4458, 'Europe/Paris', 2028).events.shape[0] == 366
+    assert solar_table(40.71, -74.0, 'America/New_York', 2026) is not table
+    
+    print("SUCCESS: Solar table cache verified.")
+
+if __name__ == "__main__":
+    test_ephemeris_matches_astral()
+    test_table_cache()
@@ -0,0 +1,80 @@
+import sys
+import os
+import tempfile
+import yaml
+from datetime import date
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tempus.config import config
+from tempus.forecast import SECTIONS, context_at, get_context, iter_context
+from tempus.sites import Site
+
+CACHE_DIR = tempfile.mkdtemp()
+SITE = Site('caen', 49.2297, -0.4458, 'Europe/Paris', 'FR', 'north')
+
+def write_schedule(path, day):
+    schedule = {
+        'trash': {'black': {'day': day}},
+        'birthdays': [{'name': 'Noel', 'date': '12-25'}]
+    }
+    with open(path, 'w') as f:
+        yaml.dump(schedule, f)
+
+def test_context_at():
+    print("Testing context of a given date...")
+    
+    path = os.path.join(tempfile.mkdtemp(), 'schedule.yaml')
+    write_schedule(path, 'Friday')
+    
+    with patch.object(config, 'schedule_file', path), \
+         patch.object(config, 'cache_dir', CACHE_DIR):
+        # Friday, December 25, 2026
+        context = context_at(SITE, date(2026, 12, 25))
+        
+        assert tuple(context) == SECTIONS
+        assert context['date'] == '2026-12-25'
+        assert context['timestamp'] == '2026-12-25T12:00:00+01:00'
+        assert context['calendar']['is_holiday']
+        assert context['calendar']['day_of_week'] == 'Friday'
+        assert context['season']['name'] == 'winter'
+        assert context['trash']['black'] == {'today': True, 'next_in_days': 0, 'next_date': '2026-12-25'}
+        assert context['birthdays']['today'] == ['Noel']
+        assert not context['clock']['is_summer_time']
+        assert context['sun']['sunrise'] < context['sun']['sunset']
+        
+        # Summer: the clock and the season follow the date
+        context = context_at(SITE, date(2026, 7, 14))
+        assert context['clock']['is_summer_time']
+        assert context['season']['name'] == 'summer'
+        assert context['trash']['black']['next_date'] == '2026-07-17'
+    
+    print("SUCCESS: Context of a given date verified.")
+
+def test_memoized_context():
+    print("Testing memoized contexts...")
+    
+    path = os.path.join(tempfile.mkdtemp(), 'schedule.yaml')
+    write_schedule(path, 'Friday')
+    
+    with patch.object(config, 'schedule_file', path), \
+         patch.object(config, 'cache_dir', CACHE_DIR):
+        first = get_context(SITE, date(2026, 12, 24))
+        assert get_context(SITE, date(2026, 12, 24)) is first
+        
+        days = [context['date'] for context in iter_context(SITE, date(2026, 12, 24), date(2026, 12, 31))]
+        assert days == [f"2026-12-{d}" for d in range(24, 31)]
+        
+        # A schedule change gives new results
+        write_schedule(path, 'Thursday')
+        os.utime(path, ns=(0, 0))
+        changed = get_context(SITE, date(2026, 12, 24))
+        assert changed is not first
+        assert changed['trash']['black']['today']
+    
+    print("SUCCESS: Memoized contexts verified.")
+
+if __name__ == "__main__":
+    test_context_at()
+    test_memoized_context()
@@ -1,45 +1,90 @@
 import sys
 import os
-from datetime import datetime
+import tempfile
+from datetime import date, datetime
 from unittest.mock import patch, MagicMock
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Mock config
-with patch('tempus.config.config') as mock_config:
-    mock_config.country_code = 'FR'
-    from tempus.holidays import update_holiday_metrics
-    from tempus.metrics import is_public_holiday, is_weekend, is_working_day
+from tempus.sites import Site
+from tempus.holidays import update_holiday_metrics, load_holiday_index, HolidayIndex, _index_path
+from prometheus_client import REGISTRY
+
+SITE = Site('test', 49.2, -0.4, 'Europe/Paris', 'FR', 'north')
 
 def test_holiday_logic():
     print("Testing Holiday and Calendar Logic...")
     
-    # 1. Test a weekend (Jan 18, 2026 is Sunday)
-    with patch('tempus.holidays.datetime') as mock_datetime:
-        mock_datetime.now.return_value = datetime(2026, 1, 18)
-        update_holiday_metrics()
-        
-        assert is_weekend._value.get() == 1
-        assert is_working_day._value.get() == 0
-        
-    # 2. Test a working day (Jan 19, 2026 is Monday)
-    with patch('tempus.holidays.datetime') as mock_datetime:
-        mock_datetime.now.return_value = datetime(2026, 1, 19)
-        update_holiday_metrics()
-        
-        assert is_weekend._value.get() == 0
-        assert is_working_day._value.get() == 1
-        assert is_public_holiday._value.get() == 0
-
-    # 3. Test a public holiday (Jan 1, 2026 in France)
-    with patch('tempus.holidays.datetime') as mock_datetime:
-        mock_datetime.now.return_value = datetime(2026, 1, 1)
-        update_holiday_metrics()
+    with tempfile.TemporaryDirectory() as cache_dir, \
+         patch('tempus.holidays.config.cache_dir', cache_dir):
+        load_holiday_index.cache_clear()
         
-        assert is_public_holiday._value.get() == 1
-        assert is_working_day._value.get() == 0
-
+        # 1. Test a weekend (Jan 18, 2026 is Sunday)
+        with patch('tempus.holidays.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2026, 1, 18)
+            update_holiday_metrics([SITE])
+            
+            assert REGISTRY.get_sample_value('is_weekend', {'site': 'test'}) == 1
+            assert REGISTRY.get_sample_value('is_working_day', {'site': 'test'}) == 0
+            
+        # 2. Test a working day (Jan 19, 2026 is Monday)
+        with patch('tempus.holidays.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2026, 1, 19)
+            update_holiday_metrics([SITE])
+            
+            assert REGISTRY.get_sample_value('is_weekend', {'site': 'test'}) == 0
+            assert REGISTRY.get_sample_value('is_working_day', {'site': 'test'}) == 1
+            assert REGISTRY.get_sample_value('is_public_holiday', {'site': 'test'}) == 0
+        
+        # 3. Test a public holiday (Jan 1, 2026 in France)
+        with patch('tempus.holidays.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2026, 1, 1)
+            update_holiday_metrics([SITE])
+            
+            assert REGISTRY.get_sample_value('is_public_holiday', {'site': 'test'}) == 1
+            assert REGISTRY.get_sample_value('is_working_day', {'site': 'test'}) == 0
+            
+            # Next holiday after New Year's Day is Easter Monday (April 6, 2026)
+            assert REGISTRY.get_sample_value('days_until_next_holiday', {'site': 'test'}) == 95
+        
+        load_holiday_index.cache_clear()
+    
     print("SUCCESS: Holiday logic verified.")
 
+def test_holiday_index():
+    print("Testing holiday index...")
+    
+    with tempfile.TemporaryDirectory() as cache_dir, \
+         patch('tempus.holidays.config.cache_dir', cache_dir):
+        load_holiday_index.cache_clear()
+        index = load_holiday_index('FR', None, 2025, 2027)
+        
+        assert index.get(date(2026, 7, 14)) is not None
+        assert index.get(date(2026, 7, 15)) is None
+        assert index.next_holiday(date(2026, 7, 14)) == (date(2026, 8, 15), index.get(date(2026, 8, 15)))
+        assert index.next_holiday(date(2026, 7, 14), include_today=True)[0] == date(2026, 7, 14)
+        
+        # May 2026 in France: 21 weekdays, minus May 1, 8, 14 and 25
+        assert index.working_days_until(date(2026, 5, 1), date(2026, 6, 1)) == 17
+        
+        # The index was persisted and is reloaded from disk
+        assert os.path.exists(_index_path('FR', None, 2025, 2027))
+        load_holiday_index.cache_clear()
+        with patch.object(HolidayIndex, 'build') as mock_build:
+            reloaded = load_holiday_index('FR', None, 2025, 2027)
+            mock_build.assert_not_called()
+        assert reloaded.dates == index.dates
+        assert reloaded.names == index.names
+        
+        # Subdivisions have their own index (Moselle has St Stephen's Day)
+        moselle = load_holiday_index('FR', '57', 2025, 2027)
+        assert moselle.get(date(2026, 12, 26)) is not None
+        assert index.get(date(2026, 12, 26)) is None
+        
+        load_holiday_index.cache_clear()
+    
+    print("SUCCESS: Holiday index verified.")
+
 if __name__ == "__main__":
     test_holiday_logic()
+    test_holiday_index()
@@ -0,0 +1,116 @@
+import sys
+import os
+import gzip
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from prometheus_client import REGISTRY, generate_latest
+from tempus.metrics import (
+    STATS_SECTION, Samples, publish, get_snapshot, get_exposition, accepts_gzip,
+    trash_next_days, trash_collection_today, tempus_update_last_success_timestamp
+)
+
+def test_snapshot_publish():
+    print("Testing snapshot publishing...")
+    
+    samples = Samples()
+    samples.set(trash_next_days, 3, type='black')
+    samples.set(trash_next_days, 7, type='yellow')
+    before = publish('trash', samples)
+    
+    assert before.get('trash_next_days', type='yellow') == 7
+    assert REGISTRY.get_sample_value('trash_next_days', {'type': 'black'}) == 3
+    
+    # A new run replaces the whole section: removed series vanish
+    samples = Samples()
+    samples.set(trash_next_days, 2, type='black')
+    after = publish('trash', samples)
+    
+    assert after.version > before.version
+    assert REGISTRY.get_sample_value('trash_next_days', {'type': 'yellow'}) is None
+    assert b'trash_next_days{type="black"} 2.0' in generate_latest(REGISTRY)
+    
+    # Published snapshots are never modified
+    assert before.get('trash_next_days', type='yellow') == 7
+    
+    # Labels must match the declaration
+    try:
+        samples.set(trash_next_days, 1, kind='black')
+        assert False
+    except ValueError:
+        pass
+    
+    print("SUCCESS: Snapshot publishing verified.")
+
+def test_snapshot_consistency():
+    print("Testing concurrent publishing...")
+    
+    # Two series always published together: a scrape sees both or neither
+    stop = threading.Event()
+    
+    def writer():
+        i = 0
+        while not stop.is_set():
+            samples = Samples()
+            samples.set(trash_next_days, i, type='route')
+            samples.set(trash_collection_today, i, type='route')
+            publish('trash', samples)
+            i += 1
+    
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(2000):
+            snapshot = get_snapshot()
+            assert snapshot.get('trash_next_days', type='route') == \
+                snapshot.get('trash_collection_today', type='route')
+    finally:
+        stop.set()
+        thread.join()
+    
+    print("SUCCESS: Concurrent publishing verified.")
+
+def test_exposition_cache():
+    print("Testing exposition cache...")
+    
+    samples = Samples()
+    samples.set(trash_next_days, 4, type='green')
+    publish('trash', samples)
+    
+    # Rendered once per snapshot version
+    exposition = get_exposition()
+    assert get_exposition() is exposition
+    assert b'trash_next_days{type="green"} 4.0' in exposition.body
+    assert gzip.decompress(exposition.gzip_body) == exposition.body
+    assert get_exposition(True).body.endswith(b'# EOF\n')
+    
+    # Same values: the snapshot is kept, nothing is rendered again
+    samples = Samples()
+    samples.set(trash_next_days, 4, type='green')
+    assert publish('trash', samples).version == get_snapshot().version
+    assert get_exposition() is exposition
+    
+    # Updater stats are served, but left out of the ETag
+    stats = Samples()
+    stats.set(tempus_update_last_success_timestamp, 1700000000, updater='cache')
+    publish(STATS_SECTION, stats)
+    assert b'tempus_update_last_success_timestamp_seconds{updater="cache"} 1.7e+09' in get_exposition().body
+    assert get_exposition().etag == exposition.etag
+    assert get_exposition(True).body.count(b'# EOF') == 1
+    assert get_exposition().body.count(b'# TYPE tempus_update_last_success_timestamp_seconds ') == 1
+    samples.set(trash_next_days, 5, type='green')
+    publish('trash', samples)
+    assert get_exposition().etag != exposition.etag
+    
+    assert accepts_gzip('gzip, deflate')
+    assert accepts_gzip('br;q=1.0, gzip;q=0.8')
+    assert not accepts_gzip('gzip;q=0')
+    assert not accepts_gzip('identity')
+    
+    print("SUCCESS: Exposition cache verified.")
+
+if __name__ == "__main__":
+    test_snapshot_publish()
+    test_snapshot_consistency()
+    test_exposition_cache()
\ No newline at end of file
@@ -0,0 +1,141 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from prometheus_client import REGISTRY
+from tempus import monitor
+from tempus.metrics import get_exposition
+
+def test_updates_isolated():
+    print("Testing concurrent updater isolation...")
+    
+    done = []
+    release = threading.Event()
+    
+    def ok():
+        done.append('ok')
+    
+    def broken():
+        raise RuntimeError("boom")
+    
+    def slow():
+        release.wait(5)
+        done.append('slow')
+    
+    updaters = {
+        'ok': (ok, None),
+        'broken': (broken, None),
+        'slow': (slow, None),
+    }
+    
+    with patch.dict(monitor.UPDATERS, updaters, clear=True), \
+         patch.object(monitor.config, 'update_timeout', 0.2), \
+         patch.object(monitor.config, 'snapshot_max_age', 0):
+        start = time.monotonic()
+        asyncio.run(monitor.run_updates(['ok', 'broken', 'slow']))
+        elapsed = time.monotonic() - start
+        
+        # The failing and the hanging updaters do not stop the others
+        assert done == ['ok']
+        assert elapsed < 2
+        
+        # A run still in progress is not started twice
+        assert 'slow' in monitor._running
+        asyncio.run(monitor.run_updates(['slow']))
+        
+        release.set()
+        for _ in range(50):
+            if 'slow' not in monitor._running:
+                break
+            time.sleep(0.05)
+        assert done == ['ok', 'slow']
+    
+    print("SUCCESS: Updater isolation verified.")
+
+def test_event_loop_not_blocked():
+    print("Testing event loop responsiveness during updates...")
+    
+    def busy():
+        time.sleep(0.3)
+    
+    async def scenario():
+        ticks = 0
+        updates = asyncio.create_task(monitor.run_updates(['busy-1', 'busy-2']))
+        while not updates.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        return ticks
+    
+    updaters = {'busy-1': (busy, None), 'busy-2': (busy, None)}
+    with patch.dict(monitor.UPDATERS, updaters, clear=True), \
+         patch.object(monitor.config, 'snapshot_max_age', 0):
+        start = time.monotonic()
+        ticks = asyncio.run(scenario())
+        elapsed = time.monotonic() - start
+    
+    # Both updaters ran in parallel and the loop kept running meanwhile
+    assert elapsed < 0.55
+    assert ticks > 10
+    
+    print("SUCCESS: Event loop responsiveness verified.")
+
+def test_update_instrumentation():
+    print("Testing updater self-instrumentation...")
+    
+    release = threading.Event()
+    
+    def ok():
+        pass
+    
+    def broken():
+        raise RuntimeError("boom")
+    
+    def stuck():
+        release.wait(5)
+    
+    updaters = {'fine': (ok, None), 'failing': (broken, None), 'stuck': (stuck, None)}
+    with patch.dict(monitor.UPDATERS, updaters, clear=True), \
+         patch.object(monitor.config, 'update_timeout', 0.2), \
+         patch.object(monitor.config, 'snapshot_max_age', 0):
+        before = time.time()
+        asyncio.run(monitor.run_updates(['fine', 'failing', 'stuck']))
+        
+        value = REGISTRY.get_sample_value
+        assert value('tempus_update_errors_total', {'updater': 'failing'}) == 1
+        assert value('tempus_update_errors_total', {'updater': 'fine'}) == 0
+        assert value('tempus_update_timeouts_total', {'updater': 'stuck'}) == 1
+        assert value('tempus_update_duration_seconds_count', {'updater': 'fine'}) == 1
+        assert value('tempus_update_duration_seconds_count', {'updater': 'failing'}) == 1
+        # Failing and unfinished runs are not successes
+        assert value('tempus_update_last_success_timestamp_seconds', {'updater': 'fine'}) >= before
+        assert value('tempus_update_last_success_timestamp_seconds', {'updater': 'failing'}) is None
+        assert value('tempus_resident_memory_bytes') > 0
+        
+        release.set()
+        for _ in range(50):
+            if 'stuck' not in monitor._running:
+                break
+            time.sleep(0.05)
+        
+        # Runs that change no value still publish their stats, the ETag stays
+        etag = get_exposition().etag
+        last_success = value('tempus_update_last_success_timestamp_seconds', {'updater': 'fine'})
+        time.sleep(0.01)
+        asyncio.run(monitor.run_updates(['fine']))
+        assert value('tempus_update_last_success_timestamp_seconds', {'updater': 'fine'}) > last_success
+        assert value('tempus_update_duration_seconds_count', {'updater': 'fine'}) == 2
+        assert get_exposition().etag == etag
+        assert value('tempus_update_duration_seconds_count', {'updater': 'stuck'}) == 1
+        assert value('tempus_update_duration_seconds_bucket', {'updater': 'stuck', 'le': '0.1'}) == 0
+    
+    print("SUCCESS: Updater self-instrumentation verified.")
+
+if __name__ == "__main__":
+    test_updates_isolated()
+    test_event_loop_not_blocked()
+    test_update_instrumentation()
@@ -1,12 +1,18 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from tempus.moon import update_moon_metrics, get_moon_phase_name
-from tempus.metrics import moon_phase_day, moon_phase_info
+from tempus.sites import Site
+from tempus.moon import (
+    update_moon_metrics, get_moon_phase_name, get_moon_phase, lunation_table,
+    illumination, next_moon_change, PHASE_EVENTS
+)
+from prometheus_client import REGISTRY
+
+SITE = Site('test', 49.2, -0.4, 'Europe/Paris', 'FR', 'north')
 
 def test_moon_phases():
     print("Testing moon phases...")
@@ -18,28 +24,56 @@ def test_moon_phases():
     
     # Test metrics update
     with patch('tempus.moon.datetime') as mock_date:
-        # Mock a date. 
-        # 2026-01-03 was full moon in real life? Let's not guess.
-        # Just verify that calling the function sets the metrics.
-        mock_date.now.return_value = datetime(2026, 1, 16, 12, 0, 0)
+        mock_date.now.return_value = datetime(2026, 1, 16, 12, 0, 0, tzinfo=timezone.utc)
         
-        update_moon_metrics()
+        update_moon_metrics([SITE])
         
-        day = moon_phase_day.collect()[0].samples[0].value
+        day = REGISTRY.get_sample_value('moon_phase_day', {'site': 'test'})
         print(f"Calculated Moon Day for 2026-01-16: {day}")
+        assert 25 < day < 27
         
         # Verify info metric
-        info_samples = moon_phase_info.collect()[0].samples
+        info_samples = [s for s in REGISTRY.collect() if s.name == 'moon_phase_info'][0].samples
         # Should have one sample with value 1
         assert len(info_samples) == 1
         assert info_samples[0].value == 1
-        label_phase = info_samples[0].labels['phase']
-        print(f"Calculated Phase: {label_phase}")
+        assert info_samples[0].labels['phase'] == "Waning Crescent"
         
-        if 0 <= day <= 28:
-            print("SUCCESS: Moon day is within valid range.")
-        else:
-            print("FAILURE: Moon day out of range.")
+        # New moon on 2026-01-18, full moon on 2026-02-01
+        assert REGISTRY.get_sample_value('days_until_new_moon', {'site': 'test'}) == 2
+        assert REGISTRY.get_sample_value('days_until_full_moon', {'site': 'test'}) == 16
+        assert REGISTRY.get_sample_value('moon_illumination_fraction', {'site': 'test'}) < 0.1
+    
+    print("SUCCESS: Moon metrics verified.")
+
+def test_lunation_table():
+    print("Testing lunation table...")
+    
+    instants, kinds = lunation_table()
+    assert instants == sorted(instants)
+    
+    # Meeus example 49.a: new moon of 1977 February 18, 3:37:40 TD
+    epoch = datetime(1970, 1, 1)
+    new_moons = [epoch + timedelta(seconds=ts) for ts, kind in zip(instants, kinds) if kind == 0]
+    assert any(abs(moon - datetime(1977, 2, 18, 3, 37)) < timedelta(minutes=2) for moon in new_moons)
+    
+    # The whole local day of a principal phase carries its name
+    assert get_moon_phase(datetime(2026, 1, 3, 1, tzinfo=timezone.utc), 'Europe/Paris') == "Full Moon"
+    assert get_moon_phase(datetime(2026, 1, 3, 22, tzinfo=timezone.utc), 'Europe/Paris') == "Full Moon"
+    assert get_moon_phase(datetime(2026, 1, 5, 12, tzinfo=timezone.utc), 'Europe/Paris') == "Waning Gibbous"
+    
+    # Illumination is full at full moon and dark at new moon
+    full = [ts for ts, kind in zip(instants, kinds) if kind == PHASE_EVENTS.index("Full Moon")][:100]
+    new = [ts for ts, kind in zip(instants, kinds) if kind == PHASE_EVENTS.index("New Moon")][:100]
+    assert illumination(full).min() > 0.99
+    assert illumination(new).max() < 0.01
+    
+    # Updates are due at the next phase when it comes before midnight
+    now = datetime(2026, 1, 18, 12, tzinfo=timezone.utc)
+    assert next_moon_change(now, [SITE]).strftime('%Y-%m-%d %H:%M') == '2026-01-18 19:52'
+    
+    print("SUCCESS: Lunation table verified.")
 
 if __name__ == "__main__":
     test_moon_phases()
+    test_lunation_table()
@@ -0,0 +1,101 @@
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from prometheus_client import REGISTRY
+from tempus import monitor
+from tempus.config import config
+from tempus.metrics import (
+    STATS_SECTION, HistogramData, Samples, publish, get_snapshot, get_exposition, current_context,
+    set_context, trash_next_days, tempus_update_duration_seconds
+)
+from tempus.persist import restore_snapshot, save_snapshot, snapshot_path
+from tempus.sites import Site
+
+def test_snapshot_restore():
+    print("Testing snapshot persistence...")
+    
+    histogram = HistogramData(tempus_update_duration_seconds.buckets)
+    histogram.observe(0.02)
+    
+    with tempfile.TemporaryDirectory() as cache_dir, \
+         patch.object(config, 'cache_dir', cache_dir):
+        samples = Samples()
+        samples.set(trash_next_days, 3, type='paper')
+        publish('trash', samples)
+        samples = Samples()
+        samples.set(tempus_update_duration_seconds, histogram.value(), updater='persisted')
+        publish(STATS_SECTION, samples)
+        set_context('trash', {'paper': {'next_in_days': 3}})
+        saved = get_exposition()
+        save_snapshot()
+        
+        # Values of the next run, lost with the process
+        samples = Samples()
+        samples.set(trash_next_days, 9, type='glass')
+        publish('trash', samples)
+        set_context('trash', {})
+        
+        before = get_snapshot().version
+        assert restore_snapshot()
+        assert get_snapshot().version > before
+        assert REGISTRY.get_sample_value('trash_next_days', {'type': 'paper'}) == 3
+        assert REGISTRY.get_sample_value('trash_next_days', {'type': 'glass'}) is None
+        assert current_context['trash'] == {'paper': {'next_in_days': 3}}
+        # Updater stats of the previous process are not restored
+        assert REGISTRY.get_sample_value(
+            'tempus_update_duration_seconds_bucket', {'updater': 'persisted', 'le': '0.025'}
+        ) is None
+        
+        # The body rendered before the restart is served, without the stats
+        exposition = get_exposition()
+        assert exposition.version == get_snapshot().version
+        assert exposition.body == saved.body[:saved.values_size]
+        assert b'persisted' not in exposition.body
+        assert exposition.etag == saved.etag
+        
+        # Too old, or made with other sites
+        with patch.object(config, 'snapshot_max_age', 0):
+            time.sleep(0.01)
+            assert not restore_snapshot()
+        with patch('tempus.persist.get_sites', return_value=[Site('other', 0, 0, 'UTC', 'FR', 'north')]):
+            assert not restore_snapshot()
+        
+        with open(snapshot_path(), 'w') as f:
+            f.write('{"format":')
+        assert not restore_snapshot()
+    
+    with tempfile.TemporaryDirectory() as cache_dir, \
+         patch.object(config, 'cache_dir', cache_dir):
+        assert not restore_snapshot()
+    
+    print("SUCCESS: Snapshot persistence verified.")
+
+def test_snapshot_saved_after_updates():
+    print("Testing snapshot saving after updates...")
+    
+    def update():
+        samples = Samples()
+        samples.set(trash_next_days, 1, type='saved')
+        publish('trash', samples)
+    
+    with tempfile.TemporaryDirectory() as cache_dir, \
+         patch.object(config, 'cache_dir', cache_dir), \
+         patch.dict(monitor.UPDATERS, {'saving': (update, None)}, clear=True):
+        asyncio.run(monitor.run_updates(['saving']))
+        with open(snapshot_path()) as f:
+            state = json.load(f)
+        assert state['sections']['trash']['trash_next_days'] == [[['saved'], 1.0]]
+        assert 'trash_next_days{type="saved"} 1.0' in state['exposition']
+    
+    print("SUCCESS: Snapshot saving verified.")
+
+if __name__ == "__main__":
+    test_snapshot_restore()
+    test_snapshot_saved_after_updates()
\ No newline at end of file
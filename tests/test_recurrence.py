@@ -0,0 +1,105 @@
+import sys
+import os
+import tempfile
+from datetime import date, timedelta
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tempus.recurrence import parse_rule, nth_weekday, OccurrenceQueue
+from tempus.config import config
+from tempus.trash import holiday_checker
+
+def occurrences(rule, start, count, is_holiday=None):
+    iterator = rule.occurrences(start, is_holiday)
+    return [next(iterator) for _ in range(count)]
+
+def test_recurrence_rules():
+    print("Testing recurrence rules...")
+    
+    # Every 3 weeks from a reference date
+    rule = parse_rule({'frequency': 'weekly', 'interval': 3, 'day': 'Tuesday', 'reference_date': '2026-01-06'})
+    assert occurrences(rule, date(2026, 1, 7), 2) == [date(2026, 1, 27), date(2026, 2, 17)]
+    # Dates before the reference date follow the same series
+    assert rule.next_occurrence(date(2025, 12, 10)) == date(2025, 12, 16)
+    
+    # Second Wednesday of every month
+    rule = parse_rule({'frequency': 'monthly', 'nth': 2, 'day': 'Wednesday'})
+    assert occurrences(rule, date(2026, 1, 15), 3) == [date(2026, 2, 11), date(2026, 3, 11), date(2026, 4, 8)]
+    
+    # Last Friday, every other month
+    rule = parse_rule({'frequency': 'monthly', 'nth': -1, 'day': 'Friday',
+                       'interval': 2, 'reference_date': '2026-01-30'})
+    assert occurrences(rule, date(2026, 1, 1), 3) == [date(2026, 1, 30), date(2026, 3, 27), date(2026, 5, 29)]
+    
+    # Fifth Thursday only exists in some months
+    assert nth_weekday(2026, 1, 3, 5) == date(2026, 1, 29)
+    assert nth_weekday(2026, 2, 3, 5) is None
+    
+    # Exception dates are skipped
+    rule = parse_rule({'frequency': 'weekly', 'day': 'Friday', 'exceptions': ['2026-01-16']})
+    assert rule.next_occurrence(date(2026, 1, 16)) == date(2026, 1, 23)
+    
+    # Invalid rules are rejected
+    for entry in [{'frequency': 'yearly'}, {'frequency': 'biweekly', 'day': 'Friday'},
+                  {'frequency': 'monthly', 'nth': 6}, {'holiday_shift': 'sideways'}]:
+        try:
+            parse_rule(entry)
+            assert False, entry
+        except ValueError:
+            pass
+    
+    print("SUCCESS: Recurrence rules verified.")
+
+def test_holiday_shift():
+    print("Testing holiday shifts...")
+    
+    # Holiday indexes are persisted
+    with tempfile.TemporaryDirectory() as cache_dir, patch.object(config, 'cache_dir', cache_dir):
+        # 2026-05-01 (Labour Day) and 2026-05-08 (Victory Day) are Fridays in France
+        base = {'frequency': 'weekly', 'day': 'Friday', 'country_code': 'FR'}
+        
+        rule = parse_rule(dict(base, holiday_shift='next'))
+        assert occurrences(rule, date(2026, 4, 28), 3, holiday_checker(rule)) == [
+            date(2026, 5, 2), date(2026, 5, 9), date(2026, 5, 15)
+        ]
+        
+        rule = parse_rule(dict(base, holiday_shift='previous'))
+        assert rule.next_occurrence(date(2026, 4, 28), holiday_checker(rule)) == date(2026, 4, 30)
+        
+        rule = parse_rule(dict(base, holiday_shift='skip'))
+        assert rule.next_occurrence(date(2026, 4, 28), holiday_checker(rule)) == date(2026, 5, 15)
+    
+    print("SUCCESS: Holiday shifts verified.")
+
+def test_occurrence_queue():
+    print("Testing occurrence queue...")
+    
+    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+    rules = {
+        f"route-{i}": parse_rule({
+            'frequency': 'weekly', 'interval': 1 + i % 3, 'day': days[i % 5],
+            'reference_date': (date(2026, 1, 5) + timedelta(days=i % 5)).isoformat()
+        })
+        for i in range(1000)
+    }
+    
+    start = date(2026, 1, 1)
+    queue = OccurrenceQueue(rules, start)
+    # 2026-01-01 is a Thursday
+    assert queue.peek()[0] == date(2026, 1, 1)
+    
+    # Moving forward keeps every next date equal to a fresh computation
+    for offset in (0, 1, 9, 30, 200):
+        today = start + timedelta(days=offset)
+        queue.advance(today)
+        for key, rule in list(rules.items())[::97]:
+            assert queue.next_date(key) == rule.next_occurrence(today)
+        assert queue.peek()[0] == min(day for _, day in queue.items())
+    
+    print("SUCCESS: Occurrence queue verified.")
+
+if __name__ == "__main__":
+    test_recurrence_rules()
+    test_holiday_shift()
+    test_occurrence_queue()
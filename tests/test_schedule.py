@@ -0,0 +1,114 @@
+import sys
+import os
+import asyncio
+import tempfile
+import yaml
+from datetime import date
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tempus.schedule import get_schedule, reload_schedule, invalidate_schedule
+from tempus import monitor
+
+SCHEDULE = {
+    'trash': {
+        'black': {'frequency': 'biweekly', 'day': 'Friday', 'reference_date': '2026-01-16'},
+        'green': {'frequency': 'weekly', 'day': 'Someday'},
+    },
+    'birthdays': [
+        {'name': 'Alice', 'date': '01-15'},
+        {'name': 'Leap', 'date': '02-29'},
+        {'name': 'Broken', 'date': '13-01'},
+    ]
+}
+
+def write(path, data):
+    with open(path, 'w') as f:
+        f.write(data if isinstance(data, str) else yaml.dump(data))
+
+def test_schedule_cache():
+    print("Testing compiled schedule cache...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'schedule.yaml')
+        write(path, SCHEDULE)
+        
+        schedule = get_schedule(path)
+        # Invalid entries are dropped, valid ones are typed
+        assert list(schedule.trash) == ['black']
+        assert schedule.trash['black'].rule.weekday == 4
+        assert schedule.trash['black'].rule.interval == 2
+        assert schedule.trash['black'].rule.reference_date == date(2026, 1, 16)
+        assert [b.name for b in schedule.birthdays] == ['Alice', 'Leap']
+        
+        # Unchanged file: same compiled object, no re-parse
+        with patch('tempus.schedule.yaml.safe_load') as safe_load:
+            assert get_schedule(path) is schedule
+            assert not reload_schedule(path)
+            safe_load.assert_not_called()
+        
+        # Changed file is picked up
+        write(path, {'trash': {'yellow': {'day': 'Tuesday'}}})
+        assert reload_schedule(path)
+        assert list(get_schedule(path).trash) == ['yellow']
+        
+        # A broken file keeps the last good version
+        good = get_schedule(path)
+        write(path, "trash: [unclosed")
+        assert get_schedule(path).trash == good.trash
+        
+        # Forced reload re-reads the file
+        invalidate_schedule(path)
+        assert get_schedule(path) is not good
+        
+        # Missing file gives an empty schedule
+        os.remove(path)
+        assert get_schedule(path).trash == {}
+    
+    print("SUCCESS: Schedule cache verified.")
+
+def test_watch_schedule():
+    print("Testing schedule file watcher...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'schedule.yaml')
+        write(path, SCHEDULE)
+        get_schedule(path)
+        
+        runs = []
+        
+        async def fake_run_updates(names):
+            runs.append(tuple(names))
+        
+        async def scenario():
+            shutdown = asyncio.Event()
+            reload_requested = asyncio.Event()
+            watcher = asyncio.create_task(monitor.watch_schedule(shutdown, reload_requested))
+            
+            await asyncio.sleep(0.1)
+            assert runs == []
+            
+            # File change triggers the schedule based updaters
+            write(path, {'trash': {'yellow': {'day': 'Tuesday'}}})
+            await asyncio.sleep(0.1)
+            assert runs == [monitor.SCHEDULE_UPDATERS]
+            
+            # So does an explicit reload request (SIGHUP)
+            reload_requested.set()
+            await asyncio.sleep(0.1)
+            assert len(runs) == 2
+            
+            shutdown.set()
+            await asyncio.wait_for(watcher, 1)
+        
+        with patch.object(monitor.config, 'schedule_file', path), \
+             patch.object(monitor.config, 'schedule_check_interval', 0.02), \
+             patch.object(monitor, 'run_updates', fake_run_updates):
+            asyncio.run(scenario())
+    
+    print("SUCCESS: Schedule watcher verified.")
+
+if __name__ == "__main__":
+    test_schedule_cache()
+    test_watch_schedule()
@@ -0,0 +1,83 @@
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tempus.scheduler import Scheduler, next_local_midnight, utc_now
+from tempus.sites import Site
+from tempus.clock import next_clock_change
+from tempus.sun import next_sun_change
+
+SITE = Site('test', 49.2, -0.4, 'Europe/Paris', 'FR', 'north')
+
+def test_deadlines():
+    print("Testing update deadlines...")
+    
+    # 10:00 UTC in winter: Paris midnight is 23:00 UTC
+    now = datetime(2026, 1, 16, 10, 0, tzinfo=timezone.utc)
+    assert next_local_midnight('Europe/Paris', now) == datetime(2026, 1, 16, 23, 0, tzinfo=timezone.utc)
+    
+    # In summer Paris midnight is 22:00 UTC
+    now = datetime(2026, 7, 1, 10, 0, tzinfo=timezone.utc)
+    assert next_local_midnight('Europe/Paris', now) == datetime(2026, 7, 1, 22, 0, tzinfo=timezone.utc)
+    
+    # The clock changes at the exact DST transition instant
+    now = datetime(2026, 3, 28, 23, 30, tzinfo=timezone.utc)
+    assert next_clock_change(now, [SITE]) == datetime(2026, 3, 29, 1, 0, tzinfo=timezone.utc)
+    
+    # Before sunrise, the next sun change is sunrise
+    now = datetime(2026, 1, 16, 5, 0, tzinfo=timezone.utc)
+    sunrise = next_sun_change(now, [SITE])
+    assert datetime(2026, 1, 16, 7, 0, tzinfo=timezone.utc) < sunrise < datetime(2026, 1, 16, 9, 0, tzinfo=timezone.utc)
+    
+    print("SUCCESS: Deadlines verified.")
+
+def test_heap_order():
+    print("Testing scheduler heap...")
+    
+    now = datetime(2026, 1, 16, 10, 0, tzinfo=timezone.utc)
+    scheduler = Scheduler()
+    scheduler.add('late', lambda: None, lambda n: n + timedelta(hours=2), now)
+    scheduler.add('early', lambda: None, lambda n: n + timedelta(hours=1), now)
+    scheduler.add('also-early', lambda: None, lambda n: n + timedelta(hours=1), now)
+    
+    assert scheduler.next_deadline() == now + timedelta(hours=1)
+    assert scheduler.pop_due(now) == []
+    
+    due = scheduler.pop_due(now + timedelta(hours=1))
+    assert sorted(job.name for job in due) == ['also-early', 'early']
+    assert scheduler.next_deadline() == now + timedelta(hours=2)
+    
+    print("SUCCESS: Scheduler heap verified.")
+
+def test_run_until_shutdown():
+    print("Testing scheduler loop...")
+    
+    runs = []
+    
+    async def scenario():
+        shutdown = asyncio.Event()
+        
+        def job():
+            runs.append(utc_now())
+            if len(runs) == 3:
+                shutdown.set()
+        
+        scheduler = Scheduler()
+        scheduler.add('fast', job, lambda n: n + timedelta(milliseconds=20))
+        await asyncio.wait_for(scheduler.run(shutdown), timeout=5)
+    
+    with patch('tempus.scheduler.MIN_INTERVAL', timedelta(0)):
+        asyncio.run(scenario())
+    
+    assert len(runs) == 3
+    
+    print("SUCCESS: Scheduler loop verified.")
+
+if __name__ == "__main__":
+    test_deadlines()
+    test_heap_order()
+    test_run_until_shutdown()
@@ -1,32 +1,40 @@
 import sys
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
+import pytz
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from tempus.seasons import get_season_info, get_days_until_seasons
+from tempus.seasons import get_season_info, get_days_until_seasons, season_table, next_season_change
+from tempus.sites import Site
 
 def test_seasons_north():
     print("Testing Northern Hemisphere Seasons...")
     
-    # Spring start
-    season, progress, days = get_season_info(datetime(2026, 3, 20), 'north')
+    # Spring start (March equinox 2026-03-20 14:46 UTC)
+    season, progress, days = get_season_info(datetime(2026, 3, 20, 15), 'north')
     assert season == 'spring'
-    assert progress == 0
+    assert progress < 0.1
     assert days == 93 # March 20 to June 21
     
-    # Summer start
-    season, progress, days = get_season_info(datetime(2026, 6, 21), 'north')
+    # Still winter just before the equinox
+    season, progress, days = get_season_info(datetime(2026, 3, 20, 14), 'north')
+    assert season == 'winter'
+    assert progress > 99.9
+    assert days == 0
+    
+    # Summer start (June solstice 2026-06-21 08:24 UTC)
+    season, progress, days = get_season_info(datetime(2026, 6, 21, 9), 'north')
     assert season == 'summer'
-    assert progress == 0
+    assert progress < 0.1
     
-    # Fall start
-    season, progress, days = get_season_info(datetime(2026, 9, 22), 'north')
+    # Fall start (September equinox 2026-09-23 00:05 UTC)
+    season, progress, days = get_season_info(datetime(2026, 9, 23, 1), 'north')
     assert season == 'fall'
     
-    # Winter start
-    season, progress, days = get_season_info(datetime(2026, 12, 21), 'north')
+    # Winter start (December solstice 2026-12-21 20:50 UTC)
+    season, progress, days = get_season_info(datetime(2026, 12, 21, 21), 'north')
     assert season == 'winter'
     
     # Mid-winter (Jan 1)
@@ -39,18 +47,24 @@ def test_seasons_north():
 def test_seasons_south():
     print("Testing Southern Hemisphere Seasons...")
     
-    # Spring start in South (Sep 22)
-    season, progress, days = get_season_info(datetime(2026, 9, 22), 'south')
+    # Spring start in South
+    season, progress, days = get_season_info(datetime(2026, 9, 23, 1), 'south')
     assert season == 'spring'
     
-    # Summer start in South (Dec 21)
-    season, progress, days = get_season_info(datetime(2026, 12, 21), 'south')
+    # Summer start in South
+    season, progress, days = get_season_info(datetime(2026, 12, 21, 21), 'south')
     assert season == 'summer'
     
-    # Winter start in South (Jun 21)
-    season, progress, days = get_season_info(datetime(2026, 6, 21), 'south')
+    # Winter start in South
+    season, progress, days = get_season_info(datetime(2026, 6, 21, 9), 'south')
     assert season == 'winter'
     
+    # Local calendar days: the September equinox is still on the 22nd in Santiago
+    tz = pytz.timezone('America/Santiago')
+    season, progress, days = get_season_info(tz.localize(datetime(2026, 9, 1, 12)), 'south')
+    assert season == 'winter'
+    assert days == 21
+    
     print("SUCCESS: Southern seasons verified.")
 
 def test_days_until_seasons():
@@ -70,9 +84,33 @@ def test_days_until_seasons():
     days_later = get_days_until_seasons(later)
     assert days_later['spring'] > 300 # Should be next year
     
+    # Southern hemisphere: the March equinox starts fall
+    days_south = get_days_until_seasons(today, 'south')
+    assert days_south['fall'] == 78
+    
     print("SUCCESS: Days until seasons verified.")
 
+def test_season_table():
+    print("Testing Season Table...")
+    
+    instants, kinds = season_table()
+    assert instants == sorted(instants)
+    assert kinds[:4] == [0, 1, 2, 3]
+    
+    # Meeus example 27.a: June solstice 1962 at JDE 2437837.39245 (TD)
+    june_1962 = datetime(1970, 1, 1) + timedelta(seconds=instants[(1962 - 1900) * 4 + 1])
+    assert abs(june_1962 - datetime(1962, 6, 21, 21, 24, 42)) < timedelta(minutes=1)
+    
+    # The next update is due at the equinox when it comes before midnight
+    site = Site('test', 49.2, -0.4, 'Europe/Paris', 'FR', 'north')
+    now = datetime(2026, 3, 20, 12, tzinfo=pytz.utc)
+    change = next_season_change(now, [site])
+    assert change.strftime('%Y-%m-%d %H:%M') == '2026-03-20 14:45'
+    
+    print("SUCCESS: Season table verified.")
+
 if __name__ == "__main__":
     test_seasons_north()
     test_seasons_south()
     test_days_until_seasons()
+    test_season_table()
@@ -0,0 +1,111 @@
+import sys
+import os
+import threading
+import yaml
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tempus import sites as sites_module
+from tempus.config import config
+from tempus.sites import Site, load_sites, map_sites, shutdown_pool
+from tempus.seasons import compute_season, update_season_metrics
+from prometheus_client import REGISTRY
+from tempus.metrics import site_contexts
+
+def test_load_sites():
+    print("Testing sites file...")
+    
+    test_sites = {
+        'sites': [
+            {'name': 'caen', 'latitude': 49.2, 'longitude': -0.4,
+             'timezone': 'Europe/Paris', 'country_code': 'FR'},
+            {'name': 'sydney', 'latitude': -33.87, 'longitude': 151.2,
+             'timezone': 'Australia/Sydney', 'country_code': 'AU'},
+            {'name': 'caen', 'latitude': 0, 'longitude': 0},
+            {'latitude': 0, 'longitude': 0}
+        ]
+    }
+    
+    with open('test_sites.yaml', 'w') as f:
+        yaml.dump(test_sites, f)
+    
+    try:
+        sites = load_sites('test_sites.yaml')
+        
+        # Duplicate and unnamed entries are skipped
+        assert [s.name for s in sites] == ['caen', 'sydney']
+        # Hemisphere is derived from the latitude
+        assert sites[0].hemisphere == 'north'
+        assert sites[1].hemisphere == 'south'
+        assert sites[1].country_code == 'AU'
+        
+        # No sites file: a single default site from the environment
+        assert len(load_sites('')) == 1
+        
+        print("SUCCESS: Sites file verified.")
+        
+    finally:
+        if os.path.exists('test_sites.yaml'):
+            os.remove('test_sites.yaml')
+
+def test_site_labels():
+    print("Testing site labels...")
+    
+    sites = [
+        Site('north-site', 49.2, -0.4, 'Europe/Paris', 'FR', 'north'),
+        Site('south-site', -33.87, 151.2, 'Australia/Sydney', 'AU', 'south')
+    ]
+    
+    with patch('tempus.seasons.datetime') as mock_datetime:
+        mock_datetime.now.return_value = datetime(2026, 1, 15, 12, 0, 0)
+        mock_datetime.side_effect = lambda *args, **kw: datetime(*args, **kw)
+        update_season_metrics(sites)
+    
+    assert REGISTRY.get_sample_value('season_id', {'site': 'north-site', 'season': 'winter'}) == 1
+    assert REGISTRY.get_sample_value('season_id', {'site': 'south-site', 'season': 'summer'}) == 1
+    assert site_contexts['south-site']['season']['name'] == 'summer'
+    
+    print("SUCCESS: Site labels verified.")
+
+def test_map_sites_isolation():
+    print("Testing per-site failure isolation...")
+    
+    sites = [
+        Site('ok', 49.2, -0.4, 'Europe/Paris', 'FR', 'north'),
+        Site('broken', 49.2, -0.4, 'Not/AZone', 'FR', 'north')
+    ]
+    
+    results = map_sites(compute_season, sites)
+    assert results[0]['hemisphere'] == 'north'
+    assert results[1] is None
+    
+    print("SUCCESS: Failure isolation verified.")
+
+def test_map_sites_pool():
+    print("Testing sharded sites from a thread...")
+    
+    sites = [Site(f"site-{i}", 49.2, -0.4, 'Europe/Paris', 'FR', 'north' if i % 2 else 'south') for i in range(8)]
+    results = []
+    
+    # Updaters create the pool from worker threads
+    with patch.object(config, 'site_shard_threshold', 4), patch.object(config, 'site_workers', 2):
+        try:
+            thread = threading.Thread(target=lambda: results.extend(map_sites(compute_season, sites)))
+            thread.start()
+            thread.join(timeout=60)
+            assert not thread.is_alive()
+            assert sites_module._pool._mp_context.get_start_method() != 'fork'
+        finally:
+            shutdown_pool()
+    
+    assert [result['hemisphere'] for result in results] == [site.hemisphere for site in sites]
+    
+    print("SUCCESS: Sharded sites verified.")
+
+if __name__ == "__main__":
+    test_load_sites()
+    test_site_labels()
+    test_map_sites_isolation()
+    test_map_sites_pool()
@@ -0,0 +1,52 @@
+import sys
+import os
+import subprocess
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+def run_python(*args, **env):
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, timeout=60,
+        env={**os.environ, **env}
+    )
+
+def test_lazy_imports():
+    print("Testing lazy imports...")
+    
+    # Computations do not load the monitor, the HTTP server or holidays
+    result = run_python('-c', (
+        "import sys, tempus.seasons, tempus.sun, tempus.holidays\n"
+        "print(sorted(m for m in ('tempus.monitor', 'aiohttp', 'holidays', 'yaml') if m in sys.modules))"
+    ))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+    
+    # The package attribute still starts the exporter
+    result = run_python('-c', "import tempus; print(tempus.start_monitor.__module__)")
+    assert result.stdout.strip() == "tempus.monitor"
+    
+    print("SUCCESS: Lazy imports verified.")
+
+def test_profile_startup():
+    print("Testing startup profiling...")
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        result = run_python('-m', 'tempus', '--profile-startup', CACHE_DIR=cache_dir)
+    
+    assert result.returncode == 0, result.stderr
+    lines = result.stdout.splitlines()
+    assert lines[0].startswith("Imports")
+    assert any(line.split()[:2] == ['import', 'aiohttp.web'] for line in lines)
+    assert any(line.split()[:2] == ['update', 'sun'] for line in lines)
+    assert any(line.startswith("Startup") for line in lines)
+    assert lines[-1].startswith("Total") and lines[-1].endswith(" ms")
+    # No step failed
+    assert all(line.endswith(" ms") for line in lines)
+    
+    print("SUCCESS: Startup profiling verified.")
+
+if __name__ == "__main__":
+    test_lazy_imports()
+    test_profile_startup()
\ No newline at end of file
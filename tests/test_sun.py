@@ -5,18 +5,17 @@ from unittest.mock import patch, MagicMock
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Mock config
-with patch('tempus.config.config') as mock_config:
-    mock_config.latitude = 49.2
-    mock_config.longitude = -0.4
-    mock_config.timezone = 'Europe/Paris'
-    from tempus.sun import update_sun_metrics
-    from tempus.metrics import sun_sunrise_minutes, sun_sunset_minutes, sun_day_length_minutes
+from tempus.sites import Site
+from tempus import sun
+from tempus.sun import next_sun_up_change, update_sun_metrics, update_sun_up
+from prometheus_client import REGISTRY
+
+SITE = Site('test', 49.2, -0.4, 'Europe/Paris', 'FR', 'north')
 
 def test_sun_metrics():
     print("Testing Sun Metrics...")
     
-    # Mock astral's sun function to return fixed values
+    # Mock the ephemeris lookup to return fixed values
     mock_sun_data = {
         'sunrise': datetime(2026, 1, 1, 8, 0, tzinfo=timezone.utc),
         'sunset': datetime(2026, 1, 1, 17, 0, tzinfo=timezone.utc)
@@ -27,10 +26,10 @@ def test_sun_metrics():
         'sunrise': datetime(2026, 1, 1, 8, 1, tzinfo=timezone.utc),
         'sunset': datetime(2026, 1, 1, 16, 59, tzinfo=timezone.utc)
     }
-
-    with patch('tempus.sun.sun') as mock_astral_sun:
+    
+    with patch('tempus.sun.sun_times') as mock_sun_times:
         # First call for today, second for yesterday
-        mock_astral_sun.side_effect = [mock_sun_data, mock_yesterday_sun]
+        mock_sun_times.side_effect = [mock_sun_data, mock_yesterday_sun]
         
         # We also need to mock datetime.now(tz) to be predictable
         with patch('tempus.sun.datetime') as mock_datetime:
@@ -38,16 +37,46 @@ def test_sun_metrics():
             mock_datetime.now.return_value = mock_now
             mock_datetime.side_effect = lambda *args, **kw: datetime(*args, **kw)
             
-            update_sun_metrics()
+            update_sun_metrics([SITE])
             
             # 8:00 AM is 480 minutes
-            assert sun_sunrise_minutes._value.get() == 480
+            assert REGISTRY.get_sample_value('sun_sunrise_minutes', {'site': 'test'}) == 480
             # 5:00 PM is 1020 minutes
-            assert sun_sunset_minutes._value.get() == 1020
+            assert REGISTRY.get_sample_value('sun_sunset_minutes', {'site': 'test'}) == 1020
             # 1020 - 480 = 540
-            assert sun_day_length_minutes._value.get() == 540
+            assert REGISTRY.get_sample_value('sun_day_length_minutes', {'site': 'test'}) == 540
             
     print("SUCCESS: Sun metrics verified.")
 
+def test_sun_up():
+    print("Testing per-site sun_is_up updates...")
+    
+    paris = Site('up-paris', 48.9, 2.4, 'Europe/Paris', 'FR', 'north')
+    sydney = Site('up-sydney', -33.9, 151.2, 'Australia/Sydney', 'AU', 'south')
+    sites = [paris, sydney]
+    
+    with patch.dict(sun._sun_up, clear=True):
+        # Night in Paris, afternoon in Sydney
+        now = datetime(2026, 1, 16, 5, 0, tzinfo=timezone.utc)
+        update_sun_up(sites, now)
+        assert REGISTRY.get_sample_value('sun_is_up', {'site': 'up-paris'}) == 0
+        assert REGISTRY.get_sample_value('sun_is_up', {'site': 'up-sydney'}) == 1
+        
+        # Paris sunrise comes first, only that site is computed again
+        sunrise = next_sun_up_change(now, sites)
+        assert datetime(2026, 1, 16, 7, 0, tzinfo=timezone.utc) < sunrise < datetime(2026, 1, 16, 8, 0, tzinfo=timezone.utc)
+        with patch('tempus.sun._sun_up_at', wraps=sun._sun_up_at) as sun_up_at:
+            update_sun_up(sites, sunrise + timedelta(seconds=1))
+        assert [call.args[0] for call in sun_up_at.call_args_list] == [paris]
+        assert REGISTRY.get_sample_value('sun_is_up', {'site': 'up-paris'}) == 1
+        assert REGISTRY.get_sample_value('sun_is_up', {'site': 'up-sydney'}) == 1
+        
+        # Then Sydney sunset, at 20:00 local time
+        sunset = next_sun_up_change(sunrise + timedelta(seconds=1), sites)
+        assert datetime(2026, 1, 16, 9, 0, tzinfo=timezone.utc) < sunset < datetime(2026, 1, 16, 9, 30, tzinfo=timezone.utc)
+    
+    print("SUCCESS: sun_is_up updates verified.")
+
 if __name__ == "__main__":
     test_sun_metrics()
+    test_sun_up()
@@ -0,0 +1,66 @@
+import sys
+import os
+import subprocess
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from tempus.metrics import Samples, publish, get_exposition, trash_next_days
+from tempus.textfile import write_textfile
+
+def test_write_textfile():
+    print("Testing textfile writes...")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tempus.prom')
+        samples = Samples()
+        samples.set(trash_next_days, 4, type='textfile')
+        publish('trash', samples)
+        
+        assert write_textfile(path)
+        with open(path, 'rb') as f:
+            assert f.read() == get_exposition().body
+        
+        # Same content: the file is left alone
+        mtime = os.stat(path).st_mtime_ns
+        assert not write_textfile(path)
+        assert os.stat(path).st_mtime_ns == mtime
+        
+        samples.set(trash_next_days, 5, type='textfile')
+        publish('trash', samples)
+        assert write_textfile(path)
+        with open(path) as f:
+            assert 'trash_next_days{type="textfile"} 5.0' in f.read()
+        
+        # No temporary file left behind
+        assert os.listdir(directory) == ['tempus.prom']
+    
+    print("SUCCESS: Textfile writes verified.")
+
+def test_textfile_command():
+    print("Testing textfile command...")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tempus.prom')
+        command = [sys.executable, '-m', 'tempus', 'textfile', '--out', path]
+        env = {**os.environ, 'CACHE_DIR': directory}
+        
+        result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert f"Wrote {path}" in result.stderr
+        with open(path) as f:
+            content = f.read()
+        assert 'sun_sunrise_minutes{site="default"}' in content
+        # Values only, they do not change between runs
+        assert 'tempus_update_duration_seconds_count' not in content
+        
+        result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert "Wrote" not in result.stderr
+    
+    print("SUCCESS: Textfile command verified.")
+
+if __name__ == "__main__":
+    test_write_textfile()
+    test_textfile_command()
\ No newline at end of file
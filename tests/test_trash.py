@@ -6,6 +6,9 @@ from unittest.mock import patch, MagicMock
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# Imported first so that it keeps the real config
+import tempus.holidays
+
 # Mock config before importing trash
 with patch('tempus.config.config') as mock_config:
     mock_config.schedule_file = "test_schedule.yaml"
@@ -0,0 +1,114 @@
+import sys
+import os
+import asyncio
+import tempfile
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import numpy as np
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tempus.workdays import count_workdays, offset_workdays
+from tempus.holidays import load_holiday_index
+from tempus.api import handle_workdays
+
+CACHE_DIR = tempfile.mkdtemp()
+
+def test_count_workdays():
+    print("Testing working day counts...")
+    
+    with patch('tempus.holidays.config.cache_dir', CACHE_DIR):
+        index = load_holiday_index('FR', None, 2024, 2028)
+        
+        # Compare with a day by day count
+        start = date(2026, 1, 1)
+        for span in [0, 1, 7, 31, 200, 700]:
+            end = start + timedelta(days=span)
+            expected = sum(
+                1 for i in range(span)
+                if (start + timedelta(days=i)).weekday() < 5
+                and index.get(start + timedelta(days=i)) is None
+            )
+            assert count_workdays(start, end, 'FR') == expected, span
+        
+        # Vectorized over arrays of dates
+        starts = np.array(['2026-05-01', '2026-06-01'], dtype='datetime64[D]')
+        ends = np.array(['2026-06-01', '2026-07-01'], dtype='datetime64[D]')
+        assert list(count_workdays(starts, ends, 'FR')) == [17, 22]
+        
+        # Friday/Saturday weekend
+        assert count_workdays(date(2026, 6, 1), date(2026, 6, 8), 'FR', weekmask='1111001') == 5
+    
+    print("SUCCESS: Working day counts verified.")
+
+def test_offset_workdays():
+    print("Testing working day offsets...")
+    
+    with patch('tempus.holidays.config.cache_dir', CACHE_DIR):
+        # Thursday April 30, 2026 + 1 working day skips May 1 (holiday) and the weekend
+        assert offset_workdays(date(2026, 4, 30), 1, 'FR') == date(2026, 5, 4)
+        # Going backward from Monday May 4
+        assert offset_workdays(date(2026, 5, 4), -1, 'FR') == date(2026, 4, 30)
+        
+        # One working day a week: 300 of them take almost 6 years
+        start = date(2026, 1, 5)
+        result = offset_workdays(start, 300, 'FR', weekmask='0000001')
+        index = load_holiday_index('FR', None, 2026, 2032)
+        sundays = [start + timedelta(days=6 + 7 * week) for week in range(400)]
+        # Monday start rolls forward to the first Sunday, then 300 more
+        assert result == [day for day in sundays if index.get(day) is None][300] == date(2031, 11, 9)
+        assert offset_workdays(result, -300, 'FR', weekmask='0000001') == date(2026, 1, 11)
+        
+        # Each offset rolls its own way: Saturday May 2 + 1 is Tuesday May 5,
+        # Saturday May 2 - 1 is Wednesday April 29
+        saturday = date(2026, 5, 2)
+        mixed = offset_workdays(saturday, [1, -1], 'FR')
+        assert list(mixed.astype(date)) == [offset_workdays(saturday, 1, 'FR'), offset_workdays(saturday, -1, 'FR')]
+        assert list(mixed.astype(date)) == [date(2026, 5, 5), date(2026, 4, 29)]
+        assert offset_workdays(saturday, []).shape == (0,)
+    
+    print("SUCCESS: Working day offsets verified.")
+
+def test_workdays_endpoint():
+    print("Testing /workdays endpoint...")
+    
+    async def scenario():
+        app = web.Application()
+        app.router.add_get('/workdays', handle_workdays)
+        async with TestClient(TestServer(app)) as client:
+            resp = await client.get('/workdays?from=2026-05-01&to=2026-06-01&country=FR')
+            assert resp.status == 200
+            assert (await resp.json())['working_days'] == 17
+            
+            resp = await client.get('/workdays?from=2026-04-30&days=1&country=fr')
+            assert (await resp.json())['date'] == '2026-05-04'
+            
+            resp = await client.get('/workdays?from=2026-05-01')
+            assert resp.status == 400
+            resp = await client.get('/workdays?from=2026-05-01&to=2026-06-01&country=XX')
+            assert resp.status == 400
+            
+            # Bounded work per request
+            today = date.today()
+            far = (today + timedelta(days=400)).isoformat()
+            resp = await client.get(f'/workdays?from={today.isoformat()}&to={far}&country=FR')
+            assert resp.status == 400
+            resp = await client.get(f'/workdays?from={today.isoformat()}&days=100&weekmask=0000001&country=FR')
+            assert resp.status == 400
+            for weekmask in ('0000000', 'Mon Tue', '11111'):
+                resp = await client.get(f'/workdays?from={today.isoformat()}&days=1&weekmask={weekmask}')
+                assert resp.status == 400
+    
+    with patch('tempus.holidays.config.cache_dir', CACHE_DIR), \
+         patch('tempus.api.config.workdays_max_days', 365):
+        asyncio.run(scenario())
+    
+    print("SUCCESS: /workdays endpoint verified.")
+
+if __name__ == "__main__":
+    test_count_workdays()
+    test_offset_workdays()
+    test_workdays_endpoint()